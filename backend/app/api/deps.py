@@ -2,15 +2,31 @@
 import hmac
 import hashlib
 import json
+import os
 import time
-from typing import Generator, Optional
+from functools import lru_cache
+from typing import AsyncIterator, Generator, Optional, Tuple
 from urllib.parse import parse_qsl
 
-from fastapi import Depends, Header, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import Depends, Header, HTTPException, Query, status
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from starlette.concurrency import run_in_threadpool
 
+from app.db import async_session
+from app.db import session as sync_session
+from app.db.async_session import AsyncDb, AsyncSessionDb, ThreadpoolDb
+from app.db.routing import SESSION_USER_KEY, recent_writers
 from app.db.session import SessionLocal
 from app.models.user import User
+from app.services.init_data_cache import (
+    INITDATA_CACHE_BLOCKED_TTL_SECONDS,
+    INITDATA_CACHE_SNAPSHOT_TTL_SECONDS,
+    VerifiedInitData,
+    init_data_cache,
+)
+from app.services.session_tokens import session_denylist, verify_session_token
 
 INITDATA_TTL_SECONDS = 60 * 60 * 24  # 24 часа
 
@@ -23,7 +39,26 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def _verify_and_extract_tg_user_id(init_data: str, bot_token: str) -> int:
+async def get_async_db() -> AsyncIterator[AsyncDb]:
+    """Сессия для async-эндпоинтов: AsyncSession при DB_ASYNC, иначе Session в threadpool."""
+    if async_session.AsyncSessionLocal is not None:
+        async with async_session.AsyncSessionLocal() as session:
+            yield AsyncSessionDb(session)
+        return
+
+    db = SessionLocal()
+    try:
+        yield ThreadpoolDb(db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+@lru_cache(maxsize=4)
+def _webapp_secret_key(bot_token: str) -> bytes:
+    return hmac.new(b"WebAppData", bot_token.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _verify_and_extract_tg_user_id(init_data: str, bot_token: str) -> Tuple[int, Optional[int]]:
     """
     Telegram WebApp initData verification:
     - parse querystring
@@ -32,6 +67,7 @@ def _verify_and_extract_tg_user_id(init_data: str, bot_token: str) -> int:
     - check hash = HMAC_SHA256(secret_key, data_check_string)
     - optionally check auth_date freshness
     - extract user.id from 'user' JSON
+    Returns (user.id, auth_date or None).
     """
     if not init_data:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="USER_NOT_AUTHENTICATED")
@@ -46,6 +82,7 @@ def _verify_and_extract_tg_user_id(init_data: str, bot_token: str) -> int:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="USER_INVALID_SIGNATURE")
 
     # expiry check
+    auth_ts: Optional[int] = None
     auth_date = pairs.get("auth_date")
     if auth_date:
         try:
@@ -62,7 +99,7 @@ def _verify_and_extract_tg_user_id(init_data: str, bot_token: str) -> int:
         data_check_items.append(f"{k}={pairs[k]}")
     data_check_string = "\n".join(data_check_items)
 
-    secret_key = hmac.new(b"WebAppData", bot_token.encode("utf-8"), hashlib.sha256).digest()
+    secret_key = _webapp_secret_key(bot_token)
     computed_hash = hmac.new(secret_key, data_check_string.encode("utf-8"), hashlib.sha256).hexdigest()
 
     if not hmac.compare_digest(computed_hash, received_hash):
@@ -78,29 +115,234 @@ def _verify_and_extract_tg_user_id(init_data: str, bot_token: str) -> int:
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="USER_NOT_AUTHENTICATED")
 
-    return tg_user_id
+    return tg_user_id, auth_ts
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    x_tg_init_data: Optional[str] = Header(default=None, alias="X-Tg-Init-Data"),
-) -> User:
+def user_from_init_data(db: Session, init_data: str) -> User:
+    """
+    Пользователь по Telegram initData, привязанный к сессии db.
+    Общая проверка для зависимостей ниже и для обмена initData на токен
+    сессии (POST /auth/session).
+    """
     bot_token = (  # берем из окружения через стандартный способ
         __import__("os").getenv("TELEGRAM_BOT_TOKEN", "")
     )
 
-    tg_user_id = _verify_and_extract_tg_user_id(x_tg_init_data or "", bot_token)
+    # уже проверенная строка initData: без разбора, HMAC и похода в БД
+    cached = init_data_cache.get(bot_token, init_data) if init_data else None
+    if cached is not None:
+        if cached.is_blocked or session_denylist.is_revoked(cached.user_id):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Пользователь заблокирован")
+        return _bind_user(db, _user_stub(db, cached.user_id, cached.role))
+
+    tg_user_id, auth_ts = _verify_and_extract_tg_user_id(init_data, bot_token)
 
     user = db.query(User).filter(User.telegram_id == tg_user_id).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="USER_NOT_FOUND")
 
-    if getattr(user, "is_blocked", False):
+    is_blocked = bool(getattr(user, "is_blocked", False))
+    expires_at = min(
+        (auth_ts if auth_ts is not None else time.time()) + INITDATA_TTL_SECONDS,
+        time.time() + INITDATA_CACHE_SNAPSHOT_TTL_SECONDS,
+    )
+    if is_blocked:
+        expires_at = min(expires_at, time.time() + INITDATA_CACHE_BLOCKED_TTL_SECONDS)
+    init_data_cache.put(
+        bot_token,
+        init_data,
+        VerifiedInitData(
+            telegram_id=tg_user_id,
+            user_id=user.id,
+            role=user.role,
+            is_blocked=is_blocked,
+            expires_at=expires_at,
+        ),
+    )
+
+    if is_blocked:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Пользователь заблокирован")
 
+    return _bind_user(db, user)
+
+
+def _user_from_session_token(db: Session, token: str) -> User:
+    try:
+        claims = verify_session_token(token)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="USER_INVALID_TOKEN")
+
+    if session_denylist.is_revoked(claims.user_id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Пользователь заблокирован")
+
+    return _bind_user(db, _user_stub(db, claims.user_id, claims.role))
+
+
+def _user_stub(db: Session, user_id: int, role: str) -> User:
+    # Без запроса в БД: id и роль уже известны (токен, кэш initData),
+    # остальные поля подгрузятся одним SELECT по PK при первом обращении к ним.
+    user = db.identity_map.get(identity_key(User, user_id))
+    if user is None:
+        user = User(id=user_id, role=role, is_blocked=False)
+        make_transient_to_detached(user)
+        db.add(user)
+    return user
+
+
+def _bind_user(db: Session, user: User) -> User:
+    # по этой отметке коммиты сессии засчитываются пользователю (read-your-writes)
+    db.info[SESSION_USER_KEY] = user.id
     return user
 
 
+def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return token.strip()
+
+
+def get_current_user(
+    db: Session = Depends(get_db),
+    x_tg_init_data: Optional[str] = Header(default=None, alias="X-Tg-Init-Data"),
+    authorization: Optional[str] = Header(default=None),
+) -> User:
+    """
+    Текущий пользователь: по токену сессии (Authorization: Bearer, см.
+    POST /auth/session) или по Telegram initData (X-Tg-Init-Data).
+    """
+    token = _bearer_token(authorization)
+    if token:
+        return _user_from_session_token(db, token)
+    return user_from_init_data(db, x_tg_init_data or "")
+
+
+def get_stream_user(
+    db: Session = Depends(get_db),
+    x_tg_init_data: Optional[str] = Header(default=None, alias="X-Tg-Init-Data"),
+    authorization: Optional[str] = Header(default=None),
+    token: Optional[str] = Query(default=None, description="Токен сессии для EventSource"),
+) -> User:
+    """
+    Та же проверка, что и в get_current_user, но токен сессии можно
+    передать и query-параметром — для потоковых эндпоинтов (SSE): EventSource
+    не умеет слать заголовки. initData в URL не принимаем: он живёт сутки и
+    оседал бы в логах прокси; короткий токен — POST /auth/session.
+    """
+    session_token = _bearer_token(authorization) or token
+    if session_token:
+        return _user_from_session_token(db, session_token)
+    return user_from_init_data(db, x_tg_init_data or "")
+
+
+async def get_current_user_async(
+    db: AsyncDb = Depends(get_async_db),
+    x_tg_init_data: Optional[str] = Header(default=None, alias="X-Tg-Init-Data"),
+    authorization: Optional[str] = Header(default=None),
+) -> User:
+    """get_current_user для async-эндпоинтов: пользователь привязан к сессии из get_async_db."""
+    token = _bearer_token(authorization)
+    if token:
+        return await db.run(_user_from_session_token, token)
+    return await db.run(user_from_init_data, x_tg_init_data or "")
+
+
+def get_read_db(
+    primary: Session = Depends(get_db),
+    x_tg_init_data: Optional[str] = Header(default=None, alias="X-Tg-Init-Data"),
+    authorization: Optional[str] = Header(default=None),
+) -> Generator[Session, None, None]:
+    """
+    Сессия для списков и карточек: read-only движок, если он настроен,
+    иначе основная сессия. Пользователь, который только что писал,
+    читает с основной базы — так он сразу видит свои изменения.
+    Аутентификацию не требует: годится и для публичных эндпоинтов.
+    """
+    if sync_session.ReadSessionLocal is None:
+        yield primary
+        return
+    user_id = _request_user_id(x_tg_init_data, authorization)
+    if user_id is not None and recent_writers.is_recent(user_id):
+        yield primary
+        return
+
+    db = sync_session.ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(
+    primary: AsyncDb = Depends(get_async_db),
+    current: User = Depends(get_current_user_async),
+) -> AsyncIterator[AsyncDb]:
+    """
+    get_read_db для async-эндпоинтов. Все они требуют аутентификации,
+    поэтому писавшего пользователя узнаём прямо по current.
+
+    current остаётся в основной сессии как есть (из токена — только id и
+    роль). Эндпоинт, которому нужны другие поля пользователя, берёт их
+    через load_user_row внутри run().
+    """
+    if async_session.AsyncReadSessionLocal is not None:
+        if recent_writers.is_recent(current.id):
+            yield primary
+            return
+        async with async_session.AsyncReadSessionLocal() as session:
+            yield AsyncSessionDb(session)
+        return
+
+    if sync_session.ReadSessionLocal is None or recent_writers.is_recent(current.id):
+        yield primary
+        return
+
+    db = sync_session.ReadSessionLocal()
+    try:
+        yield ThreadpoolDb(db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+def _request_user_id(x_tg_init_data: Optional[str], authorization: Optional[str]) -> Optional[int]:
+    """
+    id пользователя запроса без обращения к БД: из токена сессии или из
+    кэша проверенных initData. Писавший пользователь уже проходил
+    аутентификацию, поэтому его initData в кэше есть.
+    """
+    token = _bearer_token(authorization)
+    if token:
+        try:
+            return verify_session_token(token).user_id
+        except ValueError:
+            return None
+    if x_tg_init_data:
+        cached = init_data_cache.get(os.getenv("TELEGRAM_BOT_TOKEN", ""), x_tg_init_data)
+        if cached is not None:
+            return cached.user_id
+    return None
+
+
+def load_user_row(db: Session, user: User) -> User:
+    """
+    Пользователь со всеми полями — для эндпоинтов, которым мало id и роли.
+    Вызывать внутри run(): пользователь из initData уже загружен целиком и
+    возвращается как есть, заготовка из токена сессии дочитывается одним
+    SELECT в сессии db (в том числе read-only).
+    """
+    if not inspect(user).unloaded & set(User.__mapper__.column_attrs.keys()):
+        return user
+    if user in db:
+        db.refresh(user)
+        return user
+    row = db.get(User, user.id)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="USER_NOT_FOUND")
+    return row
+
+
 def require_role(*roles: str):
     def dependency(current: User = Depends(get_current_user)) -> User:
         if current.role not in roles:
@@ -110,3 +352,15 @@ def require_role(*roles: str):
             )
         return current
     return dependency
+
+
+def require_role_async(*roles: str):
+    async def dependency(current: User = Depends(get_current_user_async)) -> User:
+        # роль загружена вместе с пользователем (или пришла в токене) — без БД
+        if current.role not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Недостаточно прав. Нужна роль: {roles}",
+            )
+        return current
+    return dependency
@@ -0,0 +1,46 @@
+# app/api/etag.py
+#
+# Строгие ETag по дешёвому маркеру версии (count + max(updated_at) и т.п.),
+# а не по хэшу уже сериализованного тела: при совпадении If-None-Match
+# эндпоинт отдаёт 304, не собирая DTO и не гоняя списочный запрос.
+
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match сравнивается "слабо" (RFC 9110): W/-префикс игнорируем.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import (auth, users, orders, responses, reviews, admin_reviews,support, admin_support,admin_users, admin_orders, admin_stats,)
+from app.api.v1.endpoints import (auth, users, orders, responses, reviews, admin_reviews,support, admin_support,admin_users, admin_orders, admin_stats, telegram_webhook,)
 
 api_router = APIRouter()
 api_router.include_router(auth.router, tags=["auth"])
@@ -15,4 +15,5 @@ api_router.include_router(support.router, tags=["support"])
 api_router.include_router(admin_support.router, tags=["admin"])
 api_router.include_router(admin_users.router, tags=["admin"])
 api_router.include_router(admin_orders.router, tags=["admin"])
-api_router.include_router(admin_stats.router, tags=["admin"])
\ No newline at end of file
+api_router.include_router(admin_stats.router, tags=["admin"])
+api_router.include_router(telegram_webhook.router, tags=["telegram"])
@@ -5,10 +5,12 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, require_role
+from app.api.deps import get_db, get_read_db, require_role
 from app.models.order import Order
 from app.models.user import User
 from app.schemas.order import AdminOrderOut, AdminOrderUpdate, OrderStatus
+from app.services.feed_cache import feed_cache
+from app.services.order_events import publish_order_change
 
 router = APIRouter(prefix="/admin")
 
@@ -34,7 +36,7 @@ def list_orders_admin(
         default=None,
         description="Фильтр по исполнителю",
     ),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current: User = Depends(require_role("admin")),
 ):
     """
@@ -87,6 +89,8 @@ def update_order_admin(
     db.add(order)
     db.commit()
     db.refresh(order)
+    feed_cache.invalidate(order.city)
+    publish_order_change(order)
 
     return _to_admin_order_out(order)
 
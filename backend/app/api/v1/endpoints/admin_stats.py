@@ -7,12 +7,14 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, require_role
+from app.api.deps import get_read_db, require_role
 from app.models.user import User
 from app.models.order import Order
 from app.models.response import Response
 from app.models.review import Review
-from app.schemas.admin import AdminStatsOut, OrdersByStatus
+from app.schemas.admin import AdminStatsOut, BotStatsOut, FeedCacheStatsOut, OrdersByStatus
+from app.services.feed_cache import feed_cache
+from bot.client import get_bot
 
 router = APIRouter(prefix="/admin")
 
@@ -37,7 +39,7 @@ def get_admin_stats(
         default=None,
         description="Дата до (YYYY-MM-DD) включительно",
     ),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current: User = Depends(require_role("admin")),
 ):
     """
@@ -167,3 +169,45 @@ def get_admin_stats(
         approved_reviews=approved_reviews,
         avg_time_to_first_response_hours=avg_time,
     )
+
+
+@router.get(
+    "/stats/feed-cache",
+    response_model=FeedCacheStatsOut,
+)
+def get_feed_cache_stats(
+    current: User = Depends(require_role("admin")),
+):
+    """
+    Состояние кэша ленты заказов в текущем процессе (hit ratio и т.п.).
+    """
+    stats = feed_cache.stats()
+    return FeedCacheStatsOut(
+        hits=stats.hits,
+        misses=stats.misses,
+        invalidations=stats.invalidations,
+        cities=stats.cities,
+        hit_ratio=stats.hit_ratio,
+    )
+
+
+@router.get(
+    "/stats/bot",
+    response_model=BotStatsOut,
+)
+def get_bot_stats(
+    current: User = Depends(require_role("admin")),
+):
+    """
+    Счётчики отправки сообщений ботом в текущем процессе.
+    """
+    bot = get_bot()
+    if bot is None:
+        return BotStatsOut(configured=False, sent=0, throttled=0, failed=0)
+    stats = bot.stats()
+    return BotStatsOut(
+        configured=True,
+        sent=stats.sent,
+        throttled=stats.throttled,
+        failed=stats.failed,
+    )
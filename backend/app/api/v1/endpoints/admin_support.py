@@ -5,7 +5,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, require_role
+from app.api.deps import get_db, get_read_db, require_role
 from app.models.support_ticket import SupportTicket
 from app.models.user import User
 from app.schemas.support import SupportAdminOut, SupportStatus, SupportUpdate
@@ -26,7 +26,7 @@ def get_support_tickets_admin(
         default=None,
         description="Фильтр по пользователю",
     ),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current: User = Depends(require_role("admin")),
 ):
     """
@@ -5,8 +5,10 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, require_role
+from app.api.deps import get_db, get_read_db, require_role
 from app.models.user import User
+from app.services.init_data_cache import init_data_cache
+from app.services.session_tokens import session_denylist
 from app.schemas.user import AdminUserOut, UserRole
 
 router = APIRouter(prefix="/admin")
@@ -29,7 +31,7 @@ def list_users_admin(
         default=None,
         description="Фильтр по флагу блокировки",
     ),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current: User = Depends(require_role("admin")),
 ):
     """
@@ -77,6 +79,8 @@ def block_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    init_data_cache.invalidate_user(user.id)
+    session_denylist.revoke_user(user.id)
 
     return _to_admin_user_out(user)
 
@@ -101,6 +105,8 @@ def unblock_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    init_data_cache.invalidate_user(user.id)
+    session_denylist.restore_user(user.id)
 
     return _to_admin_user_out(user)
 
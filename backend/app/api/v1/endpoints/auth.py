@@ -1,11 +1,15 @@
 # app/api/v1/endpoints/auth.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
+from app.api.deps import get_async_db, get_db, user_from_init_data
+from app.db.async_session import AsyncDb
 from app.models.user import User
-from app.schemas.user import RegisterPayload, UserOut
+from app.schemas.user import RegisterPayload, SessionTokenOut, UserOut
+from app.services.session_tokens import issue_session_token
 from app.utils import list_to_str  # сделаем утилку ниже
 
 router = APIRouter(prefix="/auth")
@@ -27,6 +31,8 @@ def register_user(payload: RegisterPayload, db: Session = Depends(get_db)):
         last_name=payload.last_name,
         phone=payload.phone,
         city=payload.city,
+        lat=payload.lat,
+        lon=payload.lon,
         experience_years=payload.experience_years,
         specializations_raw=list_to_str(payload.specializations),
         portfolio_photos_raw=list_to_str(payload.portfolio_photos),
@@ -41,6 +47,25 @@ def register_user(payload: RegisterPayload, db: Session = Depends(get_db)):
     return _user_to_out(user)
 
 
+@router.post("/session", response_model=SessionTokenOut)
+async def create_session(
+    adb: AsyncDb = Depends(get_async_db),
+    x_tg_init_data: Optional[str] = Header(default=None, alias="X-Tg-Init-Data"),
+):
+    """
+    Обмен Telegram initData на короткий токен сессии.
+    Дальше клиент ходит с Authorization: Bearer <token> — без проверки
+    initData и без похода в БД за пользователем. Истёк — обменять снова.
+    """
+    def _handle(db: Session) -> Tuple[int, str]:
+        user = user_from_init_data(db, x_tg_init_data or "")
+        return user.id, user.role
+
+    user_id, role = await adb.run(_handle)
+    token, expires_at = issue_session_token(user_id, role)
+    return SessionTokenOut(access_token=token, expires_at=expires_at, role=role)
+
+
 def _user_to_out(user: User) -> UserOut:
     from app.utils import str_to_list
 
@@ -51,6 +76,8 @@ def _user_to_out(user: User) -> UserOut:
         last_name=user.last_name,
         phone=user.phone,
         city=user.city,
+        lat=user.lat,
+        lon=user.lon,
         about=user.about,
         specializations=str_to_list(user.specializations_raw),
         company_name=user.company_name,
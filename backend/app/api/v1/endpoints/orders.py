@@ -1,47 +1,114 @@
-from bot.notifications import notify_executor_chosen
-from datetime import datetime, timedelta
-from typing import List, Optional
-import os
-import time
+from bot.notifications import executor_chosen_message
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from sqlalchemy.orm import Session
-
-from app.api.deps import get_db, require_role, get_current_user
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response as HttpResponse,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query as OrmQuery, Session, selectinload
+from starlette.concurrency import run_in_threadpool
+
+from app.api.deps import (
+    get_async_db,
+    get_async_read_db,
+    get_current_user,
+    get_db,
+    get_stream_user,
+    load_user_row,
+    require_role,
+    require_role_async,
+)
+from app.api.etag import etag_matches, make_etag, not_modified, set_etag
+from app.db.async_session import AsyncDb
 from app.models.order import Order
+from app.models.order_category import OrderCategory
+from app.models.order_photo import OrderPhoto
 from app.models.user import User
 from app.models.response import Response
 from app.models.chat import Chat
-from app.schemas.order import OrderCreate, OrderOut, AvailableOrderDto, OrderUpdate
+from app.schemas.order import (
+    OrderCreate,
+    OrderOut,
+    AvailableOrderDto,
+    AvailableOrdersPage,
+    FeedSort,
+    OrderFeedChanges,
+    OrderUpdate,
+)
 from app.schemas.response import ChooseExecutorPayload
 from app.schemas.chat import ChatLinkOut, ChatContactsOut, ParticipantContact
-from app.utils import list_to_str, str_to_list
+from app.services import order_search
+from app.services.feed_cache import FeedCard, feed_cache
+from app.services.feed_ranking import RELEVANCE_TOP_K, relevance_score
+from app.services.notification_outbox import enqueue_notification
+from app.services.order_cards import order_to_available
+from app.services.order_events import (
+    ORDER_EVENTS_HEARTBEAT_SECONDS,
+    order_events,
+    publish_order_change,
+)
+from app.services.order_fanout import enqueue_new_order_fanout
+from app.services.uploads import (
+    MULTIPART_OVERHEAD,
+    FileTooLarge,
+    MalformedUpload,
+    StagedUpload,
+    UnsupportedFileType,
+    UploadTooLarge,
+    discard_upload,
+    publish_upload,
+    stage_multipart_files,
+)
+from app.services.geo import MAX_RADIUS_KM, cells_within, distance_km_expr
+from app.services import order_photos
+from app.services.image_variants import VARIANTS, ImageError, make_variants_async, variant_filename
+from app.services.order_photos import MAX_ORDER_PHOTOS
+from app.utils import (
+    list_to_str,
+    str_to_list,
+    encode_cursor,
+    decode_cursor,
+    encode_rank_cursor,
+    decode_rank_cursor,
+)
 
 router = APIRouter(
     prefix="/orders",
     tags=["orders"],
 )
 
+logger = logging.getLogger(__name__)
+
 # сколько дней считаем "свежим" заказом
 FRESH_DAYS = 3
 
+# размер страницы ленты
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+
+# дельта ленты отдаёт только правки старше стольких секунд: updated_at
+# проставляется до коммита, и более свежая строка ещё может "доехать"
+# с меньшим updated_at, чем уже отданная
+CHANGES_SETTLE_SECONDS = 2
+
 # ===== загрузка фото заказа =====
-MAX_FILES = 3
+MAX_FILES = MAX_ORDER_PHOTOS
 MAX_BYTES = 8 * 1024 * 1024
 ALLOWED = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
-
-ORDER_PHOTO_DIR = Path(
-    os.getenv("ORDER_PHOTO_DIR", "/opt/workscout/current/backend/media/orders")
-)
-PUBLIC_MEDIA_BASE = os.getenv("PUBLIC_MEDIA_BASE", "https://workscout.ru/media")
-
-
-def _save_order_photo(order_id: int, content: bytes, ext: str) -> str:
-    ORDER_PHOTO_DIR.mkdir(parents=True, exist_ok=True)
-    filename = f"o{order_id}_{int(time.time() * 1000)}.{ext}"
-    (ORDER_PHOTO_DIR / filename).write_bytes(content)
-    return f"{PUBLIC_MEDIA_BASE}/orders/{filename}"
+# столько раз переигрываем сохранение, если позицию заняла параллельная загрузка
+PHOTO_SAVE_ATTEMPTS = 3
 
 
 @router.post("/", response_model=OrderOut)
@@ -56,6 +123,8 @@ def create_order(
         description=payload.description,
         city=payload.city,
         address=payload.address,
+        lat=payload.lat,
+        lon=payload.lon,
         categories_raw=list_to_str(payload.categories),
         budget_type=payload.budget_type,
         budget_amount=payload.budget_amount,
@@ -63,91 +132,66 @@ def create_order(
         end_date=payload.end_date,
         status="active",
         has_photos=False,
-        # photos_raw оставляем пустым
     )
     db.add(order)
+    db.flush()
+    # рассылка подходящим исполнителям — в той же транзакции, шлёт воркер outbox
+    enqueue_new_order_fanout(db, order)
     db.commit()
     db.refresh(order)
+    feed_cache.invalidate(order.city)
+    publish_order_change(order, created=True)
     return _order_to_out(order)
 
 
 @router.post("/{order_id}/photos")
 async def upload_order_photos(
     order_id: int,
-    files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
-    current: User = Depends(require_role("customer")),
+    request: Request,
+    adb: AsyncDb = Depends(get_async_db),
+    current: User = Depends(require_role_async("customer")),
 ):
-    order = (
-        db.query(Order)
-        .filter(Order.id == order_id, Order.customer_id == current.id)
-        .first()
-    )
-    if not order:
-        raise HTTPException(status_code=404, detail="Заказ не найден")
+    # форму разбираем сами, а не через File(...): FastAPI принял бы всё тело
+    # целиком ещё до вызова эндпоинта, а здесь файлы пишутся на диск прямо
+    # из потока и лимиты проверяются по ходу чтения
+    return await _upload_order_photos(order_id, request, adb, current)
 
-    existing = str_to_list(getattr(order, "photos_raw", None))
-    if len(existing) >= MAX_FILES:
-        raise HTTPException(status_code=400, detail="Фото уже загружены (максимум 3)")
-
-    if not files:
-        return {"photos": existing, "has_photos": order.has_photos}
-
-    # сколько ещё можно добавить
-    remaining = MAX_FILES - len(existing)
-    files = files[:remaining]
-
-    new_urls: List[str] = []
-    for f in files:
-        if f.content_type not in ALLOWED:
-            raise HTTPException(
-                status_code=400, detail="Разрешены только jpg/png/webp"
-            )
 
-        content = await f.read()
-        if len(content) > MAX_BYTES:
-            raise HTTPException(
-                status_code=400, detail="Файл слишком большой (макс 8MB)"
-            )
-
-        ext = ALLOWED[f.content_type]
-        new_urls.append(_save_order_photo(order.id, content, ext))
-
-    merged = (existing + new_urls)[:MAX_FILES]
-    order.photos_raw = list_to_str(merged)
-    order.has_photos = len(merged) > 0
-
-    db.add(order)
-    db.commit()
-    db.refresh(order)
-
-    return {"photos": merged, "has_photos": order.has_photos}
-
-
-@router.get("/all-active", response_model=List[AvailableOrderDto])
-def get_all_active_orders(
-    db: Session = Depends(get_db),
-    current: User = Depends(require_role("executor")),
+@router.get("/all-active", response_model=AvailableOrdersPage)
+async def get_all_active_orders(
+    cursor: Optional[str] = Query(
+        default=None, description="next_cursor из предыдущей страницы"
+    ),
+    limit: int = Query(default=FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    adb: AsyncDb = Depends(get_async_read_db),
+    current: User = Depends(require_role_async("executor")),
 ):
     """
     Максимально тупая и надежная выдача:
     - все заказы со статусом active
     - без фильтров по городу/категориям/специализациям
     - не показываем исполнителю заказы, которые он сам создал как customer (если вдруг роли пересекутся)
+    - постранично, по курсору (created_at, id)
     """
-    orders = (
-        db.query(Order)
-        .filter(Order.status == "active")
-        .filter(Order.customer_id != current.id)
-        .order_by(Order.created_at.desc())
-        .all()
-    )
+    def _handle(db: Session):
+        after = _decode_cursor_or_400(cursor)
+
+        # без города, свежести и категорий: только активные и не свои
+        q = _base_feed_query(db, current, None, None, set())
 
-    return [_order_to_available(o) for o in orders]
+        orders, next_cursor = _fetch_feed_page(q, after, limit)
+
+        return AvailableOrdersPage(
+            items=[order_to_available(o) for o in orders],
+            next_cursor=next_cursor,
+        )
 
+    return await adb.run(_handle)
 
-@router.get("/available", response_model=List[AvailableOrderDto])
-def get_available_orders(
+
+@router.get("/available", response_model=AvailableOrdersPage)
+async def get_available_orders(
+    response: HttpResponse,
     city: Optional[str] = Query(default=None),
     categories: Optional[str] = Query(
         default=None, description="Строка категорий через запятую"
@@ -157,94 +201,302 @@ def get_available_orders(
         default=False,
         description="Если true — не применять автофильтры по городу и специализациям исполнителя",
     ),
-    db: Session = Depends(get_db),
-    current: User = Depends(require_role("executor")),
+    sort: FeedSort = Query(
+        default="new",
+        description="new — сначала новые, relevance — по релевантности (top-K)",
+    ),
+    radius_km: Optional[float] = Query(
+        default=None,
+        gt=0,
+        le=MAX_RADIUS_KM,
+        description="Заказы в радиусе от точки (lat/lon или координаты профиля) вместо фильтра по городу",
+    ),
+    lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    lon: Optional[float] = Query(default=None, ge=-180, le=180),
+    cursor: Optional[str] = Query(
+        default=None, description="next_cursor из предыдущей страницы"
+    ),
+    limit: int = Query(default=FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+    adb: AsyncDb = Depends(get_async_read_db),
+    current: User = Depends(require_role_async("executor")),
 ):
     """
     Лента доступных заказов для исполнителя.
     Текущий пользователь определяется строго через Telegram initData (X-Tg-Init-Data).
+    Отдаётся постранично: следующая страница — по next_cursor.
+    Поддерживает If-None-Match: если лента не менялась — 304 без тела.
     """
 
-    # --- Базовый запрос: активные заказы ---
-    q = db.query(Order).filter(Order.status == "active")
+    def _handle(db: Session):
+        feed_city, near, wanted = _feed_filters(
+            load_user_row(db, current), city, categories, show_all, radius_km, lat, lon
+        )
 
-    # Не показываем исполнителю его собственные заказы как заказчика
-    q = q.filter(Order.customer_id != current.id)
+        # --- Свежие заказы ---
+        threshold: Optional[datetime] = None
+        if fresh_only:
+            threshold = datetime.utcnow() - timedelta(days=FRESH_DAYS)
+
+        # Ранжированная выдача — скоры и top-K целиком в SQL
+        if sort == "relevance":
+            q = _base_feed_query(db, current, feed_city, threshold, wanted, near)
+            return _ranked_page(db, q, wanted, cursor, limit, near)
+
+        after = _decode_cursor_or_400(cursor)
+
+        # Лента города — из кэша карточек, фильтры исполнителя поверх него
+        if feed_city is not None:
+            cards, _ = feed_cache.get(feed_city, lambda: _load_city_cards(db, feed_city))
+            page, next_cursor = _page_from_cards(
+                cards,
+                exclude_customer_id=current.id,
+                wanted=wanted,
+                threshold=threshold,
+                after=after,
+                limit=limit,
+            )
+            # маркер — из базы, а не версия снимка: версия своя в каждом процессе
+            # и меняется при каждой перезагрузке кэша. Состав страницы
+            # учитывает фильтры исполнителя
+            total, last_updated = (
+                db.query(func.count(Order.id), func.max(Order.updated_at))
+                .filter(Order.status == "active", Order.city == feed_city)
+                .one()
+            )
+            etag = make_etag(
+                "available",
+                feed_city,
+                total,
+                last_updated,
+                ",".join(str(c.id) for c in page),
+                next_cursor,
+            )
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            set_etag(response, etag)
+            return AvailableOrdersPage(
+                items=[card.dto for card in page],
+                next_cursor=next_cursor,
+            )
 
-    # --- Город ---
-    if city is not None:
-        q = q.filter(Order.city == city)
-    elif not show_all and current.city:
-        q = q.filter(Order.city == current.city)
+        q = _base_feed_query(db, current, None, threshold, wanted, near)
+
+        # маркер версии — агрегат по тому же запросу, без выборки строк
+        total, last_updated = q.with_entities(
+            func.count(Order.id), func.max(Order.updated_at)
+        ).one()
+        etag = make_etag(
+            "available",
+            total,
+            last_updated,
+            current.id,
+            ",".join(sorted(wanted)),
+            # окно "свежих" сдвигается со временем — учитываем с точностью до часа
+            threshold.strftime("%Y%m%d%H") if threshold else None,
+            near,
+            cursor,
+            limit,
+        )
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
 
-    # --- Свежие заказы ---
-    if fresh_only:
-        threshold = datetime.utcnow() - timedelta(days=FRESH_DAYS)
-        q = q.filter(Order.created_at >= threshold)
+        orders, next_cursor = _fetch_feed_page(q, after, limit)
 
-    orders = q.order_by(Order.created_at.desc()).all()
+        return AvailableOrdersPage(
+            items=[order_to_available(o, near) for o in orders],
+            next_cursor=next_cursor,
+        )
 
-    # --- Категории из query-параметра ---
-    query_categories: set[str] = set()
-    if categories:
-        query_categories = {c.strip() for c in categories.split(",") if c.strip()}
+    return await adb.run(_handle)
 
-    # --- Специализации исполнителя ---
-    executor_specs: set[str] = set()
-    if current.specializations_raw:
-        executor_specs = set(str_to_list(current.specializations_raw))
 
-    filtered: List[Order] = []
-    for o in orders:
-        order_cats = set(str_to_list(o.categories_raw))
+@router.get("/available/changes", response_model=OrderFeedChanges)
+async def get_available_orders_changes(
+    since: Optional[str] = Query(
+        default=None,
+        description="next_since из прошлого ответа; без него — только текущая отметка",
+    ),
+    city: Optional[str] = Query(default=None),
+    categories: Optional[str] = Query(
+        default=None, description="Строка категорий через запятую"
+    ),
+    show_all: bool = Query(default=False),
+    radius_km: Optional[float] = Query(default=None, gt=0, le=MAX_RADIUS_KM),
+    lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    lon: Optional[float] = Query(default=None, ge=-180, le=180),
+    limit: int = Query(default=FEED_MAX_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    adb: AsyncDb = Depends(get_async_read_db),
+    current: User = Depends(require_role_async("executor")),
+):
+    """
+    Что изменилось в ленте с отметки since: новые и отредактированные
+    заказы целиком, взятые/отменённые/выпавшие из фильтров — id в removed.
+    Фильтры те же, что у /available. Сценарий клиента: взять отметку
+    (запрос без since), загрузить /available, дальше опрашивать с next_since.
+    """
+    def _handle(db: Session):
+        feed_city, near, wanted = _feed_filters(
+            load_user_row(db, current), city, categories, show_all, radius_km, lat, lon
+        )
 
-        if query_categories:
-            if order_cats & query_categories:
-                filtered.append(o)
-            continue
+        settled = datetime.utcnow() - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+        head = (settled, 0)
+
+        if since is None:
+            return OrderFeedChanges(items=[], removed=[], next_since=encode_cursor(*head))
+
+        try:
+            since_key = decode_cursor(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Некорректная отметка since")
+
+        changed = _changes_query(db, since_key, settled, limit).all()
+        has_more = len(changed) > limit
+        changed = changed[:limit]
+
+        # какие из изменённых заказов сейчас видны в ленте — тем же запросом, что и лента
+        visible_ids = set()
+        if changed:
+            visible_ids = {
+                order_id
+                for (order_id,) in _base_feed_query(db, current, feed_city, None, wanted, near)
+                .filter(Order.id.in_([o.id for o in changed]))
+                .with_entities(Order.id)
+            }
+
+        if has_more:
+            last = changed[-1]
+            next_key = (last.updated_at, last.id)
+        else:
+            # всё до settled уже отдано — отметку можно подтянуть к нему
+            next_key = max(_comparable_key(since_key, settled), head)
+
+        return OrderFeedChanges(
+            items=[order_to_available(o, near) for o in changed if o.id in visible_ids],
+            removed=[o.id for o in changed if o.id not in visible_ids],
+            next_since=encode_cursor(*next_key),
+            has_more=has_more,
+        )
 
-        if not show_all and executor_specs:
-            if order_cats & executor_specs:
-                filtered.append(o)
-            continue
+    return await adb.run(_handle)
 
-        filtered.append(o)
 
-    return [_order_to_available(o) for o in filtered]
+@router.get("/stream")
+def stream_orders(
+    city: Optional[str] = Query(default=None),
+    categories: Optional[str] = Query(
+        default=None, description="Строка категорий через запятую"
+    ),
+    current: User = Depends(get_stream_user),
+):
+    """
+    Живая лента для исполнителя (Server-Sent Events) вместо опроса /available.
+    События: created / updated (с карточкой заказа), closed (только id),
+    resync — клиент отстал, нужно перечитать /available.
+    Город и категории — как в ленте: из параметров, иначе из профиля.
+    Авторизация — заголовками, как везде, или токеном сессии в ?token=
+    (EventSource без заголовков).
+    """
+    if current.role != "executor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав. Нужна роль: ('executor',)",
+        )
+
+    stream_city = city or current.city
+    if not stream_city:
+        raise HTTPException(status_code=400, detail="Не указан город для ленты")
+
+    wanted: set[str] = set()
+    if categories:
+        wanted = {c.strip() for c in categories.split(",") if c.strip()}
+    if not wanted and current.specializations_raw:
+        wanted = set(str_to_list(current.specializations_raw))
+
+    # сессия БД закрывается до начала стрима: генератор держит только очередь
+    return StreamingResponse(
+        _order_event_stream(current.id, stream_city, wanted),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/search", response_model=List[AvailableOrderDto])
+async def search_orders(
+    q: str = Query(..., min_length=2, description="Поисковая строка"),
+    limit: int = Query(default=FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    adb: AsyncDb = Depends(get_async_read_db),
+    current: User = Depends(require_role_async("executor")),
+):
+    """
+    Полнотекстовый поиск по названию и описанию активных заказов.
+    Те же исключения, что и в ленте: только active и не свои заказы.
+    Сортировка по релевантности (bm25 / ts_rank_cd).
+    """
+    def _handle(db: Session):
+        tokens = order_search.query_tokens(q)
+        if not tokens:
+            return []
+
+        orders = (
+            _with_photos(order_search.search_orders(db, tokens))
+            .filter(Order.status == "active")
+            .filter(Order.customer_id != current.id)
+            .limit(limit)
+            .all()
+        )
+        return [order_to_available(o) for o in orders]
+
+    return await adb.run(_handle)
 
 
 @router.get("/my", response_model=List[OrderOut])
-def get_my_orders(
-    db: Session = Depends(get_db),
-    current: User = Depends(require_role("customer")),
+async def get_my_orders(
+    response: HttpResponse,
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+    adb: AsyncDb = Depends(get_async_read_db),
+    current: User = Depends(require_role_async("customer")),
 ):
-    orders = (
-        db.query(Order)
-        .filter(Order.customer_id == current.id)
-        .order_by(Order.created_at.desc())
-        .all()
-    )
-    return [_order_to_out(o) for o in orders]
+    def _handle(db: Session):
+        q = db.query(Order).filter(Order.customer_id == current.id)
+
+        total, last_updated = q.with_entities(
+            func.count(Order.id), func.max(Order.updated_at)
+        ).one()
+        etag = make_etag("orders-my", current.id, total, last_updated)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
+        orders = _with_photos(q).order_by(Order.created_at.desc()).all()
+        return [_order_to_out(o) for o in orders]
+
+    return await adb.run(_handle)
 
 
 @router.get("/{order_id}", response_model=OrderOut)
-def get_order_by_id(
+async def get_order_by_id(
     order_id: int,
-    db: Session = Depends(get_db),
-    current: User = Depends(require_role("customer")),
+    adb: AsyncDb = Depends(get_async_read_db),
+    current: User = Depends(require_role_async("customer")),
 ):
     """
     Получить один свой заказ (для экрана 'Подробнее' / редактирования).
     """
-    order = (
-        db.query(Order)
-        .filter(Order.id == order_id, Order.customer_id == current.id)
-        .first()
-    )
-    if not order:
-        raise HTTPException(status_code=404, detail="Заказ не найден")
+    def _handle(db: Session):
+        order = (
+            db.query(Order)
+            .filter(Order.id == order_id, Order.customer_id == current.id)
+            .first()
+        )
+        if not order:
+            raise HTTPException(status_code=404, detail="Заказ не найден")
 
-    return _order_to_out(order)
+        return _order_to_out(order)
+
+    return await adb.run(_handle)
 
 
 @router.patch("/{order_id}", response_model=OrderOut)
@@ -275,6 +527,8 @@ def update_order(
         )
 
     data = payload.dict(exclude_unset=True)
+    old_city = order.city
+    old_categories = str_to_list(order.categories_raw)
 
     if "title" in data:
         order.title = data["title"]
@@ -284,6 +538,10 @@ def update_order(
         order.city = data["city"]
     if "address" in data:
         order.address = data["address"]
+    if "lat" in data:
+        order.lat = data["lat"]
+    if "lon" in data:
+        order.lon = data["lon"]
 
     if "categories" in data:
         order.categories_raw = list_to_str(data["categories"])
@@ -305,6 +563,8 @@ def update_order(
     db.add(order)
     db.commit()
     db.refresh(order)
+    feed_cache.invalidate(old_city, order.city)
+    publish_order_change(order, old_city=old_city, old_categories=old_categories)
 
     return _order_to_out(order)
 
@@ -326,6 +586,8 @@ def delete_order(
     order.status = "cancelled"
     db.add(order)
     db.commit()
+    feed_cache.invalidate(order.city)
+    publish_order_change(order)
     return None
 
 
@@ -404,14 +666,13 @@ def choose_executor(
 
     db.add(order)
     db.add(response)
+    db.flush()
+    # уведомление исполнителю — в той же транзакции, шлёт воркер outbox
+    enqueue_notification(db, "executor_chosen", executor_chosen_message(order))
     db.commit()
     db.refresh(order)
-
-    # уведомляем исполнителя, что его выбрали
-    try:
-        notify_executor_chosen(order)
-    except Exception:
-        pass
+    feed_cache.invalidate(order.city)
+    publish_order_change(order)
 
     return _order_to_out(order)
 
@@ -551,6 +812,8 @@ def complete_order(
     db.add(order)
     db.commit()
     db.refresh(order)
+    feed_cache.invalidate(order.city)
+    publish_order_change(order)
 
     return _order_to_out(order)
 
@@ -559,6 +822,273 @@ def complete_order(
 # ХЕЛПЕРЫ
 # =========================
 
+def _feed_filters(
+    current: User,
+    city: Optional[str],
+    categories: Optional[str],
+    show_all: bool,
+    radius_km: Optional[float],
+    lat: Optional[float],
+    lon: Optional[float],
+) -> Tuple[Optional[str], Optional[Tuple[float, float, float]], set]:
+    """Город (или радиус) и категории ленты: из параметров, иначе из профиля."""
+    # --- Город или радиус ---
+    feed_city: Optional[str] = city
+    if feed_city is None and not show_all and current.city:
+        feed_city = current.city
+
+    near: Optional[Tuple[float, float, float]] = None
+    if radius_km is not None:
+        origin_lat = lat if lat is not None else current.lat
+        origin_lon = lon if lon is not None else current.lon
+        if origin_lat is None or origin_lon is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Для поиска по радиусу нужны координаты (lat/lon или в профиле)",
+            )
+        near = (origin_lat, origin_lon, radius_km)
+        # радиус заменяет точное совпадение города
+        feed_city = None
+
+    # --- Категории: из query-параметра, иначе специализации исполнителя ---
+    wanted: set[str] = set()
+    if categories:
+        wanted = {c.strip() for c in categories.split(",") if c.strip()}
+    if not wanted and not show_all and current.specializations_raw:
+        wanted = set(str_to_list(current.specializations_raw))
+
+    return feed_city, near, wanted
+
+
+def _after_cursor(q: OrmQuery, created_at: datetime, order_id: int) -> OrmQuery:
+    # SQLite хранит server_default now() без микросекунд ('... 12:00:06'),
+    # а datetime-параметр биндится с ними ('... 12:00:06.000000'), поэтому
+    # строгое "created_at < ts" захватило бы уже отданные строки той же секунды.
+    # Граница "<= ts - 1мкс" одинаково работает на обоих форматах и на Postgres.
+    return q.filter(
+        or_(
+            Order.created_at <= created_at - timedelta(microseconds=1),
+            and_(Order.created_at <= created_at, Order.id < order_id),
+        )
+    )
+
+
+def _changed_since(q: OrmQuery, updated_at: datetime, order_id: int) -> OrmQuery:
+    # то же, что в _after_cursor, только в обратную сторону: строки,
+    # перенесённые миграцией из created_at, хранятся без микросекунд
+    return q.filter(
+        or_(
+            Order.updated_at >= updated_at + timedelta(microseconds=1),
+            and_(Order.updated_at > updated_at - timedelta(microseconds=1), Order.id > order_id),
+        )
+    )
+
+
+def _changes_query(
+    db: Session, since_key: Tuple[datetime, int], settled: datetime, limit: int
+) -> OrmQuery:
+    """Изменённые заказы по (updated_at, id) — на одну строку больше страницы."""
+    return (
+        _changed_since(_with_photos(db.query(Order)), *since_key)
+        .filter(Order.updated_at <= settled)
+        .order_by(Order.updated_at, Order.id)
+        .limit(limit + 1)
+    )
+
+
+def _base_feed_query(
+    db: Session,
+    current: User,
+    city: Optional[str],
+    threshold: Optional[datetime],
+    wanted: set,
+    near: Optional[Tuple[float, float, float]] = None,
+) -> OrmQuery:
+    # --- Базовый запрос: активные заказы ---
+    q = db.query(Order).filter(Order.status == "active")
+
+    # Не показываем исполнителю его собственные заказы как заказчика
+    q = q.filter(Order.customer_id != current.id)
+
+    if city is not None:
+        q = q.filter(Order.city == city)
+
+    if threshold is not None:
+        q = q.filter(Order.created_at >= threshold)
+
+    if wanted:
+        # EXISTS по индексу order_categories(category, order_id)
+        q = q.filter(Order.category_links.any(OrderCategory.category.in_(wanted)))
+
+    if near is not None:
+        # кандидаты — по индексу ячеек сетки, точное расстояние — только для них
+        origin_lat, origin_lon, radius_km = near
+        distance = distance_km_expr(
+            db.get_bind().dialect.name, Order.lat, Order.lon, origin_lat, origin_lon
+        )
+        q = q.filter(Order.geo_cell.in_(cells_within(origin_lat, origin_lon, radius_km)))
+        q = q.filter(distance <= radius_km)
+
+    return q
+
+
+def _ranked_page(
+    db: Session,
+    q: OrmQuery,
+    wanted: set,
+    cursor: Optional[str],
+    limit: int,
+    near: Optional[Tuple[float, float, float]] = None,
+) -> AvailableOrdersPage:
+    """
+    Top-K по релевантности, keyset по (score desc, id desc).
+    Скоры считаются на момент as_of из первой страницы; заказы,
+    появившиеся позже, в эту выдачу уже не попадают.
+    """
+    if cursor:
+        try:
+            as_of, last_score, last_id, served = decode_rank_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Некорректный курсор")
+    else:
+        as_of, last_score, last_id, served = datetime.utcnow(), None, None, 0
+
+    page_size = min(limit, RELEVANCE_TOP_K - served)
+    if page_size <= 0:
+        return AvailableOrdersPage(items=[], next_cursor=None)
+
+    score = relevance_score(db.get_bind().dialect.name, wanted, as_of)
+    q = q.filter(Order.created_at <= as_of)
+    if last_score is not None:
+        q = q.filter(or_(score < last_score, and_(score == last_score, Order.id < last_id)))
+
+    rows = (
+        _with_photos(q)
+        .add_columns(score.label("score"))
+        .order_by(score.desc(), Order.id.desc())
+        .limit(page_size + 1)
+        .all()
+    )
+
+    next_cursor: Optional[str] = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        if served + page_size < RELEVANCE_TOP_K:
+            last_order, last_row_score = rows[-1]
+            next_cursor = encode_rank_cursor(
+                as_of, last_row_score, last_order.id, served + page_size
+            )
+
+    return AvailableOrdersPage(
+        items=[order_to_available(o, near) for o, _ in rows],
+        next_cursor=next_cursor,
+    )
+
+
+def _decode_cursor_or_400(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+def _feed_page_query(
+    q: OrmQuery, after: Optional[Tuple[datetime, int]], limit: int
+) -> OrmQuery:
+    """Страница ленты после курсора — на одну строку больше, чтобы понять, есть ли дальше."""
+    if after is not None:
+        q = _after_cursor(q, *after)
+    return _with_photos(q).order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)
+
+
+def _fetch_feed_page(
+    q: OrmQuery,
+    after: Optional[Tuple[datetime, int]],
+    limit: int,
+) -> Tuple[List[Order], Optional[str]]:
+    """
+    Keyset-пагинация ленты по (created_at desc, id desc).
+    Новые заказы встают в начало ленты и не сдвигают уже выданные страницы.
+    """
+    rows = _feed_page_query(q, after, limit).all()
+
+    next_cursor: Optional[str] = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return rows, next_cursor
+
+
+def _city_cards_query(db: Session, city: str) -> OrmQuery:
+    return (
+        _with_photos(db.query(Order))
+        .filter(Order.status == "active", Order.city == city)
+        .order_by(Order.created_at.desc(), Order.id.desc())
+    )
+
+
+def _load_city_cards(db: Session, city: str) -> List[FeedCard]:
+    orders = _city_cards_query(db, city).all()
+    return [
+        FeedCard(
+            id=o.id,
+            created_at=o.created_at,
+            customer_id=o.customer_id,
+            categories=frozenset(str_to_list(o.categories_raw)),
+            dto=order_to_available(o),
+        )
+        for o in orders
+    ]
+
+
+def _page_from_cards(
+    cards: List[FeedCard],
+    exclude_customer_id: int,
+    wanted: set,
+    threshold: Optional[datetime],
+    after: Optional[Tuple[datetime, int]],
+    limit: int,
+) -> Tuple[List[FeedCard], Optional[str]]:
+    """
+    Те же фильтры и та же keyset-пагинация, что и в SQL-ветке,
+    но поверх закэшированных карточек (они уже отсортированы по (created_at, id) desc).
+    """
+    page: List[FeedCard] = []
+    for card in cards:
+        if after is not None and (card.created_at, card.id) >= _comparable_key(after, card.created_at):
+            continue
+        if threshold is not None and card.created_at < _comparable_dt(threshold, card.created_at):
+            break
+        if card.customer_id == exclude_customer_id:
+            continue
+        if wanted and not (card.categories & wanted):
+            continue
+        page.append(card)
+        if len(page) > limit:
+            break
+
+    next_cursor: Optional[str] = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1].created_at, page[-1].id)
+
+    return page, next_cursor
+
+
+def _comparable_dt(value: datetime, like: datetime) -> datetime:
+    # SQLite отдаёт naive-datetime, Postgres — aware; сравниваем в одном виде
+    if like.tzinfo is None:
+        return value.replace(tzinfo=None) if value.tzinfo else value
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _comparable_key(after: Tuple[datetime, int], like: datetime) -> Tuple[datetime, int]:
+    return _comparable_dt(after[0], like), after[1]
+
+
 def _build_chat_contacts(chat: Chat, db: Session) -> ChatContactsOut:
     customer = db.query(User).filter(User.id == chat.customer_id).first()
     executor = db.query(User).filter(User.id == chat.executor_id).first()
@@ -599,12 +1129,15 @@ def _build_chat_contacts(chat: Chat, db: Session) -> ChatContactsOut:
 
 
 def _order_to_out(order: Order) -> OrderOut:
+    photos = order.photo_items
     return OrderOut(
         id=order.id,
         title=order.title,
         description=order.description,
         city=order.city,
         address=order.address,
+        lat=order.lat,
+        lon=order.lon,
         categories=str_to_list(order.categories_raw),
         budget_type=order.budget_type,  # type: ignore[arg-type]
         budget_amount=order.budget_amount,
@@ -612,25 +1145,202 @@ def _order_to_out(order: Order) -> OrderOut:
         end_date=order.end_date,
         status=order.status,
         has_photos=order.has_photos,
-        photos=str_to_list(getattr(order, "photos_raw", None)),
+        photos=[p.url for p in photos],
+        photo_thumbs=[p.thumb_url or p.url for p in photos],
+        photo_medium=[p.medium_url or p.url for p in photos],
         created_at=order.created_at,
         executor_id=order.executor_id,
     )
 
 
-def _order_to_available(order: Order) -> AvailableOrderDto:
-    return AvailableOrderDto(
-        id=order.id,
-        title=order.title,
-        city=order.city,
-        address=order.address or "",
-        categories=str_to_list(order.categories_raw),
-        description=order.description,
-        budget_type=order.budget_type,  # type: ignore[arg-type]
-        budget_amount=order.budget_amount,
-        date_from=order.start_date,
-        date_to=order.end_date,
-        has_photos=order.has_photos,
-        photos=str_to_list(getattr(order, "photos_raw", None)),
-        created_at=order.created_at,
-    )
+def _with_photos(q: OrmQuery) -> OrmQuery:
+    """Фото всех заказов страницы — одним запросом WHERE order_id IN (...)."""
+    return q.options(selectinload(Order.photo_items))
+
+
+async def _upload_order_photos(
+    order_id: int, request: Request, adb: AsyncDb, current: User
+) -> dict:
+    def _existing(db: Session) -> List[Tuple[str, Optional[str]]]:
+        order = (
+            db.query(Order.id)
+            .filter(Order.id == order_id, Order.customer_id == current.id)
+            .first()
+        )
+        if not order:
+            raise HTTPException(status_code=404, detail="Заказ не найден")
+        return (
+            db.query(OrderPhoto.url, OrderPhoto.sha256)
+            .filter(OrderPhoto.order_id == order_id)
+            .order_by(OrderPhoto.position)
+            .all()
+        )
+
+    existing = await adb.run(_existing)
+    if len(existing) >= MAX_FILES:
+        raise HTTPException(status_code=400, detail="Фото уже загружены (максимум 3)")
+
+    known_hashes = {sha for _, sha in existing if sha}
+    photo_dir = order_photos.ORDER_PHOTO_DIR
+
+    def _save(db: Session):
+        for attempt in range(PHOTO_SAVE_ATTEMPTS):
+            order = db.query(Order).filter(Order.id == order_id).first()
+            if not order:
+                raise HTTPException(status_code=404, detail="Заказ не найден")
+            current_photos = list(order.photo_items)
+            taken = {p.position for p in current_photos}
+            hashes = {p.sha256 for p in current_photos if p.sha256}
+            free = [pos for pos in range(MAX_FILES) if pos not in taken]
+            added = False
+            for values in uploaded:
+                if values["sha256"] in hashes or not free:
+                    continue
+                order.photo_items.append(OrderPhoto(position=free.pop(0), **values))
+                added = True
+            order.has_photos = len(order.photo_items) > 0
+            if added:
+                # фото живут в своей таблице — строку orders трогаем явно,
+                # иначе ETag-и и дельта ленты (по updated_at) новое фото не заметят
+                order.updated_at = datetime.utcnow()
+
+            try:
+                db.commit()
+            except IntegrityError:
+                # параллельная загрузка заняла позицию — перечитываем и пробуем снова
+                db.rollback()
+                if attempt == PHOTO_SAVE_ATTEMPTS - 1:
+                    raise HTTPException(
+                        status_code=409, detail="Фото заказа сейчас обновляются, повторите"
+                    )
+                continue
+
+            db.refresh(order)
+            feed_cache.invalidate(order.city)
+            publish_order_change(order)
+            return [p.url for p in order.photo_items]
+
+    # файлы на диске появляются, только если приняты все: сначала каждый
+    # пишется из потока во временный файл, проверяется и режется на превью,
+    # потом публикуется. Любая ошибка до сохранения в базу (битая картинка,
+    # 404/409 из _save, обрыв соединения) убирает всё, что успели записать
+    # под итоговыми именами
+    try:
+        received = await stage_multipart_files(
+            request,
+            photo_dir,
+            field_name="files",
+            allowed_types=ALLOWED,
+            max_file_bytes=MAX_BYTES,
+            max_body_bytes=MAX_FILES * MAX_BYTES + MULTIPART_OVERHEAD,
+            max_files=MAX_FILES,
+            # сверх свободных мест файлы не сохраняем
+            keep=MAX_FILES - len(existing),
+        )
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Слишком большой запрос (макс 3 фото по 8MB)",
+        )
+    except FileTooLarge:
+        raise HTTPException(status_code=400, detail="Файл слишком большой (макс 8MB)")
+    except UnsupportedFileType:
+        raise HTTPException(status_code=400, detail="Разрешены только jpg/png/webp")
+    except MalformedUpload:
+        raise HTTPException(status_code=400, detail="Некорректная форма загрузки")
+
+    if not received:
+        return {"photos": [url for url, _ in existing], "has_photos": bool(existing)}
+
+    staged: List[Tuple[StagedUpload, str]] = []
+    uploaded: List[dict] = []
+    written: List[str] = []
+    try:
+        for item in received:
+            # то же фото повторно к заказу не прикрепляем
+            if item.sha256 in known_hashes:
+                await discard_upload(item)
+                continue
+            known_hashes.add(item.sha256)
+            staged.append((item, f"o{order_id}_{item.sha256[:32]}.{ALLOWED[item.content_type]}"))
+
+        for item, filename in staged:
+            # варианты пишутся сразу под итоговыми именами — учитываем до рендера
+            written.append(filename)
+            try:
+                variants = await make_variants_async(item.path, photo_dir, filename)
+            except ImageError:
+                raise HTTPException(status_code=400, detail="Не удалось прочитать изображение")
+            uploaded.append(
+                {
+                    "url": order_photos.order_photo_url(filename),
+                    "thumb_url": order_photos.order_photo_url(variants["thumb"]),
+                    "medium_url": order_photos.order_photo_url(variants["medium"]),
+                    "size_bytes": item.size,
+                    "sha256": item.sha256,
+                }
+            )
+
+        for item, filename in staged:
+            await publish_upload(item, photo_dir / filename)
+
+        photos = await adb.run(_save)
+    except BaseException:
+        await _remove_unreferenced_photo_files(adb, order_id, written)
+        raise
+    finally:
+        for item in received:
+            await discard_upload(item)
+
+    # не поместились (лимит заняла параллельная загрузка) — файлы не нужны
+    unused = [photo_dir / name for name in written if order_photos.order_photo_url(name) not in photos]
+    if unused:
+        await run_in_threadpool(_remove_order_photo_files, unused)
+
+    return {"photos": photos, "has_photos": len(photos) > 0}
+
+
+def _remove_order_photo_files(paths: List[Path]) -> None:
+    for path in paths:
+        for name in (path.name, *(variant_filename(path.name, v) for v, _ in VARIANTS)):
+            (path.parent / name).unlink(missing_ok=True)
+
+
+async def _remove_unreferenced_photo_files(adb: AsyncDb, order_id: int, filenames: List[str]) -> None:
+    """
+    Удаляет файлы фото заказа (с вариантами), на которые не ссылается ни
+    одна строка order_photos. Файл с тем же sha256 могла сохранить
+    параллельная загрузка того же фото — такой остаётся на месте.
+    """
+    if not filenames:
+        return
+
+    def _referenced(db: Session) -> set:
+        return {
+            url
+            for (url,) in db.query(OrderPhoto.url).filter(OrderPhoto.order_id == order_id)
+        }
+
+    try:
+        referenced = await adb.run(_referenced)
+        photo_dir = order_photos.ORDER_PHOTO_DIR
+        paths = [
+            photo_dir / name
+            for name in filenames
+            if order_photos.order_photo_url(name) not in referenced
+        ]
+        if paths:
+            await run_in_threadpool(_remove_order_photo_files, paths)
+    except Exception:
+        # уборка не должна подменять исходную ошибку запроса
+        logger.exception("order %s: failed to remove photo files %s", order_id, filenames)
+
+
+async def _order_event_stream(user_id: int, city: str, wanted: set):
+    sub = order_events.subscribe(user_id, city, wanted)
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            yield await sub.next_frame(ORDER_EVENTS_HEARTBEAT_SECONDS)
+    finally:
+        order_events.unsubscribe(sub)
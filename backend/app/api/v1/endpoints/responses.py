@@ -1,12 +1,13 @@
 # app/api/v1/endpoints/responses.py
-from bot.notifications import notify_new_response
+from bot.notifications import new_response_message, new_responses_digest_message
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, require_role
+from app.api.deps import get_async_read_db, get_db, require_role, require_role_async
+from app.db.async_session import AsyncDb
 from app.models.order import Order
 from app.models.response import Response
 from app.models.user import User
@@ -18,6 +19,7 @@ from app.schemas.response import (
     CustomerOrderResponseDto,
     ResponseExecutorShort,
 )
+from app.services.notification_outbox import enqueue_notification
 from app.utils import str_to_list
 
 router = APIRouter()
@@ -82,15 +84,16 @@ def send_response(
         status="waiting",
     )
     db.add(resp)
+    # уведомление заказчику — в той же транзакции, шлёт воркер outbox;
+    # всплеск откликов на заказ склеивается в одну сводку
+    enqueue_notification(
+        db,
+        "new_response",
+        new_response_message(order, current),
+        coalesce_key=f"new_response:{order.id}",
+        digest=lambda count: new_responses_digest_message(order, count),
+    )
     db.commit()
-    db.refresh(resp)
-
-    # уведомляем заказчика о новом отклике
-    try:
-        notify_new_response(order, current)
-    except Exception:
-        # лучше не падать из-за нотификаций
-        pass
 
     return None
 
@@ -100,19 +103,22 @@ def send_response(
     "/executor/responses",
     response_model=List[ExecutorResponseDto],
 )
-def get_executor_responses(
-    db: Session = Depends(get_db),
-    current: User = Depends(require_role("executor")),
+async def get_executor_responses(
+    adb: AsyncDb = Depends(get_async_read_db),
+    current: User = Depends(require_role_async("executor")),
 ):
-    responses = (
-        db.query(Response)
-        .join(Order, Response.order_id == Order.id)
-        .filter(Response.executor_id == current.id)
-        .order_by(Response.created_at.desc())
-        .all()
-    )
+    def _handle(db: Session):
+        responses = (
+            db.query(Response)
+            .join(Order, Response.order_id == Order.id)
+            .filter(Response.executor_id == current.id)
+            .order_by(Response.created_at.desc())
+            .all()
+        )
+
+        return [response_to_executor_dto(r) for r in responses]
 
-    return [response_to_executor_dto(r) for r in responses]
+    return await adb.run(_handle)
 
 
 # ========== СПИСОК ОТКЛИКОВ ДЛЯ ЗАКАЗЧИКА ПО КОНКРЕТНОМУ ЗАКАЗУ ==========
@@ -121,10 +127,10 @@ def get_executor_responses(
     "/orders/{order_id}/responses",
     response_model=List[CustomerOrderResponseDto],
 )
-def get_order_responses_for_customer(
+async def get_order_responses_for_customer(
     order_id: int,
-    db: Session = Depends(get_db),
-    current: User = Depends(require_role("customer")),
+    adb: AsyncDb = Depends(get_async_read_db),
+    current: User = Depends(require_role_async("customer")),
 ):
     """
     Список откликов на конкретный заказ для заказчика.
@@ -132,51 +138,54 @@ def get_order_responses_for_customer(
     - заказ должен принадлежать текущему пользователю
     - для каждого исполнителя прикручиваем средний рейтинг по отзывам (approved)
     """
-    order = (
-        db.query(Order)
-        .filter(Order.id == order_id, Order.customer_id == current.id)
-        .first()
-    )
-    if not order:
-        raise HTTPException(status_code=404, detail="Заказ не найден")
-
-    responses = (
-        db.query(Response)
-        .join(User, Response.executor_id == User.id)
-        .filter(Response.order_id == order.id)
-        .order_by(Response.created_at.asc())
-        .all()
-    )
-
-    if not responses:
-        return []
-
-    # Собираем id всех исполнителей в этом заказе
-    executor_ids = {r.executor_id for r in responses}
-
-    # Считаем средний рейтинг по отзывам (approved) для всех этих исполнителей разом
-    rating_rows = (
-        db.query(
-            Review.target_user_id,
-            func.avg(Review.rating).label("avg_rating"),
+    def _handle(db: Session):
+        order = (
+            db.query(Order)
+            .filter(Order.id == order_id, Order.customer_id == current.id)
+            .first()
         )
-        .filter(
-            Review.target_user_id.in_(executor_ids),
-            Review.status == "approved",
+        if not order:
+            raise HTTPException(status_code=404, detail="Заказ не найден")
+
+        responses = (
+            db.query(Response)
+            .join(User, Response.executor_id == User.id)
+            .filter(Response.order_id == order.id)
+            .order_by(Response.created_at.asc())
+            .all()
         )
-        .group_by(Review.target_user_id)
-        .all()
-    )
 
-    ratings_map: dict[int, float] = {
-        row.target_user_id: round(row.avg_rating, 1) for row in rating_rows
-        if row.avg_rating is not None
-    }
+        if not responses:
+            return []
+
+        # Собираем id всех исполнителей в этом заказе
+        executor_ids = {r.executor_id for r in responses}
+
+        # Считаем средний рейтинг по отзывам (approved) для всех этих исполнителей разом
+        rating_rows = (
+            db.query(
+                Review.target_user_id,
+                func.avg(Review.rating).label("avg_rating"),
+            )
+            .filter(
+                Review.target_user_id.in_(executor_ids),
+                Review.status == "approved",
+            )
+            .group_by(Review.target_user_id)
+            .all()
+        )
+
+        ratings_map: dict[int, float] = {
+            row.target_user_id: round(row.avg_rating, 1) for row in rating_rows
+            if row.avg_rating is not None
+        }
+
+        return [
+            response_to_customer_dto(r, ratings_map.get(r.executor_id))
+            for r in responses
+        ]
 
-    return [
-        response_to_customer_dto(r, ratings_map.get(r.executor_id))
-        for r in responses
-    ]
+    return await adb.run(_handle)
 
 
 # ========== ХЕЛПЕРЫ МАППИНГА ==========
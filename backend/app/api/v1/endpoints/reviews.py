@@ -2,11 +2,12 @@
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_current_user, get_db, get_read_db
+from app.api.etag import etag_matches, make_etag, not_modified, set_etag
 from app.models.order import Order
 from app.models.review import Review
 from app.models.user import User
@@ -108,7 +109,9 @@ def create_review(
 )
 def get_reviews_for_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+    db: Session = Depends(get_read_db),
 ):
     """
     Отзывы по пользователю (как исполнителю/заказчику) + его общий рейтинг.
@@ -119,7 +122,27 @@ def get_reviews_for_user(
       количество таких отзывов
     reviews:
       сами отзывы (кроме hidden)
+
+    Поддерживает If-None-Match: маркер версии — агрегат по отзывам
+    (включая hidden, чтобы скрытие тоже меняло версию), их авторам и заказам.
     """
+    marker = (
+        db.query(
+            func.count(Review.id),
+            func.max(Review.updated_at),
+            func.max(User.updated_at),
+            func.max(Order.updated_at),
+        )
+        .join(Order, Review.order_id == Order.id)
+        .join(User, Review.author_id == User.id)
+        .filter(Review.target_user_id == user_id)
+        .one()
+    )
+    etag = make_etag("reviews-for-user", user_id, *marker)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     # сами отзывы (все, кроме hidden)
     reviews = (
         db.query(Review)
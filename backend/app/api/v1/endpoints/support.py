@@ -5,7 +5,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_current_user, get_db, get_read_db
 from app.models.support_ticket import SupportTicket
 from app.models.user import User
 from app.schemas.support import SupportCreate, SupportOut
@@ -55,7 +55,7 @@ def create_support_ticket(
     response_model=List[SupportOut],
 )
 def get_my_support_tickets(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current: User = Depends(get_current_user),
 ):
     tickets = (
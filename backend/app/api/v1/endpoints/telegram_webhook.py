@@ -0,0 +1,41 @@
+# app/api/v1/endpoints/telegram_webhook.py
+
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, status
+
+from bot.webhook import bot_webhook
+
+router = APIRouter(prefix="/telegram")
+
+
+@router.post("/webhook")
+async def telegram_webhook(
+    request: Request,
+    x_telegram_bot_api_secret_token: Optional[str] = Header(
+        default=None, alias="X-Telegram-Bot-Api-Secret-Token"
+    ),
+):
+    """
+    Обновления от Telegram в режиме webhook (TELEGRAM_WEBHOOK_ENABLED).
+    Обработка идёт в фоне: ответ — сразу после постановки в очередь.
+    """
+    if not bot_webhook.running:
+        raise HTTPException(status_code=404, detail="Webhook бота не включён")
+
+    if not bot_webhook.check_secret(x_telegram_bot_api_secret_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Неверный секрет webhook")
+
+    try:
+        payload = await request.json()
+        accepted = bot_webhook.feed(payload)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Некорректное обновление Telegram")
+
+    if not accepted:
+        # Telegram повторит доставку
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Очередь обновлений бота переполнена",
+        )
+    return {"ok": True}
@@ -1,34 +1,58 @@
 # app/api/v1/endpoints/users.py
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from app.services.telegram_avatar import sync_user_avatar_if_needed
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import (
+    get_async_db,
+    get_async_read_db,
+    get_current_user,
+    get_current_user_async,
+    get_db,
+)
+from app.api.etag import etag_matches, make_etag, not_modified, set_etag
+from app.db.async_session import AsyncDb
 from app.models.user import User
 from app.models.review import Review
 from app.models.order import Order
 from app.schemas.user import UserOut, UpdateUserPayload
+from app.services.avatar_sync import avatar_sync
+from app.services.init_data_cache import init_data_cache
+from app.services.telegram_avatar import avatar_sync_due
 from app.utils import str_to_list, list_to_str
 
 router = APIRouter(prefix="/users")
 
 
 @router.get("/me", response_model=UserOut)
-def get_me(
-    db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+async def get_me(
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+    adb: AsyncDb = Depends(get_async_db),
+    current: User = Depends(get_current_user_async),
 ):
-    if sync_user_avatar_if_needed(current):
-        db.add(current)
-        db.commit()
-        db.refresh(current)
+    def _avatar_due(db: Session) -> Optional[Tuple[int, int, Optional[str]]]:
+        if not avatar_sync_due(current):
+            return None
+        return current.id, int(current.telegram_id), current.avatar_file_unique_id
 
-    return _build_user_out(current, db)
+    def _handle(db: Session):
+        etag = _profile_etag(current, db)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
+        return _build_user_out(current, db)
 
+    # аватар обновляет фоновый воркер: запрос не ждёт Telegram и отвечает
+    # текущим avatar_url
+    due = await adb.run(_avatar_due)
+    if due:
+        avatar_sync.request(*due)
+    return await adb.run(_handle)
 
 
 @router.put("/me", response_model=UserOut)
@@ -51,6 +75,12 @@ def update_me(
     if "city" in data:
         current.city = data["city"]
 
+    if "lat" in data:
+        current.lat = data["lat"]
+
+    if "lon" in data:
+        current.lon = data["lon"]
+
     if "about" in data:
         current.about = data["about"]
 
@@ -66,30 +96,60 @@ def update_me(
     db.add(current)
     db.commit()
     db.refresh(current)
+    init_data_cache.invalidate_user(current.id)
 
     return _build_user_out(current, db)
 
 
 @router.get("/{user_id}", response_model=UserOut)
-def get_user_by_id(
+async def get_user_by_id(
     user_id: int,
-    db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    adb: AsyncDb = Depends(get_async_read_db),
+    current: User = Depends(get_current_user_async),
 ):
     """
     Профиль любого пользователя по id (для карточек исполнителей и т.п.).
     Доступен любому залогиненному пользователю.
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Пользователь не найден")
+    def _handle(db: Session):
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="Пользователь не найден")
 
-    return _build_user_out(user, db)
+        return _build_user_out(user, db)
+
+    return await adb.run(_handle)
 
 
 # =========================
 # ХЕЛПЕРЫ
 # =========================
+def _profile_etag(user: User, db: Session) -> str:
+    """
+    Маркер версии профиля: сама строка пользователя + агрегаты по отзывам
+    и заказам, из которых считаются рейтинг и счётчики.
+    """
+    reviews_count, reviews_updated = (
+        db.query(func.count(Review.id), func.max(Review.updated_at))
+        .filter(Review.target_user_id == user.id)
+        .one()
+    )
+    orders_count, orders_updated = (
+        db.query(func.count(Order.id), func.max(Order.updated_at))
+        .filter(or_(Order.customer_id == user.id, Order.executor_id == user.id))
+        .one()
+    )
+    return make_etag(
+        "users-me",
+        user.id,
+        user.updated_at,
+        reviews_count,
+        reviews_updated,
+        orders_count,
+        orders_updated,
+    )
+
+
 def _build_user_out(user: User, db: Session) -> UserOut:
     rating_row = (
         db.query(
@@ -151,12 +211,15 @@ def _build_user_out(user: User, db: Session) -> UserOut:
         last_name=user.last_name,
         phone=user.phone,
         city=user.city,
+        lat=user.lat,
+        lon=user.lon,
         about=user.about,
         specializations=str_to_list(user.specializations_raw),
         company_name=user.company_name,
         about_orders=user.about_orders,
 
         avatar_url=getattr(user, "avatar_url", None),
+        avatar_thumb_url=user.avatar_thumb_url or user.avatar_url,
 
         rating=rating_value,
         orders_count=orders_count,
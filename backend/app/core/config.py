@@ -7,6 +7,70 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "WorkScout API"
     API_V1_PREFIX: str = "/api/v1"
     DATABASE_URL: str = "sqlite:///./app.db"
+    # горячие эндпоинты на async-драйвере (aiosqlite / asyncpg) вместо threadpool
+    DB_ASYNC: bool = False
+    # пустой — выводится из DATABASE_URL
+    ASYNC_DATABASE_URL: str = ""
+
+    # read-only движок для списков и карточек (get_read_db); пустой — читаем
+    # с основной базы, если не включён SQLITE_READ_POOL
+    READ_DATABASE_URL: str = ""
+    # SQLite: отдельный read-only пул на тот же файл (смысл есть в WAL)
+    SQLITE_READ_POOL: bool = False
+    # сколько секунд после своей записи пользователь читает с основной базы
+    READ_YOUR_WRITES_SECONDS: int = 10
+
+    # пул соединений (для файловой SQLite и Postgres)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 30
+
+    # "production" — WAL, synchronous=NORMAL, busy_timeout, кэш/mmap и
+    # фоновое обслуживание базы (см. app/db/sqlite.py)
+    SQLITE_PROFILE: str = "default"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_MMAP_SIZE_MB: int = 256
+    # как часто гонять PRAGMA optimize и checkpoint WAL
+    DB_MAINTENANCE_INTERVAL_SECONDS: int = 60 * 60
+
+    # токен сессии (POST /auth/session); пустой секрет — выводится из токена бота
+    SESSION_TOKEN_SECRET: str = ""
+    SESSION_TOKEN_TTL_SECONDS: int = 15 * 60
+
+    # outbox уведомлений бота (см. app/services/notification_outbox.py)
+    NOTIFY_WORKER_ENABLED: bool = True
+    NOTIFY_POLL_SECONDS: float = 1.0
+    NOTIFY_BATCH_SIZE: int = 50
+    NOTIFY_MAX_ATTEMPTS: int = 8
+    # задержка повтора: base * 2^(попытка-1), не больше max
+    NOTIFY_RETRY_BASE_SECONDS: int = 5
+    NOTIFY_RETRY_MAX_SECONDS: int = 60 * 60
+    # сколько строка числится за воркером; упавший воркер — повтор после аренды
+    NOTIFY_LEASE_SECONDS: int = 60
+    # окно склейки: не больше одного сообщения на ключ (заказ) за окно,
+    # события внутри окна копятся в сводку
+    NOTIFY_COALESCE_SECONDS: int = 60
+    # рассылка о новых заказах исполнителям с подходящими городом и специализацией
+    NOTIFY_NEW_ORDERS: bool = True
+
+    # бот в режиме webhook внутри API вместо long polling (bot/main.py)
+    TELEGRAM_WEBHOOK_ENABLED: bool = False
+    # публичный URL эндпоинта /api/v1/telegram/webhook; пустой — setWebhook не вызываем
+    TELEGRAM_WEBHOOK_URL: str = ""
+    # секрет из заголовка X-Telegram-Bot-Api-Secret-Token (обязателен)
+    TELEGRAM_WEBHOOK_SECRET: str = ""
+    TELEGRAM_UPDATE_QUEUE_SIZE: int = 100
+
+    # фоновая синхронизация аватаров из Telegram (app/services/avatar_sync.py)
+    AVATAR_SYNC_CONCURRENCY: int = 2
+    AVATAR_SYNC_QUEUE_SIZE: int = 1000
+    # бюджет на все запросы к Telegram при скачивании одного аватара
+    AVATAR_SYNC_TIMEOUT_SECONDS: float = 20
+    # после неудачи не пробуем снова для того же пользователя столько секунд
+    AVATAR_SYNC_RETRY_SECONDS: int = 60 * 60
+    # уборка файлов заменённых аватаров; свежее grace не трогаем
+    AVATAR_GC_INTERVAL_SECONDS: int = 6 * 60 * 60
+    AVATAR_GC_GRACE_SECONDS: int = 60 * 60
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,81 @@
+# app/db/async_session.py
+#
+# Async-стек БД для горячих эндпоинтов.
+# Эндпоинт объявлен как async def, а его тело — обычная sync-функция
+# с db.query(...), которая выполняется через AsyncDb.run():
+#   - DB_ASYNC=true  — на AsyncSession (aiosqlite / asyncpg) через run_sync:
+#     ввод-вывод идёт через event loop, поток из threadpool не занимается;
+#   - DB_ASYNC=false — на обычной Session в threadpool Starlette, как раньше.
+# Так оба режима гоняются на одном и том же коде и сравниваются бенчмарком.
+#
+# ORM-объекты из run() наружу не отдаём: в async-режиме ленивые загрузки
+# работают только внутри run(). Наружу — pydantic-схемы и Response.
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.routing import read_database_url
+from app.db.sqlite import engine_kwargs, install_sqlite_pragmas
+
+T = TypeVar("T")
+
+
+def async_database_url(url: str) -> str:
+    """sqlite:// → sqlite+aiosqlite://, postgresql:// → postgresql+asyncpg://"""
+    scheme, sep, rest = url.partition("://")
+    driverless = scheme.split("+", 1)[0]
+    if driverless == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if driverless in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+async_engine = None
+AsyncSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+
+if settings.DB_ASYNC:
+    # драйверы нужны только в async-режиме
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(_async_url, **engine_kwargs(_async_url))
+    install_sqlite_pragmas(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
+    _read_url = read_database_url()
+    if _read_url:
+        _async_read_url = async_database_url(_read_url)
+        async_read_engine = create_async_engine(_async_read_url, **engine_kwargs(_async_read_url))
+        install_sqlite_pragmas(async_read_engine.sync_engine, read_only=True)
+        AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False)
+
+
+class AsyncDb(ABC):
+    """Сессия для async-эндпоинтов: run(fn, *args) вызывает fn(session, *args)."""
+
+    @abstractmethod
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        ...
+
+
+class ThreadpoolDb(AsyncDb):
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+class AsyncSessionDb(AsyncDb):
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await self.session.run_sync(fn, *args, **kwargs)
@@ -7,7 +7,14 @@ Base = declarative_base()
 # Импорт моделей, чтобы Alembic/metadata их видел
 from app.models.user import User  # noqa
 from app.models.order import Order  # noqa
+from app.models.order_category import OrderCategory  # noqa
+from app.models.order_photo import OrderPhoto  # noqa
 from app.models.response import Response  # noqa
 from app.models.chat import Chat  # noqa
 from app.models.review import Review  # noqa
-from app.models.support_ticket import SupportTicket  # noqa
\ No newline at end of file
+from app.models.support_ticket import SupportTicket  # noqa
+from app.models.notification_outbox import NotificationOutbox  # noqa
+from app.models.executor_subscription import ExecutorSubscription  # noqa
+
+# DDL и синхронизация полнотекстового индекса заказов
+import app.services.order_search  # noqa
\ No newline at end of file
@@ -0,0 +1,229 @@
+# app/db/migrations.py
+#
+# Лёгкие миграции, которые гоняем на старте после create_all (пока без Alembic).
+# Каждая миграция идемпотентна: повторный запуск ничего не ломает.
+# Запускаются из lifespan приложения (не при импорте app.main) или руками:
+#   python -m app.db.migrations
+
+from sqlalchemy import inspect, insert, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models.executor_subscription import ExecutorSubscription, subscription_rows
+from app.models.order import Order
+from app.models.order_category import OrderCategory
+from app.models.order_photo import OrderPhoto
+from app.models.user import User
+from app.services.order_photos import MAX_ORDER_PHOTOS, legacy_photo_row
+from app.services import telegram_avatar
+from app.services.image_variants import variant_filename
+from app.services.order_search import ensure_search_index
+from app.utils import str_to_list
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Чем заполнить колонку, добавленную в уже существующую таблицу.
+# ALTER TABLE ADD COLUMN в SQLite не умеет NOT NULL без константного default,
+# поэтому колонка добавляется nullable, а значения проставляются отдельно.
+COLUMN_BACKFILLS = {
+    ("orders", "updated_at"): "UPDATE orders SET updated_at = created_at WHERE updated_at IS NULL",
+    ("reviews", "updated_at"): "UPDATE reviews SET updated_at = created_at WHERE updated_at IS NULL",
+    ("users", "updated_at"): "UPDATE users SET updated_at = created_at WHERE updated_at IS NULL",
+}
+
+
+def add_missing_columns(engine: Engine) -> None:
+    """
+    create_all не добавляет новые колонки в существующие таблицы — делаем это сами.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                ddl_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {ddl_type}'))
+                backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+                if backfill:
+                    conn.execute(text(backfill))
+
+
+def backfill_order_categories(engine: Engine) -> int:
+    """
+    Заполняет order_categories из старой колонки orders.categories
+    для заказов, у которых ещё нет ни одной строки в order_categories.
+    Возвращает количество обработанных заказов.
+    """
+    processed = 0
+    last_id = 0
+
+    with Session(engine) as db:
+        while True:
+            rows = (
+                db.query(Order.id, Order.categories_raw)
+                .filter(
+                    Order.id > last_id,
+                    Order.categories_raw.isnot(None),
+                    ~Order.category_links.any(),
+                )
+                .order_by(Order.id)
+                .limit(BACKFILL_BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+
+            values = [
+                {"order_id": order_id, "category": category}
+                for order_id, raw in rows
+                for category in dict.fromkeys(str_to_list(raw))
+            ]
+            if values:
+                db.execute(insert(OrderCategory), values)
+            db.commit()
+
+            processed += len(rows)
+            last_id = rows[-1].id
+
+    return processed
+
+
+def backfill_order_photos(engine: Engine) -> int:
+    """
+    Переносит фото из старой колонки orders.photos в order_photos
+    для заказов, у которых ещё нет ни одной строки в order_photos.
+    Возвращает количество обработанных заказов.
+    """
+    processed = 0
+    last_id = 0
+
+    with Session(engine) as db:
+        while True:
+            rows = (
+                db.query(Order.id, Order.photos_raw)
+                .filter(
+                    Order.id > last_id,
+                    Order.photos_raw.isnot(None),
+                    Order.photos_raw != "",
+                    ~Order.photo_items.any(),
+                )
+                .order_by(Order.id)
+                .limit(BACKFILL_BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+
+            values = [
+                legacy_photo_row(order_id, position, url)
+                for order_id, raw in rows
+                for position, url in enumerate(
+                    list(dict.fromkeys(str_to_list(raw)))[:MAX_ORDER_PHOTOS]
+                )
+            ]
+            if values:
+                db.execute(insert(OrderPhoto), values)
+            db.commit()
+
+            processed += len(rows)
+            last_id = rows[-1].id
+
+    return processed
+
+
+def backfill_executor_subscriptions(engine: Engine) -> int:
+    """
+    Строит индекс подписок исполнителей, если таблица ещё пустая
+    (база старше executor_subscriptions). Дальше он поддерживается сам.
+    Возвращает количество обработанных исполнителей.
+    """
+    processed = 0
+    last_id = 0
+
+    with Session(engine) as db:
+        if db.query(ExecutorSubscription.user_id).first() is not None:
+            return 0
+
+        while True:
+            users = (
+                db.query(User)
+                .filter(User.id > last_id, User.role == "executor")
+                .order_by(User.id)
+                .limit(BACKFILL_BATCH_SIZE)
+                .all()
+            )
+            if not users:
+                break
+
+            values = [row for user in users for row in subscription_rows(user)]
+            processed += len(users)
+            last_id = users[-1].id
+
+            if values:
+                db.execute(insert(ExecutorSubscription), values)
+            db.commit()
+
+    return processed
+
+
+def backfill_avatar_thumbs(engine: Engine) -> int:
+    """
+    Проставляет users.avatar_thumb_url аватарам, сохранённым до появления
+    колонки: если WebP-копия уже лежит на диске. Диск проверяем здесь один
+    раз, а не на каждом чтении профиля. Возвращает число обновлённых.
+    """
+    prefix = telegram_avatar.avatar_url("")
+    updated = 0
+
+    with Session(engine) as db:
+        rows = (
+            db.query(User.id, User.avatar_url)
+            .filter(User.avatar_thumb_url.is_(None), User.avatar_url.like(prefix + "%"))
+            .all()
+        )
+        for user_id, url in rows:
+            thumb = variant_filename(url[len(prefix):], "thumb")
+            if (telegram_avatar.AVATAR_DIR / thumb).exists():
+                db.query(User).filter(User.id == user_id).update(
+                    {User.avatar_thumb_url: telegram_avatar.avatar_url(thumb)},
+                    synchronize_session=False,
+                )
+                updated += 1
+        db.commit()
+
+    return updated
+
+
+def ensure_indexes(engine: Engine) -> None:
+    """
+    create_all не трогает уже существующие таблицы, поэтому индексы,
+    добавленные в модели позже, досоздаём отдельно.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def run_startup_migrations(engine: Engine) -> None:
+    # создаём таблицы (пока без Alembic)
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    ensure_indexes(engine)
+    ensure_search_index(engine)
+    backfill_order_categories(engine)
+    backfill_order_photos(engine)
+    backfill_executor_subscriptions(engine)
+    backfill_avatar_thumbs(engine)
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+
+    run_startup_migrations(engine)
@@ -0,0 +1,91 @@
+# app/db/routing.py
+#
+# Чтение с read-only движка (реплика или отдельный пул на тот же WAL-файл).
+# Списки и карточки берут сессию через get_read_db / get_async_read_db и
+# идут в read-only движок. Исключение — пользователь, который только что
+# что-то записал: READ_YOUR_WRITES_SECONDS он читает с основной базы, чтобы
+# сразу увидеть свой заказ / отклик, даже если реплика отстаёт.
+#
+# Кто писал, узнаём по событиям Session: после flush с изменениями и
+# commit сессии, к которой привязан пользователь (info["user_id"] ставит
+# аутентификация в deps), он помечается в recent_writers.
+# Отметки живут в памяти процесса: для нескольких воркеров окно
+# READ_YOUR_WRITES_SECONDS должно перекрывать лаг реплики с запасом.
+
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.sqlite import is_memory_url, is_sqlite_url, sqlite_read_only_url
+
+# ключ в Session.info: id пользователя, от имени которого идёт запрос
+SESSION_USER_KEY = "user_id"
+_SESSION_WROTE_KEY = "wrote"
+
+
+def read_database_url() -> str:
+    """URL read-only движка или "" — тогда всё читается с основной базы."""
+    if settings.READ_DATABASE_URL:
+        return settings.READ_DATABASE_URL
+    url = settings.DATABASE_URL
+    if settings.SQLITE_READ_POOL and is_sqlite_url(url) and not is_memory_url(url):
+        return sqlite_read_only_url(url)
+    return ""
+
+
+class RecentWriters:
+    """Пользователи, которые писали в базу за последние READ_YOUR_WRITES_SECONDS."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._until: Dict[int, float] = {}
+
+    def mark(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_id] = now + settings.READ_YOUR_WRITES_SECONDS
+            # чистим протухшие отметки заодно с записью, без фонового таймера
+            if len(self._until) > 1024:
+                self._until = {uid: t for uid, t in self._until.items() if t > now}
+
+    def is_recent(self, user_id: int) -> bool:
+        with self._lock:
+            until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._until.clear()
+
+
+recent_writers = RecentWriters()
+
+
+@event.listens_for(Session, "after_flush")
+def _remember_flush(session: Session, flush_context) -> None:
+    session.info[_SESSION_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _remember_bulk_write(orm_execute_state) -> None:
+    # update()/delete() через session.execute идут мимо flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info[_SESSION_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_writer(session: Session) -> None:
+    if not session.info.pop(_SESSION_WROTE_KEY, False):
+        return
+    user_id = session.info.get(SESSION_USER_KEY)
+    if user_id is not None:
+        recent_writers.mark(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session: Session) -> None:
+    session.info.pop(_SESSION_WROTE_KEY, None)
@@ -4,10 +4,20 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.routing import read_database_url
+from app.db.sqlite import engine_kwargs, install_sqlite_pragmas
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {},
-)
+engine = create_engine(settings.DATABASE_URL, **engine_kwargs(settings.DATABASE_URL))
+install_sqlite_pragmas(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# read-only движок для get_read_db; None — читаем с основной базы
+read_engine = None
+ReadSessionLocal = None
+
+_read_url = read_database_url()
+if _read_url:
+    read_engine = create_engine(_read_url, **engine_kwargs(_read_url))
+    install_sqlite_pragmas(read_engine, read_only=True)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
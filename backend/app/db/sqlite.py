@@ -0,0 +1,83 @@
+# app/db/sqlite.py
+#
+# Настройки SQLite для боевого режима (SQLITE_PROFILE=production).
+# По умолчанию SQLite пишет в rollback-журнал: пока идёт запись, читатели
+# ленты ждут. В WAL читатели работают параллельно с одним писателем,
+# synchronous=NORMAL в WAL не теряет целостность (только последние
+# транзакции при отключении питания), busy_timeout заставляет ждать
+# блокировку, а не сразу падать с "database is locked".
+
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+
+PROFILE_PRODUCTION = "production"
+
+
+def is_sqlite_url(url: str) -> bool:
+    return url.split(":", 1)[0].split("+", 1)[0] == "sqlite"
+
+
+def is_memory_url(url: str) -> bool:
+    # "sqlite://" без пути — тоже база в памяти
+    return is_sqlite_url(url) and (":memory:" in url or url.partition("://")[2] == "")
+
+
+def sqlite_pragmas() -> List[str]:
+    """PRAGMA, которые выполняются на каждом новом соединении."""
+    if settings.SQLITE_PROFILE != PROFILE_PRODUCTION:
+        return []
+    return [
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        f"busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        # отрицательное значение — размер в КиБ, а не в страницах
+        f"cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        f"mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}",
+        "temp_store=MEMORY",
+    ]
+
+
+def engine_kwargs(url: str) -> Dict[str, Any]:
+    """Аргументы create_engine / create_async_engine для данного URL."""
+    kwargs: Dict[str, Any] = {}
+    if is_sqlite_url(url):
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not is_memory_url(url):
+        # пул по числу воркеров threadpool Starlette (40): запросы не ждут
+        # соединение дольше, чем ждали бы свободный поток
+        kwargs["pool_size"] = settings.DB_POOL_SIZE
+        kwargs["max_overflow"] = settings.DB_MAX_OVERFLOW
+        if url.startswith("sqlite+aiosqlite"):
+            # в этой версии SQLAlchemy aiosqlite по умолчанию без пула (NullPool)
+            kwargs["poolclass"] = AsyncAdaptedQueuePool
+    return kwargs
+
+
+def sqlite_read_only_url(url: str) -> str:
+    """URL того же файла, открытого только на чтение (sqlite URI, mode=ro)."""
+    scheme, _, path = url.partition(":///")
+    return f"{scheme}:///file:{path}?mode=ro&uri=true"
+
+
+def install_sqlite_pragmas(engine: Engine, read_only: bool = False) -> None:
+    pragmas = sqlite_pragmas()
+    if read_only:
+        # journal_mode на read-only соединении не переключить, зато
+        # query_only страхует от случайной записи через этот пул
+        pragmas = [p for p in pragmas if not p.startswith("journal_mode")] + ["query_only=1"]
+    if not pragmas or not is_sqlite_url(str(engine.url)):
+        return
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(f"PRAGMA {pragma}")
+        finally:
+            cursor.close()
@@ -1,17 +1,74 @@
 # app/main.py
 
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.db.base import Base  # noqa
-from app.db.session import engine
+from app.db import async_session
+from app.db.session import SessionLocal, engine
+from app.db.migrations import run_startup_migrations
+from app.db.sqlite import PROFILE_PRODUCTION, is_memory_url, is_sqlite_url
 from app.api.v1.api import api_router
+from app.services.avatar_sync import avatar_gc_loop, avatar_sync
+from app.services.db_maintenance import maintenance_loop
+from app.services.image_variants import shutdown_image_pool
+from app.services.notification_outbox import outbox_loop
+from bot.client import get_bot
+from bot.config import TELEGRAM_BOT_TOKEN
+from bot.webhook import bot_webhook
+
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # схема и миграции — при старте сервера, а не при импорте модуля:
+    # импорт app.main (тесты, скрипты) базу не трогает
+    run_startup_migrations(engine)
+
+    background = []
+    if (
+        settings.SQLITE_PROFILE == PROFILE_PRODUCTION
+        and is_sqlite_url(settings.DATABASE_URL)
+        and not is_memory_url(settings.DATABASE_URL)
+    ):
+        background.append(asyncio.create_task(
+            maintenance_loop(engine, settings.DB_MAINTENANCE_INTERVAL_SECONDS)
+        ))
+    bot = get_bot()
+    if settings.NOTIFY_WORKER_ENABLED and bot is not None:
+        # без токена бота уведомления в outbox не попадают — и слать нечего
+        background.append(asyncio.create_task(
+            outbox_loop(SessionLocal, bot.send_message, settings.NOTIFY_POLL_SECONDS)
+        ))
+    background.append(asyncio.create_task(
+        avatar_gc_loop(SessionLocal, settings.AVATAR_GC_INTERVAL_SECONDS)
+    ))
+    if settings.TELEGRAM_WEBHOOK_ENABLED:
+        await bot_webhook.start(
+            TELEGRAM_BOT_TOKEN,
+            settings.TELEGRAM_WEBHOOK_SECRET,
+            settings.TELEGRAM_UPDATE_QUEUE_SIZE,
+            settings.TELEGRAM_WEBHOOK_URL,
+        )
+    yield
+    await bot_webhook.stop()
+    await avatar_sync.stop()
+    shutdown_image_pool()
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    # соединения aiosqlite живут в своих потоках — без dispose процесс не завершится
+    for async_engine in (async_session.async_engine, async_session.async_read_engine):
+        if async_engine is not None:
+            await async_engine.dispose()
 
-# создаём таблицы (пока без Alembic)
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,69 @@
+# app/models/executor_subscription.py
+
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, delete, event, insert, inspect
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models.user import User
+from app.utils import str_to_list
+
+# поля профиля, от которых зависят подписки исполнителя
+_SUBSCRIPTION_FIELDS = ("role", "city", "specializations_raw", "is_blocked", "telegram_id")
+
+
+class ExecutorSubscription(Base):
+    """
+    Обратный индекс (город, категория) → исполнители для рассылки о новых
+    заказах: по строке на каждую специализацию исполнителя в его городе.
+    Источник правды — профиль в users; таблица пересобирается для
+    пользователя автоматически при изменении профиля (см. _sync_subscriptions
+    ниже), так что рассылка не сканирует users.
+    """
+
+    __tablename__ = "executor_subscriptions"
+
+    city = Column(String, primary_key=True)
+    category = Column(String, primary_key=True)
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # копия users.telegram_id: получатель рассылки без JOIN с users
+    telegram_id = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # пересборка подписок одного пользователя
+        Index("ix_executor_subscriptions_user", "user_id"),
+    )
+
+
+def subscription_rows(user: User) -> list:
+    if user.role != "executor" or user.is_blocked or not user.city or not user.telegram_id:
+        return []
+    return [
+        {"city": user.city, "category": category, "user_id": user.id, "telegram_id": user.telegram_id}
+        for category in dict.fromkeys(str_to_list(user.specializations_raw))
+    ]
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_subscriptions(session: Session, flush_context) -> None:
+    changed = [
+        obj
+        for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, User)
+        and (
+            obj in session.new
+            or any(inspect(obj).attrs[f].history.has_changes() for f in _SUBSCRIPTION_FIELDS)
+        )
+    ]
+    if not changed:
+        return
+
+    conn = session.connection()
+    for user in changed:
+        conn.execute(delete(ExecutorSubscription).where(ExecutorSubscription.user_id == user.id))
+        rows = subscription_rows(user)
+        if rows:
+            conn.execute(insert(ExecutorSubscription), rows)
@@ -0,0 +1,47 @@
+# app/models/notification_outbox.py
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class NotificationOutbox(Base):
+    """
+    Исходящее сообщение бота. Пишется в той же транзакции, что и изменение,
+    о котором уведомляем; отправляет фоновый воркер (app/services/notification_outbox.py).
+    """
+
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # new_response | executor_chosen | ...
+    kind = Column(String, nullable=False)
+
+    chat_id = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    # JSON inline-клавиатуры или NULL
+    reply_markup = Column(Text, nullable=True)
+
+    # сообщения с одним ключом склеиваются в сводку (например, отклики на заказ)
+    coalesce_key = Column(String, nullable=True)
+    # сколько событий вошло в сообщение
+    batch_count = Column(Integer, nullable=False, default=1)
+
+    # pending | sent | failed
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    # когда можно (повторно) отправлять; у взятой в работу строки — конец аренды
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(String, nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_notification_outbox_status_next", "status", "next_attempt_at"),
+        Index("ix_notification_outbox_coalesce", "coalesce_key", "id"),
+    )
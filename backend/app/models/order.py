@@ -1,5 +1,7 @@
 # app/models/order.py
 
+from datetime import datetime
+
 from sqlalchemy import (
     Column,
     Integer,
@@ -8,12 +10,17 @@ from sqlalchemy import (
     Date,
     DateTime,
     Boolean,
+    Float,
     ForeignKey,
+    Index,
+    event,
+    text,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.db.base import Base
+from app.services.geo import geo_cell
 
 
 class Order(Base):
@@ -32,6 +39,11 @@ class Order(Base):
     city = Column(String, nullable=False)
     address = Column(String, nullable=True)
 
+    # координаты (необязательные) и ячейка гео-сетки для поиска по радиусу
+    lat = Column(Float, nullable=True)
+    lon = Column(Float, nullable=True)
+    geo_cell = Column(Integer, nullable=True)
+
     # В БД колонка называется "categories", но в коде используем categories_raw
     categories_raw = Column("categories", String, nullable=True)
 
@@ -40,6 +52,8 @@ class Order(Base):
 
     start_date = Column(Date, nullable=True)
     end_date = Column(Date, nullable=True)
+    # устарело: фото лежат в order_photos (photo_items); колонку читает
+    # только стартовая миграция
     photos_raw = Column("photos", String, nullable=True)
 
     # active | in_progress | done | cancelled и т.п.
@@ -51,6 +65,14 @@ class Order(Base):
         server_default=func.now(),
         nullable=False,
     )
+    # с микросекундами (Python-side), чтобы две правки за секунду различались —
+    # на этом держатся ETag-и
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
 
     # ====== RELATIONSHIPS ======
 
@@ -65,6 +87,54 @@ class Order(Base):
         foreign_keys=[executor_id],
     )
 
+    category_links = relationship(
+        "OrderCategory",
+        back_populates="order",
+        cascade="all, delete-orphan",
+    )
+
+    photo_items = relationship(
+        "OrderPhoto",
+        back_populates="order",
+        cascade="all, delete-orphan",
+        order_by="OrderPhoto.position",
+    )
+
     responses = relationship("Response", back_populates="order")
     chat = relationship("Chat", back_populates="order", uselist=False)
     reviews = relationship("Review", back_populates="order")
+
+    # ====== INDEXES ======
+
+    __table_args__ = (
+        # лента по городу + админские фильтры по статусу/городу
+        Index("ix_orders_status_city_created", "status", "city", "created_at", "id"),
+        # лента без города (/orders/all-active): только активные заказы
+        Index(
+            "ix_orders_active_created",
+            "created_at",
+            "id",
+            sqlite_where=text("status = 'active'"),
+            postgresql_where=text("status = 'active'"),
+        ),
+        # "мои заказы" заказчика и счётчики в профиле
+        Index("ix_orders_customer_created", "customer_id", "created_at"),
+        Index("ix_orders_executor_status", "executor_id", "status"),
+        # диапазоны по датам в админской статистике
+        Index("ix_orders_created_at", "created_at"),
+        # лента по радиусу: кандидаты по ячейкам сетки; status вторым полем,
+        # чтобы планировщик предпочёл ячейки индексу по одному статусу
+        Index("ix_orders_geo_cell_status", "geo_cell", "status"),
+        # дельта ленты (/orders/available/changes): keyset по (updated_at, id)
+        Index("ix_orders_updated_at_id", "updated_at", "id"),
+    )
+
+
+@event.listens_for(Order.lat, "set")
+def _sync_geo_cell_lat(target: Order, value, oldvalue, initiator):
+    target.geo_cell = geo_cell(value, target.lon)
+
+
+@event.listens_for(Order.lon, "set")
+def _sync_geo_cell_lon(target: Order, value, oldvalue, initiator):
+    target.geo_cell = geo_cell(target.lat, value)
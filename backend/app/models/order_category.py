@@ -0,0 +1,39 @@
+# app/models/order_category.py
+
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, event
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+from app.models.order import Order
+from app.utils import str_to_list
+
+
+class OrderCategory(Base):
+    """
+    Нормализованные категории заказа: по строке на (order_id, category).
+    Источник правды — Order.categories_raw, таблица синхронизируется
+    автоматически (см. _sync_order_categories ниже) и нужна для фильтрации
+    ленты индексом, а не разбором строки в Python.
+    """
+
+    __tablename__ = "order_categories"
+
+    order_id = Column(
+        Integer,
+        ForeignKey("orders.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    category = Column(String, primary_key=True)
+
+    order = relationship("Order", back_populates="category_links")
+
+    __table_args__ = (
+        # для EXISTS (... WHERE category IN (...) AND order_id = orders.id)
+        Index("ix_order_categories_category_order", "category", "order_id"),
+    )
+
+
+@event.listens_for(Order.categories_raw, "set")
+def _sync_order_categories(target: Order, value, oldvalue, initiator):
+    categories = list(dict.fromkeys(str_to_list(value)))
+    target.category_links = [OrderCategory(category=c) for c in categories]
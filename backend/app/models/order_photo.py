@@ -0,0 +1,49 @@
+# app/models/order_photo.py
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class OrderPhoto(Base):
+    """
+    Фото заказа: по строке на фото с позицией, ссылками на варианты
+    (превью может не быть у старых загрузок), размером и хэшем файла.
+    Заменяет склеенную через запятую колонку orders.photos.
+    """
+
+    __tablename__ = "order_photos"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(
+        Integer,
+        ForeignKey("orders.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    position = Column(Integer, nullable=False)
+
+    url = Column(String, nullable=False)
+    thumb_url = Column(String, nullable=True)
+    medium_url = Column(String, nullable=True)
+
+    size_bytes = Column(Integer, nullable=True)
+    # sha256 содержимого; у перенесённых из orders.photos — NULL
+    sha256 = Column(String(64), nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    order = relationship("Order", back_populates="photo_items")
+
+    __table_args__ = (
+        # две параллельные загрузки не займут одну позицию (и не превысят лимит);
+        # индекс же обслуживает пачечную загрузку WHERE order_id IN (...) ORDER BY position
+        UniqueConstraint("order_id", "position", name="uq_order_photos_order_position"),
+        # одно и то же фото дважды к заказу не прикрепляется
+        UniqueConstraint("order_id", "sha256", name="uq_order_photos_order_sha256"),
+    )
@@ -1,6 +1,6 @@
 # app/models/response.py
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -26,3 +26,13 @@ class Response(Base):
 
     order = relationship("Order", back_populates="responses")
     executor = relationship("User", back_populates="responses")
+
+    __table_args__ = (
+        # проверка "уже есть waiting-отклик" и смена статусов при выборе исполнителя
+        Index("ix_responses_order_executor_status", "order_id", "executor_id", "status"),
+        # отклики по заказу для заказчика + первый отклик в статистике
+        Index("ix_responses_order_created", "order_id", "created_at"),
+        # "мои отклики" исполнителя
+        Index("ix_responses_executor_created", "executor_id", "created_at"),
+        Index("ix_responses_created_at", "created_at"),
+    )
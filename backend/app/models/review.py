@@ -1,6 +1,8 @@
 # app/models/review.py
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -25,7 +27,21 @@ class Review(Base):
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
 
     author = relationship("User", foreign_keys=[author_id])
     target_user = relationship("User", foreign_keys=[target_user_id])
     order = relationship("Order")
+
+    __table_args__ = (
+        # рейтинг и список отзывов по пользователю
+        Index("ix_reviews_target_status", "target_user_id", "status", "created_at"),
+        # "один отзыв на (order + author + target)"
+        Index("ix_reviews_order_author_target", "order_id", "author_id", "target_user_id"),
+        Index("ix_reviews_created_at", "created_at"),
+    )
@@ -1,6 +1,6 @@
 # app/models/support_ticket.py
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -31,3 +31,8 @@ class SupportTicket(Base):
     )
 
     user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_support_tickets_user_created", "user_id", "created_at"),
+        Index("ix_support_tickets_status_created", "status", "created_at"),
+    )
@@ -1,6 +1,8 @@
 # app/models/user.py
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -15,6 +17,12 @@ class User(Base):
 
     avatar_url = Column(String, nullable=True)
     avatar_updated_at = Column(DateTime(timezone=True), nullable=True)
+    # file_unique_id фото из Telegram, с которого сделан avatar_url:
+    # совпал — фото не менялось, качать заново не нужно
+    avatar_file_unique_id = Column(String, nullable=True)
+    # WebP-копия для списков, записывается вместе с avatar_url;
+    # NULL — копии нет (внешний URL, старый файл), отдаём avatar_url
+    avatar_thumb_url = Column(String, nullable=True)
 
     role = Column(String, nullable=False)  # customer | executor | admin
 
@@ -23,6 +31,10 @@ class User(Base):
     phone = Column(String, nullable=True)
     city = Column(String, nullable=True)
 
+    # координаты для ленты по радиусу (необязательные)
+    lat = Column(Float, nullable=True)
+    lon = Column(Float, nullable=True)
+
     experience_years = Column(Integer, nullable=True)
 
     specializations_raw = Column("specializations", String, nullable=True)
@@ -38,6 +50,13 @@ class User(Base):
         nullable=False,
     )
 
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
+
     is_blocked = Column(Boolean, nullable=False, default=False)
 
     # ====== RELATIONSHIPS ======
@@ -85,3 +104,8 @@ class User(Base):
 
     # Тикеты в поддержку
     support_tickets = relationship("SupportTicket", back_populates="user")
+
+    __table_args__ = (
+        # счётчики по ролям в статистике и фильтры админки
+        Index("ix_users_role_city", "role", "city"),
+    )
@@ -27,3 +27,19 @@ class AdminStatsOut(BaseModel):
 
     # среднее время до первого отклика (по заказам в выборке), в часах
     avg_time_to_first_response_hours: Optional[float]
+
+
+class FeedCacheStatsOut(BaseModel):
+    hits: int
+    misses: int
+    invalidations: int
+    cities: int
+    hit_ratio: Optional[float]
+
+
+class BotStatsOut(BaseModel):
+    # False — токен бота не задан, уведомления не отправляются
+    configured: bool
+    sent: int
+    throttled: int
+    failed: int
@@ -3,11 +3,12 @@
 from datetime import date, datetime
 from typing import List, Optional, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 BudgetType = Literal["fixed", "negotiable"]
 OrderStatus = Literal["active", "in_progress", "done", "cancelled"]
+FeedSort = Literal["new", "relevance"]
 
 
 class OrderCreate(BaseModel):
@@ -15,6 +16,8 @@ class OrderCreate(BaseModel):
     description: str
     city: str
     address: Optional[str] = None
+    lat: Optional[float] = Field(default=None, ge=-90, le=90)
+    lon: Optional[float] = Field(default=None, ge=-180, le=180)
     categories: List[str]
     budget_type: BudgetType
     budget_amount: Optional[int] = None
@@ -28,6 +31,8 @@ class OrderOut(BaseModel):
     description: str
     city: str
     address: Optional[str]
+    lat: Optional[float] = None
+    lon: Optional[float] = None
     categories: List[str]
     budget_type: BudgetType
     budget_amount: Optional[int]
@@ -36,6 +41,9 @@ class OrderOut(BaseModel):
     status: str
     has_photos: bool
     photos: List[str] = []
+    # те же фото уменьшенными WebP (для старых загрузок — оригиналы)
+    photo_thumbs: List[str] = []
+    photo_medium: List[str] = []
     created_at: datetime
     executor_id: Optional[int] = None
 
@@ -56,13 +64,40 @@ class AvailableOrderDto(BaseModel):
     date_to: Optional[date]
     has_photos: bool
     photos: List[str] = []
+    # те же фото уменьшенными WebP (для старых загрузок — оригиналы)
+    photo_thumbs: List[str] = []
+    photo_medium: List[str] = []
     created_at: datetime
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    # только в ленте по радиусу
+    distance_km: Optional[float] = None
+
+
+class AvailableOrdersPage(BaseModel):
+    items: List[AvailableOrderDto]
+    # курсор следующей страницы; None — дальше ничего нет
+    next_cursor: Optional[str] = None
+
+
+class OrderFeedChanges(BaseModel):
+    # заказы, которые появились или изменились и видны в ленте
+    items: List[AvailableOrderDto]
+    # tombstones: id заказов, которые надо убрать из ленты (взяты, отменены,
+    # больше не подходят под фильтры) — клиент удаляет их, если они у него есть
+    removed: List[int]
+    # передать в since следующего запроса
+    next_since: str
+    # true — изменений больше лимита, сразу запросить ещё
+    has_more: bool = False
 
 class OrderUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     city: Optional[str] = None
     address: Optional[str] = None
+    lat: Optional[float] = Field(default=None, ge=-90, le=90)
+    lon: Optional[float] = Field(default=None, ge=-180, le=180)
     categories: Optional[List[str]] = None
     budget_type: Optional[BudgetType] = None
     budget_amount: Optional[int] = None
@@ -2,7 +2,7 @@
 from datetime import datetime
 from typing import List, Optional, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 UserRole = Literal["customer", "executor", "admin"]
@@ -15,6 +15,8 @@ class RegisterPayload(BaseModel):
     last_name: Optional[str] = None
     phone: Optional[str] = None
     city: Optional[str] = None
+    lat: Optional[float] = Field(default=None, ge=-90, le=90)
+    lon: Optional[float] = Field(default=None, ge=-180, le=180)
     experience_years: Optional[int] = None
     specializations: Optional[List[str]] = None
     portfolio_photos: Optional[List[str]] = None
@@ -30,12 +32,16 @@ class UserOut(BaseModel):
     last_name: Optional[str] = None
     phone: Optional[str] = None
     city: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
     about: Optional[str] = None
     specializations: Optional[List[str]] = None
     company_name: Optional[str] = None
     about_orders: Optional[str] = None
 
     avatar_url: Optional[str] = None
+    # маленькая WebP-копия аватара для списков (если есть — иначе avatar_url)
+    avatar_thumb_url: Optional[str] = None
     # то, что уже было
     rating: Optional[float] = None
     orders_count: Optional[int] = None
@@ -53,6 +59,8 @@ class UpdateUserPayload(BaseModel):
     last_name: Optional[str] = None
     phone: Optional[str] = None
     city: Optional[str] = None
+    lat: Optional[float] = Field(default=None, ge=-90, le=90)
+    lon: Optional[float] = Field(default=None, ge=-180, le=180)
     about: Optional[str] = None
     specializations: Optional[List[str]] = None
     company_name: Optional[str] = None
@@ -74,3 +82,11 @@ class AdminUserOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class SessionTokenOut(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    # unix-время, после которого токен нужно получить заново
+    expires_at: int
+    role: UserRole
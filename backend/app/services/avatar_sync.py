@@ -0,0 +1,185 @@
+# app/services/avatar_sync.py
+#
+# Фоновая синхронизация аватаров из Telegram.
+# GET /users/me больше не ходит в Telegram: если аватар устарел, эндпоинт
+# ставит пользователя в очередь и сразу отвечает текущим avatar_url.
+# Очередь разбирают несколько задач asyncio в event loop приложения:
+#   - одновременно качается не больше AVATAR_SYNC_CONCURRENCY аватаров
+#     (сеть и диск — в threadpool, event loop не блокируется);
+#   - на один аватар — бюджет AVATAR_SYNC_TIMEOUT_SECONDS на все запросы;
+#   - пользователь в очереди или в работе второй раз не ставится,
+#     после неудачи — не раньше чем через AVATAR_SYNC_RETRY_SECONDS;
+#   - переполненная очередь запрос просто отбрасывает: следующий /me
+#     поставит его снова.
+# Результат пишется отдельной короткой сессией; новый URL клиент увидит
+# при следующем запросе профиля.
+#
+# Фото не менялось (тот же file_unique_id) — файл не качаем, только
+# отмечаем проверку. Файлы аватаров именуются по хэшу содержимого;
+# заменённые удаляет avatar_gc_loop.
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.services.telegram_avatar import AvatarSyncResult, collect_avatar_garbage, download_user_avatar
+
+logger = logging.getLogger(__name__)
+
+# download(telegram_id, budget_seconds, known_file_unique_id) -> результат или None
+Downloader = Callable[[int, float, Optional[str]], Optional[AvatarSyncResult]]
+
+
+class AvatarSync:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        download: Downloader = download_user_avatar,
+        concurrency: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        retry_seconds: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.download = download
+        self.concurrency = concurrency or settings.AVATAR_SYNC_CONCURRENCY
+        self.queue_size = queue_size or settings.AVATAR_SYNC_QUEUE_SIZE
+        self.timeout = timeout or settings.AVATAR_SYNC_TIMEOUT_SECONDS
+        self.retry_seconds = (
+            settings.AVATAR_SYNC_RETRY_SECONDS if retry_seconds is None else retry_seconds
+        )
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: List[asyncio.Task] = []
+        self._queued: Set[int] = set()
+        self._cooldown: Dict[int, float] = {}
+
+    def request(self, user_id: int, telegram_id: int, file_unique_id: Optional[str] = None) -> bool:
+        """
+        Ставит синхронизацию аватара в очередь; вызывать из event loop.
+        Не ждёт скачивания. False — не поставлено (уже в очереди, недавно
+        не вышло или очередь полна).
+        """
+        if user_id in self._queued:
+            return False
+        retry_at = self._cooldown.get(user_id)
+        if retry_at is not None:
+            if retry_at > time.monotonic():
+                return False
+            del self._cooldown[user_id]
+
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait((user_id, telegram_id, file_unique_id))
+        except asyncio.QueueFull:
+            return False
+        self._queued.add(user_id)
+        return True
+
+    def pending(self) -> int:
+        """Сколько аватаров в очереди или качается прямо сейчас."""
+        return len(self._queued)
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._workers = []
+        self._queue = None
+        self._loop = None
+        self._queued.clear()
+
+    # ------------------------------------------------------------------ #
+
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # новый event loop (перезапуск приложения, тесты): старые задачи
+            # и очередь привязаны к прежнему и здесь бесполезны
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._loop = loop
+            self._workers = []
+            self._queued.clear()
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(loop.create_task(self._worker(self._queue)))
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            user_id, telegram_id, file_unique_id = await queue.get()
+            try:
+                ok = await self._sync_one(user_id, telegram_id, file_unique_id)
+            except Exception:
+                logger.exception("avatar sync failed for user %s", user_id)
+                ok = False
+            finally:
+                self._queued.discard(user_id)
+                queue.task_done()
+            if not ok:
+                self._cooldown[user_id] = time.monotonic() + self.retry_seconds
+
+    async def _sync_one(self, user_id: int, telegram_id: int, file_unique_id: Optional[str]) -> bool:
+        try:
+            result = await asyncio.wait_for(
+                run_in_threadpool(self.download, telegram_id, self.timeout, file_unique_id),
+                # запас сверх бюджета: httpx сам уложится в него, а здесь —
+                # страховка от зависшего DNS и т. п.
+                timeout=self.timeout + 5,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("avatar sync for user %s timed out", user_id)
+            return False
+        if result is None:
+            return False
+        await run_in_threadpool(self._save, user_id, result)
+        return True
+
+    def _save(self, user_id: int, result: AvatarSyncResult) -> None:
+        values = {User.avatar_updated_at: datetime.utcnow()}
+        if result.url:
+            values[User.avatar_url] = result.url
+            values[User.avatar_thumb_url] = result.thumb_url
+            values[User.avatar_file_unique_id] = result.file_unique_id
+        with self.session_factory() as db:
+            db.query(User).filter(User.id == user_id).update(values, synchronize_session=False)
+            db.commit()
+
+
+def collect_unused_avatars(db: Session, grace_seconds: Optional[float] = None) -> int:
+    """Удаляет файлы аватаров, на которые больше никто не ссылается."""
+    if grace_seconds is None:
+        grace_seconds = settings.AVATAR_GC_GRACE_SECONDS
+    referenced = [url for (url,) in db.query(User.avatar_url).filter(User.avatar_url.isnot(None))]
+    return collect_avatar_garbage(referenced, grace_seconds)
+
+
+async def avatar_gc_loop(session_factory: Callable[[], Session], interval_seconds: float) -> None:
+    """Запускается из lifespan приложения; отменяется при остановке."""
+
+    def _collect_once() -> int:
+        with session_factory() as db:
+            return collect_unused_avatars(db)
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            removed = await run_in_threadpool(_collect_once)
+            if removed:
+                logger.info("avatar gc: removed %s files", removed)
+        except Exception:
+            logger.exception("avatar gc failed")
+
+
+avatar_sync = AvatarSync(SessionLocal)
@@ -0,0 +1,61 @@
+# app/services/db_maintenance.py
+#
+# Фоновое обслуживание SQLite в боевом профиле.
+# - статистика для планировщика: без sqlite_stat1 он не знает селективность
+#   индексов (например, частичного ix_orders_active_created) — первый проход
+#   делает полный ANALYZE, дальше хватает дешёвого PRAGMA optimize;
+# - checkpoint WAL: переносит страницы из -wal в основной файл и обрезает
+#   журнал, иначе при постоянных читателях он растёт без предела.
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# сколько строк на индекс смотрит PRAGMA optimize — держит проход коротким
+ANALYSIS_LIMIT = 1000
+
+
+@dataclass
+class MaintenanceResult:
+    analyzed: bool
+    # (busy, страниц в WAL, перенесено страниц); None — база не в WAL
+    checkpoint: Optional[tuple]
+
+
+def run_sqlite_maintenance(engine: Engine) -> MaintenanceResult:
+    with engine.connect() as conn:
+        has_stats = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+        ).first()
+        if has_stats:
+            conn.exec_driver_sql(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+            conn.exec_driver_sql("PRAGMA optimize")
+        else:
+            conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+
+        checkpoint = None
+        journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+        if str(journal_mode).lower() == "wal":
+            checkpoint = tuple(conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one())
+
+    return MaintenanceResult(analyzed=not has_stats, checkpoint=checkpoint)
+
+
+async def maintenance_loop(engine: Engine, interval_seconds: int) -> None:
+    """Запускается из lifespan приложения; отменяется при остановке."""
+    while True:
+        try:
+            result = await run_in_threadpool(run_sqlite_maintenance, engine)
+            logger.info("sqlite maintenance: %s", result)
+        except Exception:
+            # занятая база или диск — попробуем в следующий раз
+            logger.exception("sqlite maintenance failed")
+        await asyncio.sleep(interval_seconds)
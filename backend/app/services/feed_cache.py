@@ -0,0 +1,122 @@
+# app/services/feed_cache.py
+#
+# Кэш ленты активных заказов по городу, живёт внутри процесса.
+# Карточки (AvailableOrderDto) собираются один раз на город, а фильтры
+# конкретного исполнителя (свои заказы, категории, свежесть, курсор)
+# применяются уже к готовым карточкам.
+#
+# Корректность держат явные вызовы invalidate() после коммита во всех
+# эндпоинтах, которые меняют активные заказы. TTL — страховка на случай
+# нескольких воркеров, которые не видят инвалидаций друг друга.
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from app.schemas.order import AvailableOrderDto
+
+FEED_CACHE_TTL_SECONDS = int(os.getenv("FEED_CACHE_TTL_SECONDS", "60"))
+FEED_CACHE_MAX_CITIES = int(os.getenv("FEED_CACHE_MAX_CITIES", "500"))
+
+
+@dataclass(frozen=True)
+class FeedCard:
+    id: int
+    created_at: datetime
+    customer_id: int
+    categories: FrozenSet[str]
+    dto: AvailableOrderDto
+
+
+@dataclass
+class _CityFeed:
+    cards: List[FeedCard]
+    loaded_at: float
+    # уникален для каждой загрузки — годится как маркер версии для ETag
+    version: int
+
+
+@dataclass
+class FeedCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    cities: int = 0
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        total = self.hits + self.misses
+        return round(self.hits / total, 4) if total else None
+
+
+class FeedCache:
+    def __init__(self, ttl_seconds: int, max_cities: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_cities = max_cities
+        self._lock = threading.Lock()
+        self._feeds: "OrderedDict[str, _CityFeed]" = OrderedDict()
+        # поколение города растёт при каждой инвалидации: загрузка, начатая
+        # до инвалидации, не должна положить в кэш устаревшие карточки
+        self._generations: Dict[str, int] = {}
+        self._stats = FeedCacheStats()
+        self._versions = itertools.count(1)
+
+    def get(
+        self, city: str, loader: Callable[[], List[FeedCard]]
+    ) -> Tuple[List[FeedCard], int]:
+        """
+        Карточки города и версия снимка (меняется при каждой перезагрузке).
+        """
+        now = time.monotonic()
+        with self._lock:
+            feed = self._feeds.get(city)
+            if feed is not None and now - feed.loaded_at < self.ttl_seconds:
+                self._feeds.move_to_end(city)
+                self._stats.hits += 1
+                return feed.cards, feed.version
+            self._stats.misses += 1
+            generation = self._generations.get(city, 0)
+
+        cards = loader()
+
+        with self._lock:
+            version = next(self._versions)
+            if self._generations.get(city, 0) == generation:
+                self._feeds[city] = _CityFeed(cards=cards, loaded_at=now, version=version)
+                self._feeds.move_to_end(city)
+                while len(self._feeds) > self.max_cities:
+                    self._feeds.popitem(last=False)
+        return cards, version
+
+    def invalidate(self, *cities: Optional[str]) -> None:
+        with self._lock:
+            for city in {c for c in cities if c}:
+                self._generations[city] = self._generations.get(city, 0) + 1
+                self._feeds.pop(city, None)
+                self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._feeds.clear()
+            self._generations.clear()
+            self._stats = FeedCacheStats()
+
+    def stats(self) -> FeedCacheStats:
+        with self._lock:
+            return FeedCacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                invalidations=self._stats.invalidations,
+                cities=len(self._feeds),
+            )
+
+
+feed_cache = FeedCache(
+    ttl_seconds=FEED_CACHE_TTL_SECONDS,
+    max_cities=FEED_CACHE_MAX_CITIES,
+)
@@ -0,0 +1,61 @@
+# app/services/feed_ranking.py
+#
+# Релевантность заказа для исполнителя, целиком в SQL:
+#   score = W_CATEGORY * (сколько категорий заказа совпало)
+#         + W_FRESH    * свежесть (гиперболический спад с полураспадом FRESH_HALF_LIFE_HOURS)
+#         + W_BUDGET   * (указан бюджет)
+#         + W_PHOTOS   * (есть фото)
+#
+# Свежесть считается от фиксированного момента as_of, а не от now(): он
+# переезжает в курсор, и скоры на следующих страницах совпадают с первой.
+
+import os
+from datetime import datetime
+from typing import Set
+
+from sqlalchemy import case, func, literal, select
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.order import Order
+from app.models.order_category import OrderCategory
+
+W_CATEGORY = 3.0
+W_FRESH = 2.0
+W_BUDGET = 1.0
+W_PHOTOS = 0.5
+FRESH_HALF_LIFE_HOURS = 48.0
+
+# сколько заказов максимум отдаём в ранжированной ленте (по всем страницам)
+RELEVANCE_TOP_K = int(os.getenv("RELEVANCE_TOP_K", "100"))
+
+
+def _age_hours(dialect: str, as_of: datetime) -> ColumnElement:
+    if dialect == "postgresql":
+        return func.extract("epoch", literal(as_of) - Order.created_at) / 3600.0
+    return (func.julianday(literal(as_of)) - func.julianday(Order.created_at)) * 24.0
+
+
+def relevance_score(dialect: str, wanted: Set[str], as_of: datetime) -> ColumnElement:
+    if wanted:
+        overlap = (
+            select(func.count())
+            .where(
+                OrderCategory.order_id == Order.id,
+                OrderCategory.category.in_(wanted),
+            )
+            .correlate(Order)
+            .scalar_subquery()
+        )
+    else:
+        overlap = literal(0)
+
+    freshness = 1.0 / (1.0 + _age_hours(dialect, as_of) / FRESH_HALF_LIFE_HOURS)
+    has_budget = case((Order.budget_amount.isnot(None), 1.0), else_=0.0)
+    has_photos = case((Order.has_photos.is_(True), 1.0), else_=0.0)
+
+    return (
+        W_CATEGORY * overlap
+        + W_FRESH * freshness
+        + W_BUDGET * has_budget
+        + W_PHOTOS * has_photos
+    )
@@ -0,0 +1,94 @@
+# app/services/geo.py
+#
+# Гео-выборка заказов по радиусу.
+#
+# Заказ с координатами кладётся в ячейку равномерной сетки GRID_CELL_DEG x GRID_CELL_DEG
+# (orders.geo_cell, индекс). Запрос "в радиусе R от точки" сначала берёт кандидатов
+# из ячеек, покрывающих круг (IN по индексу), и только для них проверяет
+# точное расстояние по гаверсинусу. Со всеми активными заказами расстояние
+# не считается никогда.
+
+import math
+import sqlite3
+from typing import List, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import ColumnElement
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.32
+
+GRID_CELL_DEG = 0.2
+_LON_CELLS = int(round(360 / GRID_CELL_DEG))
+
+MAX_RADIUS_KM = 100.0
+
+
+def geo_cell(lat: Optional[float], lon: Optional[float]) -> Optional[int]:
+    if lat is None or lon is None:
+        return None
+    lat_idx = int(math.floor((lat + 90.0) / GRID_CELL_DEG))
+    lon_idx = int(math.floor((lon + 180.0) / GRID_CELL_DEG)) % _LON_CELLS
+    return lat_idx * _LON_CELLS + lon_idx
+
+
+def cells_within(lat: float, lon: float, radius_km: float) -> List[int]:
+    """
+    Все ячейки, которые пересекает окружающий круг прямоугольник.
+    """
+    dlat = radius_km / KM_PER_DEG_LAT
+    # у полюсов градус долготы стремится к нулю — не даём делить на ноль
+    dlon = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01))
+    dlon = min(dlon, 180.0)
+
+    lat_lo = int(math.floor((max(lat - dlat, -90.0) + 90.0) / GRID_CELL_DEG))
+    lat_hi = int(math.floor((min(lat + dlat, 90.0) + 90.0) / GRID_CELL_DEG))
+    lon_lo = int(math.floor((lon - dlon + 180.0) / GRID_CELL_DEG))
+    lon_hi = int(math.floor((lon + dlon + 180.0) / GRID_CELL_DEG))
+
+    lon_indexes = sorted({i % _LON_CELLS for i in range(lon_lo, lon_hi + 1)})
+    return [
+        lat_idx * _LON_CELLS + lon_idx
+        for lat_idx in range(lat_lo, lat_hi + 1)
+        for lon_idx in lon_indexes
+    ]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> Optional[float]:
+    if None in (lat1, lon1, lat2, lon2):
+        return None
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distance_km_expr(
+    dialect: str, lat_col, lon_col, lat: float, lon: float
+) -> ColumnElement:
+    """
+    SQL-выражение расстояния от точки до (lat_col, lon_col).
+    В Postgres — встроенная тригонометрия, в SQLite — функция haversine_km,
+    которую регистрирует _register_sqlite_functions.
+    """
+    if dialect == "postgresql":
+        p1 = func.radians(lat)
+        p2 = func.radians(lat_col)
+        dp = func.radians(lat_col - lat)
+        dl = func.radians(lon_col - lon)
+        a = func.power(func.sin(dp / 2), 2) + func.cos(p1) * func.cos(p2) * func.power(
+            func.sin(dl / 2), 2
+        )
+        return 2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a)))
+    return func.haversine_km(lat, lon, lat_col, lon_col)
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    # aiosqlite приходит адаптером SQLAlchemy с тем же create_function
+    if isinstance(dbapi_connection, sqlite3.Connection) or type(
+        dbapi_connection
+    ).__module__.startswith("sqlalchemy.dialects.sqlite"):
+        dbapi_connection.create_function("haversine_km", 4, haversine_km, deterministic=True)
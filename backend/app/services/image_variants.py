@@ -0,0 +1,124 @@
+# app/services/image_variants.py
+#
+# Уменьшенные копии загруженных картинок (фото заказов, аватары).
+# Рядом с оригиналом кладём WebP-варианты фиксированного размера:
+#   o12_<sha256>.jpg  →  o12_<sha256>.thumb.webp   (карточки ленты)
+#                     →  o12_<sha256>.medium.webp  (просмотр)
+# Лента и списки отдают ссылки на варианты — килобайты вместо мегабайт.
+#
+# Декодирование и ресайз — чистый CPU под GIL, поэтому работают в пуле
+# процессов: event loop и threadpool API не ждут Pillow. Процесс сам
+# пишет файлы, байты вариантов обратно не гоняем.
+# Ссылки на варианты пишутся в БД вместе с оригиналом (order_photos.thumb_url,
+# users.avatar_thumb_url) — на чтении диск не проверяем; у старых картинок
+# без вариантов там NULL, и отдаётся оригинал.
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from PIL import Image, ImageOps
+
+# (имя, длинная сторона в px); от большего к меньшему
+VARIANTS = (
+    ("medium", int(os.getenv("IMAGE_MEDIUM_PX", "1280"))),
+    ("thumb", int(os.getenv("IMAGE_THUMB_PX", "320"))),
+)
+WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+# больше — не декодируем вовсе (8 МБ PNG может развернуться в гигабайты)
+MAX_IMAGE_PIXELS = 40_000_000
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class ImageError(ValueError):
+    """Файл не удалось прочитать как картинку."""
+
+
+def variant_filename(filename: str, variant: str) -> str:
+    stem = filename.rsplit(".", 1)[0]
+    return f"{stem}.{variant}.webp"
+
+
+def render_variants(source: Union[bytes, str], directory: str, filename: str) -> Dict[str, str]:
+    """
+    Выполняется в процессе пула. source — байты или путь к файлу (большие
+    загрузки передаём путём, чтобы не гонять мегабайты через pipe).
+    Пишет варианты в directory рядом с оригиналом filename;
+    возвращает {вариант: имя файла}.
+    """
+    try:
+        img = Image.open(BytesIO(source) if isinstance(source, bytes) else source)
+        if img.width * img.height > MAX_IMAGE_PIXELS:
+            raise ImageError("image too large")
+        # JPEG сразу декодируем в уменьшенном масштабе — в разы быстрее
+        largest = VARIANTS[0][1]
+        img.draft("RGB", (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        img.load()
+    except ImageError:
+        raise
+    except Exception as exc:
+        raise ImageError(str(exc)) from exc
+
+    img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+
+    written = {}
+    for variant, size in VARIANTS:
+        # варианты уменьшаются последовательно: thumb делается из medium
+        img.thumbnail((size, size), Image.LANCZOS)
+        name = variant_filename(filename, variant)
+        path = Path(directory) / name
+        tmp = path.with_name(f".{name}.{os.getpid()}.tmp")
+        img.save(tmp, format="WEBP", quality=WEBP_QUALITY, method=4)
+        os.replace(tmp, path)
+        written[variant] = name
+    return written
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: в API работают потоки (threadpool, aiosqlite), fork с ними небезопасен
+        _pool = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def make_variants(source: Union[bytes, Path], directory: Path, filename: str) -> Dict[str, str]:
+    """Синхронная версия — для кода, который уже работает в потоке."""
+    if isinstance(source, Path):
+        source = str(source)
+    try:
+        return _get_pool().submit(render_variants, source, str(directory), filename).result()
+    except BrokenProcessPool:
+        shutdown_image_pool()
+        raise
+
+
+async def make_variants_async(source: Union[bytes, Path], directory: Path, filename: str) -> Dict[str, str]:
+    if isinstance(source, Path):
+        source = str(source)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _get_pool(), render_variants, source, str(directory), filename
+        )
+    except BrokenProcessPool:
+        shutdown_image_pool()
+        raise
+
+
+def shutdown_image_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,96 @@
+# app/services/init_data_cache.py
+#
+# Кэш проверенного Telegram initData внутри процесса.
+# Клиент шлёт одну и ту же строку initData до 24 часов подряд, а полная
+# проверка — это parse_qsl, сортировка, два HMAC-SHA256, json.loads и поиск
+# пользователя по telegram_id. Здесь запоминаем результат: id пользователя
+# и небольшой снимок (роль, блокировка). По снимку запрос обслуживается
+# вовсе без БД — как и по токену сессии.
+#
+# Запись живёт до auth_date + INITDATA_TTL_SECONDS (дольше сама строка
+# initData всё равно не принимается), но не дольше
+# INITDATA_CACHE_SNAPSHOT_TTL_SECONDS: снимок может устареть из-за правки
+# в другом воркере. Блокировка/разблокировка и правка профиля в этом
+# процессе сбрасывают записи пользователя сразу.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+INITDATA_CACHE_MAX_ENTRIES = int(os.getenv("INITDATA_CACHE_MAX_ENTRIES", "10000"))
+# отказ заблокированному отдаём без БД, но недолго: разблокировать могли
+# в другом воркере, и его инвалидация сюда не дойдёт
+INITDATA_CACHE_BLOCKED_TTL_SECONDS = int(os.getenv("INITDATA_CACHE_BLOCKED_TTL_SECONDS", "60"))
+# столько максимум живёт снимок роли и блокировки — как и токен сессии
+INITDATA_CACHE_SNAPSHOT_TTL_SECONDS = int(os.getenv("INITDATA_CACHE_SNAPSHOT_TTL_SECONDS", str(15 * 60)))
+
+# (токен бота, строка initData): смена токена сама отсекает старые записи
+_Key = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class VerifiedInitData:
+    telegram_id: int
+    user_id: int
+    role: str
+    is_blocked: bool
+    expires_at: float
+
+
+class InitDataCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[_Key, VerifiedInitData]" = OrderedDict()
+        self._by_user: Dict[int, Set[_Key]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, bot_token: str, init_data: str) -> Optional[VerifiedInitData]:
+        key = (bot_token, init_data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, bot_token: str, init_data: str, entry: VerifiedInitData) -> None:
+        key = (bot_token, init_data)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._by_user.setdefault(entry.user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: _Key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_user.get(entry.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry.user_id]
+
+
+init_data_cache = InitDataCache(max_entries=INITDATA_CACHE_MAX_ENTRIES)
@@ -0,0 +1,294 @@
+# app/services/notification_outbox.py
+#
+# Transactional outbox для уведомлений бота.
+# Эндпоинт кладёт сообщение в notification_outbox той же транзакцией, что
+# и само изменение (отклик, выбор исполнителя): уведомление не теряется
+# при падении после commit и не уходит, если транзакция откатилась.
+# Запрос при этом не ждёт Telegram — отправляет фоновый воркер:
+#   - берёт пачку готовых строк, «арендуя» их (next_attempt_at = конец аренды),
+#     так что параллельный воркер их не возьмёт, а упавший — отдаст обратно;
+#   - шлёт вне транзакции;
+#   - неудача — повтор с экспоненциальной задержкой, после
+#     NOTIFY_MAX_ATTEMPTS попыток строка помечается failed.
+#
+# Склейка (coalesce_key): первое событие уходит сразу, следующие в течение
+# NOTIFY_COALESCE_SECONDS копятся в одной отложенной строке, текст которой
+# перерисовывается в сводку ("5 новых откликов"). Так всплеск откликов на
+# популярный заказ даёт заказчику по сообщению в окно, а не по каждому.
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import DateTime, Integer, String, Text, insert, literal, select
+from sqlalchemy.orm import Query, Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.notification_outbox import NotificationOutbox
+from bot.notifications import OutgoingMessage
+
+logger = logging.getLogger(__name__)
+
+# send(chat_id, text, reply_markup) -> True, если Telegram принял сообщение
+Sender = Callable[[int, str, Optional[dict]], bool]
+
+
+@dataclass
+class DrainResult:
+    claimed: int = 0
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+
+def enqueue_notification(
+    db: Session,
+    kind: str,
+    message: Optional[OutgoingMessage],
+    coalesce_key: Optional[str] = None,
+    digest: Optional[Callable[[int], Optional[OutgoingMessage]]] = None,
+) -> None:
+    """
+    Добавляет сообщение в outbox текущей транзакции; commit — за вызывающим.
+    С coalesce_key сообщение склеивается с ещё не отправленным по тому же
+    ключу: digest(n) рисует сводку на n событий.
+    """
+    if message is None:
+        return
+    now = datetime.utcnow()
+    next_attempt_at = now
+
+    if coalesce_key:
+        last = (
+            db.query(NotificationOutbox)
+            .filter(NotificationOutbox.coalesce_key == coalesce_key)
+            .order_by(NotificationOutbox.id.desc())
+            .first()
+        )
+        if last is not None and _merge_into(db, last, digest):
+            return
+        if last is not None:
+            next_attempt_at = _coalesced_send_time(last, now)
+
+    db.add(
+        NotificationOutbox(
+            kind=kind,
+            chat_id=message.chat_id,
+            text=message.text,
+            reply_markup=_dump_markup(message.reply_markup),
+            coalesce_key=coalesce_key,
+            batch_count=1,
+            status="pending",
+            attempts=0,
+            next_attempt_at=next_attempt_at,
+        )
+    )
+
+
+def enqueue_broadcast(db: Session, kind: str, message: OutgoingMessage, chat_ids: Query) -> int:
+    """
+    Одно сообщение многим получателям: строки outbox создаются одним
+    INSERT ... SELECT из chat_ids (запрос с единственной колонкой chat_id).
+    Возвращает число получателей.
+    """
+    recipients = chat_ids.subquery()
+    (chat_id,) = recipients.c
+    rows = select(
+        literal(kind, String),
+        chat_id,
+        literal(message.text, Text),
+        literal(_dump_markup(message.reply_markup), Text),
+        literal("pending", String),
+        literal(0, Integer),
+        literal(datetime.utcnow(), DateTime),
+        literal(1, Integer),
+    )
+    result = db.execute(
+        insert(NotificationOutbox).from_select(
+            [
+                NotificationOutbox.kind,
+                NotificationOutbox.chat_id,
+                NotificationOutbox.text,
+                NotificationOutbox.reply_markup,
+                NotificationOutbox.status,
+                NotificationOutbox.attempts,
+                NotificationOutbox.next_attempt_at,
+                NotificationOutbox.batch_count,
+            ],
+            rows,
+        )
+    )
+    return result.rowcount
+
+
+def _merge_into(
+    db: Session,
+    row: NotificationOutbox,
+    digest: Optional[Callable[[int], Optional[OutgoingMessage]]],
+) -> bool:
+    """Дописывает событие в ещё не взятую воркером строку; False — не вышло."""
+    if digest is None or row.status != "pending" or row.attempts:
+        return False
+    count = (row.batch_count or 1) + 1
+    merged = digest(count)
+    if merged is None:
+        return False
+    # условный UPDATE: воркер мог взять строку, пока мы рисовали сводку
+    updated = (
+        db.query(NotificationOutbox)
+        .filter(
+            NotificationOutbox.id == row.id,
+            NotificationOutbox.status == "pending",
+            NotificationOutbox.attempts == 0,
+            NotificationOutbox.batch_count == row.batch_count,
+        )
+        .update(
+            {
+                NotificationOutbox.text: merged.text,
+                NotificationOutbox.reply_markup: _dump_markup(merged.reply_markup),
+                NotificationOutbox.batch_count: count,
+            },
+            synchronize_session=False,
+        )
+    )
+    if not updated:
+        return False
+    db.expire(row)
+    return True
+
+
+def _coalesced_send_time(last: NotificationOutbox, now: datetime) -> datetime:
+    """Новое сообщение по ключу — не раньше чем через окно после предыдущего."""
+    window = timedelta(seconds=settings.NOTIFY_COALESCE_SECONDS)
+    if last.status == "sent" and last.sent_at is not None:
+        return max(now, last.sent_at + window)
+    if last.status == "pending":
+        # предыдущее как раз отправляется
+        return now + window
+    return now
+
+
+def _dump_markup(reply_markup: Optional[dict]) -> Optional[str]:
+    return json.dumps(reply_markup, ensure_ascii=False) if reply_markup else None
+
+
+def retry_delay(attempts: int) -> timedelta:
+    seconds = settings.NOTIFY_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.NOTIFY_RETRY_MAX_SECONDS))
+
+
+def drain_outbox(
+    db: Session,
+    send: Sender,
+    batch_size: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> DrainResult:
+    """Один проход воркера: берёт до batch_size готовых сообщений и отправляет их."""
+    batch_size = batch_size or settings.NOTIFY_BATCH_SIZE
+    now = now or datetime.utcnow()
+    result = DrainResult()
+
+    # --- аренда пачки ---
+    candidate_ids = [
+        row_id
+        for (row_id,) in db.query(NotificationOutbox.id)
+        .filter(
+            NotificationOutbox.status == "pending",
+            NotificationOutbox.next_attempt_at <= now,
+        )
+        .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+        .limit(batch_size)
+    ]
+    lease_until = now + timedelta(seconds=settings.NOTIFY_LEASE_SECONDS)
+    claimed = []
+    for row_id in candidate_ids:
+        # условие повторяем в UPDATE: строку мог перехватить другой воркер
+        updated = (
+            db.query(NotificationOutbox)
+            .filter(
+                NotificationOutbox.id == row_id,
+                NotificationOutbox.status == "pending",
+                NotificationOutbox.next_attempt_at <= now,
+            )
+            .update(
+                {
+                    NotificationOutbox.next_attempt_at: lease_until,
+                    NotificationOutbox.attempts: NotificationOutbox.attempts + 1,
+                },
+                synchronize_session=False,
+            )
+        )
+        if updated:
+            claimed.append(row_id)
+    db.commit()
+    if not claimed:
+        return result
+    result.claimed = len(claimed)
+
+    rows = (
+        db.query(
+            NotificationOutbox.id,
+            NotificationOutbox.chat_id,
+            NotificationOutbox.text,
+            NotificationOutbox.reply_markup,
+            NotificationOutbox.attempts,
+        )
+        .filter(NotificationOutbox.id.in_(claimed))
+        .order_by(NotificationOutbox.id)
+        .all()
+    )
+    # отправка идёт долго — транзакцию (и блокировку SQLite) не держим
+    db.commit()
+
+    # --- отправка ---
+    outcomes = []
+    for row_id, chat_id, text, reply_markup, attempts in rows:
+        error = None
+        try:
+            ok = send(chat_id, text, json.loads(reply_markup) if reply_markup else None)
+            if not ok:
+                error = "telegram rejected"
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"[:255]
+        outcomes.append((row_id, attempts, error))
+
+    # --- итог ---
+    finished_at = datetime.utcnow()
+    for row_id, attempts, error in outcomes:
+        if error is None:
+            values = {"status": "sent", "sent_at": finished_at, "last_error": None}
+            result.sent += 1
+        elif attempts >= settings.NOTIFY_MAX_ATTEMPTS:
+            values = {"status": "failed", "last_error": error}
+            result.failed += 1
+            logger.warning("outbox message %s failed after %s attempts: %s", row_id, attempts, error)
+        else:
+            values = {"next_attempt_at": finished_at + retry_delay(attempts), "last_error": error}
+            result.retried += 1
+        db.query(NotificationOutbox).filter(NotificationOutbox.id == row_id).update(
+            values, synchronize_session=False
+        )
+    db.commit()
+    return result
+
+
+async def outbox_loop(session_factory: Callable[[], Session], send: Sender, poll_seconds: float) -> None:
+    """Запускается из lifespan приложения; отменяется при остановке."""
+
+    def _drain_once() -> DrainResult:
+        with session_factory() as db:
+            return drain_outbox(db, send)
+
+    while True:
+        try:
+            result = await run_in_threadpool(_drain_once)
+        except Exception:
+            logger.exception("notification outbox drain failed")
+            result = None
+        # полная пачка — в очереди, скорее всего, есть ещё: сразу следующий проход
+        if result is None or result.claimed < settings.NOTIFY_BATCH_SIZE:
+            await asyncio.sleep(poll_seconds)
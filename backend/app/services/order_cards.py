@@ -0,0 +1,43 @@
+# app/services/order_cards.py
+#
+# Карточка заказа для ленты исполнителя (AvailableOrderDto). Одна и та же
+# в страницах ленты, поиске, кэше города и событиях живой ленты.
+
+from typing import Optional, Tuple
+
+from app.models.order import Order
+from app.schemas.order import AvailableOrderDto
+from app.services.geo import haversine_km
+from app.utils import str_to_list
+
+
+def order_to_available(
+    order: Order,
+    near: Optional[Tuple[float, float, float]] = None,
+) -> AvailableOrderDto:
+    distance_km: Optional[float] = None
+    if near is not None:
+        distance = haversine_km(near[0], near[1], order.lat, order.lon)
+        distance_km = round(distance, 1) if distance is not None else None
+
+    photos = order.photo_items
+    return AvailableOrderDto(
+        id=order.id,
+        title=order.title,
+        city=order.city,
+        address=order.address or "",
+        categories=str_to_list(order.categories_raw),
+        description=order.description,
+        budget_type=order.budget_type,  # type: ignore[arg-type]
+        budget_amount=order.budget_amount,
+        date_from=order.start_date,
+        date_to=order.end_date,
+        has_photos=order.has_photos,
+        photos=[p.url for p in photos],
+        photo_thumbs=[p.thumb_url or p.url for p in photos],
+        photo_medium=[p.medium_url or p.url for p in photos],
+        created_at=order.created_at,
+        lat=order.lat,
+        lon=order.lon,
+        distance_km=distance_km,
+    )
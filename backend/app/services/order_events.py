@@ -0,0 +1,239 @@
+# app/services/order_events.py
+#
+# Живая лента заказов: брокер событий внутри процесса.
+# Эндпоинты после коммита публикуют компактное событие (created / updated /
+# closed), брокер раздаёт его подписчикам нужного города, у которых
+# специализации пересекаются с категориями заказа.
+#
+# Подписчик — это очередь asyncio и ссылка на её event loop, без потоков и
+# без соединения с БД, поэтому тысячи простаивающих подписок стоят копейки.
+# Кадр SSE собирается один раз на событие и общий для всех получателей.
+# Публиковать можно из любого потока: доставка идёт через
+# call_soon_threadsafe одним вызовом на loop.
+#
+# Как и feed_cache, брокер видит только свой процесс: при нескольких
+# воркерах клиент должен переподключаться и дочитывать ленту через
+# /orders/available (событие resync).
+
+import asyncio
+import itertools
+import json
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from app.services.order_cards import order_to_available
+from app.utils import str_to_list
+
+ORDER_EVENTS_QUEUE_SIZE = int(os.getenv("ORDER_EVENTS_QUEUE_SIZE", "100"))
+ORDER_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("ORDER_EVENTS_HEARTBEAT_SECONDS", "15"))
+
+EVENT_CREATED = "created"
+EVENT_UPDATED = "updated"
+EVENT_CLOSED = "closed"
+EVENT_RESYNC = "resync"
+
+_event_ids = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class OrderEvent:
+    type: str
+    order_id: int
+    city: str
+    customer_id: int
+    categories: FrozenSet[str] = frozenset()
+    # категории до правки — чтобы убрать карточку у тех, кому она больше не подходит
+    previous_categories: Optional[FrozenSet[str]] = None
+    # JSON карточки ленты для created / updated
+    card_json: Optional[str] = None
+    id: int = field(default_factory=lambda: next(_event_ids))
+
+    def frame(self) -> bytes:
+        data = f'{{"type":"{self.type}","order_id":{self.order_id}'
+        if self.card_json is not None:
+            data += f',"order":{self.card_json}'
+        data += "}"
+        return f"id: {self.id}\nevent: {self.type}\ndata: {data}\n\n".encode("utf-8")
+
+    def as_closed(self) -> "OrderEvent":
+        return replace(self, type=EVENT_CLOSED, card_json=None, previous_categories=None)
+
+
+RESYNC_FRAME = f"event: {EVENT_RESYNC}\ndata: {json.dumps({'type': EVENT_RESYNC})}\n\n".encode("utf-8")
+HEARTBEAT_FRAME = b": ping\n\n"
+
+
+class Subscription:
+    def __init__(
+        self,
+        user_id: int,
+        city: str,
+        categories: Iterable[str],
+        loop: asyncio.AbstractEventLoop,
+        queue_size: int,
+    ):
+        self.user_id = user_id
+        self.city = city
+        self.categories: FrozenSet[str] = frozenset(categories)
+        self.loop = loop
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=queue_size)
+
+    def wants(self, event: OrderEvent) -> Optional[OrderEvent]:
+        """
+        Что из события должен получить подписчик (или None).
+        Без специализаций подписчик видит все заказы города — как в ленте.
+        """
+        if event.customer_id == self.user_id:
+            return None
+        if event.type == EVENT_CLOSED:
+            return event
+        if self._matches(event.categories):
+            return event
+        if (
+            event.type == EVENT_UPDATED
+            and event.previous_categories is not None
+            and self._matches(event.previous_categories)
+        ):
+            return event.as_closed()
+        return None
+
+    def _matches(self, categories: FrozenSet[str]) -> bool:
+        return not self.categories or bool(self.categories & categories)
+
+    def deliver(self, frame: bytes) -> None:
+        # вызывается в loop подписчика
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # медленный клиент: выкидываем накопленное, пусть перечитает ленту
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_FRAME)
+
+    async def next_frame(self, timeout: float) -> bytes:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return HEARTBEAT_FRAME
+
+
+class OrderEventBroker:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._by_city: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int, city: str, categories: Iterable[str]) -> Subscription:
+        """Вызывать из корутины: подписка привязывается к текущему loop."""
+        sub = Subscription(
+            user_id, city, categories, asyncio.get_running_loop(), self.queue_size
+        )
+        with self._lock:
+            self._by_city[city].add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._by_city.get(sub.city)
+            if subs is None:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._by_city[sub.city]
+
+    def subscribers(self, city: Optional[str] = None) -> int:
+        with self._lock:
+            if city is not None:
+                return len(self._by_city.get(city, ()))
+            return sum(len(s) for s in self._by_city.values())
+
+    def publish(self, event: OrderEvent) -> None:
+        with self._lock:
+            subs = list(self._by_city.get(event.city, ()))
+        if not subs:
+            return
+
+        frames: Dict[str, bytes] = {}
+        batches: Dict[asyncio.AbstractEventLoop, List] = defaultdict(list)
+        for sub in subs:
+            delivered = sub.wants(event)
+            if delivered is None:
+                continue
+            # у всех получателей один из двух вариантов кадра
+            frame = frames.get(delivered.type)
+            if frame is None:
+                frame = frames[delivered.type] = delivered.frame()
+            batches[sub.loop].append((sub, frame))
+
+        for loop, items in batches.items():
+            try:
+                loop.call_soon_threadsafe(_deliver_all, items)
+            except RuntimeError:
+                # loop уже закрыт — подписки отпадут сами при отключении
+                pass
+
+    def publish_order(
+        self,
+        order,
+        card_json: Optional[str] = None,
+        created: bool = False,
+        old_city: Optional[str] = None,
+        old_categories: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Публикует изменение заказа после коммита.
+        Активный заказ — created/updated в его город, иначе — closed.
+        Если заказ сменил город, старому городу уходит closed.
+        """
+        categories = frozenset(str_to_list(order.categories_raw))
+        base = dict(order_id=order.id, customer_id=order.customer_id, categories=categories)
+
+        if old_city and old_city != order.city:
+            self.publish(OrderEvent(type=EVENT_CLOSED, city=old_city, **base))
+
+        if order.status != "active":
+            self.publish(OrderEvent(type=EVENT_CLOSED, city=order.city, **base))
+            return
+
+        self.publish(
+            OrderEvent(
+                type=EVENT_CREATED if created else EVENT_UPDATED,
+                city=order.city,
+                card_json=card_json,
+                previous_categories=(
+                    frozenset(old_categories) if old_categories is not None else None
+                ),
+                **base,
+            )
+        )
+
+
+def _deliver_all(items) -> None:
+    for sub, frame in items:
+        sub.deliver(frame)
+
+
+order_events = OrderEventBroker(queue_size=ORDER_EVENTS_QUEUE_SIZE)
+
+
+def publish_order_change(
+    order,
+    created: bool = False,
+    old_city: Optional[str] = None,
+    old_categories: Optional[Iterable[str]] = None,
+) -> None:
+    """
+    Вызывается эндпоинтами после коммита заказа: карточку для ленты
+    собирает сам и отдаёт событие брокеру.
+    """
+    card_json = order_to_available(order).json() if order.status == "active" else None
+    order_events.publish_order(
+        order,
+        card_json=card_json,
+        created=created,
+        old_city=old_city,
+        old_categories=old_categories,
+    )
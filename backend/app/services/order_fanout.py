@@ -0,0 +1,46 @@
+# app/services/order_fanout.py
+#
+# Рассылка о новом заказе исполнителям, у которых совпадают город и одна из
+# специализаций. Получатели — из обратного индекса executor_subscriptions
+# (город, категория) → исполнители, без скана users. Строки outbox
+# создаются одним INSERT ... SELECT в транзакции создания заказа: тысяча
+# получателей — это один запрос, а не тысяча, и отправку пачками в
+# пределах лимитов Telegram делает воркер outbox.
+
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.models.executor_subscription import ExecutorSubscription
+from app.models.order import Order
+from app.services.notification_outbox import enqueue_broadcast
+from app.utils import str_to_list
+from bot.notifications import new_order_message
+
+
+def matching_executors_query(
+    db: Session, city: str, categories: Iterable[str], exclude_user_id: Optional[int] = None
+) -> Query:
+    """telegram_id исполнителей из города city хотя бы с одной из категорий."""
+    q = db.query(ExecutorSubscription.telegram_id).filter(
+        ExecutorSubscription.city == city,
+        ExecutorSubscription.category.in_(list(categories)),
+    )
+    if exclude_user_id is not None:
+        q = q.filter(ExecutorSubscription.user_id != exclude_user_id)
+    return q.distinct()
+
+
+def enqueue_new_order_fanout(db: Session, order: Order) -> int:
+    """Ставит в outbox уведомления о заказе; commit — за вызывающим. Возвращает число получателей."""
+    if not settings.NOTIFY_NEW_ORDERS:
+        return 0
+    categories = list(dict.fromkeys(str_to_list(order.categories_raw)))
+    if not order.city or not categories:
+        return 0
+    message = new_order_message(order)
+    if message is None:
+        return 0
+    recipients = matching_executors_query(db, order.city, categories, exclude_user_id=order.customer_id)
+    return enqueue_broadcast(db, "new_order", message, recipients)
@@ -0,0 +1,57 @@
+# app/services/order_photos.py
+#
+# Где лежат фото заказов и как они превращаются в строки order_photos.
+
+import os
+from pathlib import Path
+from typing import Optional
+
+from app.services.image_variants import variant_filename
+
+ORDER_PHOTO_DIR = Path(
+    os.getenv("ORDER_PHOTO_DIR", "/opt/workscout/current/backend/media/orders")
+)
+PUBLIC_MEDIA_BASE = os.getenv("PUBLIC_MEDIA_BASE", "https://workscout.ru/media")
+
+# фото у заказа не больше стольких
+MAX_ORDER_PHOTOS = 3
+
+
+def order_photo_url(filename: str) -> str:
+    return f"{PUBLIC_MEDIA_BASE}/orders/{filename}"
+
+
+def order_photo_filename(url: str) -> Optional[str]:
+    """Имя файла в ORDER_PHOTO_DIR; None — ссылка не на наше хранилище."""
+    prefix = order_photo_url("")
+    if not url.startswith(prefix):
+        return None
+    return url[len(prefix):]
+
+
+def legacy_photo_row(order_id: int, position: int, url: str) -> dict:
+    """
+    Строка order_photos для фото из старой колонки orders.photos: варианты
+    и размер берём с диска (один раз при миграции, а не на каждый запрос).
+    """
+    row = {
+        "order_id": order_id,
+        "position": position,
+        "url": url,
+        "thumb_url": None,
+        "medium_url": None,
+        "size_bytes": None,
+        "sha256": None,
+    }
+    filename = order_photo_filename(url)
+    if filename is None:
+        return row
+    try:
+        row["size_bytes"] = (ORDER_PHOTO_DIR / filename).stat().st_size
+    except OSError:
+        pass
+    for variant in ("thumb", "medium"):
+        name = variant_filename(filename, variant)
+        if (ORDER_PHOTO_DIR / name).exists():
+            row[f"{variant}_url"] = order_photo_url(name)
+    return row
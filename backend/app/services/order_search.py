@@ -0,0 +1,151 @@
+# app/services/order_search.py
+#
+# Полнотекстовый поиск по заказам (title + description).
+#
+# SQLite: виртуальная таблица FTS5 orders_fts (rowid = orders.id), ранжирование bm25.
+# Postgres: GIN-индекс по выражению to_tsvector(...), ранжирование ts_rank_cd.
+#
+# Индекс FTS5 синхронизируется mapper-событиями Order в той же транзакции,
+# что и сам заказ: создание, правка текста, отмена (cancelled убирается из индекса).
+
+import re
+from typing import List
+
+from sqlalchemy import DDL, Float, Integer, event, func, inspect, literal_column, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query as OrmQuery, Session
+
+from app.models.order import Order
+
+FTS_TABLE = "orders_fts"
+PG_TS_CONFIG = "russian"
+
+# title весомее description
+BM25_WEIGHTS = (2.0, 1.0)
+
+_SQLITE_CREATE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(title, description, tokenize='unicode61 remove_diacritics 2')"
+)
+_PG_DOCUMENT = (
+    f"to_tsvector('{PG_TS_CONFIG}', coalesce(title, '') || ' ' || coalesce(description, ''))"
+)
+_PG_CREATE = f"CREATE INDEX IF NOT EXISTS ix_orders_search ON orders USING GIN ({_PG_DOCUMENT})"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MAX_QUERY_TOKENS = 8
+
+
+# ===== DDL: новая БД получает индекс вместе с таблицей orders =====
+
+event.listen(Order.__table__, "after_create", DDL(_SQLITE_CREATE).execute_if(dialect="sqlite"))
+event.listen(Order.__table__, "after_create", DDL(_PG_CREATE).execute_if(dialect="postgresql"))
+event.listen(
+    Order.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """
+    Для уже существующей БД: создать индекс и заполнить его, если он пуст.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(_PG_CREATE))
+            return
+        if conn.dialect.name != "sqlite":
+            return
+
+        conn.execute(text(_SQLITE_CREATE))
+        has_rows = conn.execute(text(f"SELECT 1 FROM {FTS_TABLE} LIMIT 1")).first()
+        if not has_rows:
+            conn.execute(
+                text(
+                    f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+                    "SELECT id, title, description FROM orders WHERE status != 'cancelled'"
+                )
+            )
+
+
+# ===== синхронизация FTS5 =====
+
+def _is_sqlite(connection) -> bool:
+    return connection.dialect.name == "sqlite"
+
+
+def _fts_replace(connection, order: Order) -> None:
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": order.id})
+    connection.execute(
+        text(f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (:id, :title, :description)"),
+        {"id": order.id, "title": order.title, "description": order.description},
+    )
+
+
+@event.listens_for(Order, "after_insert")
+def _index_new_order(mapper, connection, target: Order):
+    if _is_sqlite(connection) and target.status != "cancelled":
+        _fts_replace(connection, target)
+
+
+@event.listens_for(Order, "after_update")
+def _reindex_order(mapper, connection, target: Order):
+    if not _is_sqlite(connection):
+        return
+
+    state = inspect(target)
+    if target.status == "cancelled":
+        if state.attrs.status.history.has_changes():
+            connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": target.id})
+        return
+
+    if (
+        state.attrs.title.history.has_changes()
+        or state.attrs.description.history.has_changes()
+        or state.attrs.status.history.has_changes()
+    ):
+        _fts_replace(connection, target)
+
+
+# ===== поиск =====
+
+def query_tokens(raw: str) -> List[str]:
+    return _TOKEN_RE.findall(raw or "")[:MAX_QUERY_TOKENS]
+
+
+def search_orders(db: Session, tokens: List[str]) -> OrmQuery:
+    """
+    Запрос Order, отфильтрованный и отсортированный по релевантности.
+    Фильтры по статусу/владельцу навешивает вызывающий.
+    """
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        tsquery = func.plainto_tsquery(PG_TS_CONFIG, " ".join(tokens))
+        document = literal_column(_PG_DOCUMENT)
+        return (
+            db.query(Order)
+            .filter(document.op("@@")(tsquery))
+            .order_by(func.ts_rank_cd(document, tsquery).desc(), Order.id.desc())
+        )
+
+    # каждое слово — префиксный терм в кавычках: и грубая морфология
+    # ("плитк" найдёт "плитку"), и защита от синтаксиса FTS5 во вводе
+    match = " ".join('"' + t.replace('"', "") + '"*' for t in tokens)
+    w_title, w_description = BM25_WEIGHTS
+    hits = (
+        text(
+            f"SELECT rowid AS order_id, bm25({FTS_TABLE}, {w_title}, {w_description}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        )
+        .bindparams(match=match)
+        .columns(order_id=Integer, rank=Float)
+        .subquery("fts_hits")
+    )
+    # bm25 в FTS5: чем меньше, тем релевантнее
+    return (
+        db.query(Order)
+        .join(hits, hits.c.order_id == Order.id)
+        .order_by(hits.c.rank.asc(), Order.id.desc())
+    )
@@ -0,0 +1,111 @@
+# app/services/session_tokens.py
+#
+# Короткоживущий токен сессии вместо initData на каждом запросе.
+# POST /auth/session один раз проверяет initData и выдаёт токен
+# "<payload>.<подпись>", где payload — base64url от "user_id:role:exp".
+# Проверка токена — один HMAC, без разбора initData и без БД.
+#
+# Отзыв при блокировке — denylist по user_id в памяти процесса. Запись
+# держится TTL токена: все токены, выданные до блокировки, к этому
+# времени истекут сами, а новый заблокированный пользователь не получит.
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+TOKEN_VERSION = "v1"
+
+
+@dataclass(frozen=True)
+class SessionClaims:
+    user_id: int
+    role: str
+    expires_at: int
+
+
+def _secret() -> bytes:
+    if settings.SESSION_TOKEN_SECRET:
+        return settings.SESSION_TOKEN_SECRET.encode("utf-8")
+    # отдельного секрета нет — выводим его из токена бота, как и ключ initData
+    bot_token = os.getenv("TELEGRAM_BOT_TOKEN", "")
+    if not bot_token:
+        raise ValueError("session secret is not configured")
+    return hmac.new(b"WorkScoutSession", bot_token.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _unb64(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _sign(payload: str) -> str:
+    message = f"{TOKEN_VERSION}.{payload}".encode("ascii")
+    return _b64(hmac.new(_secret(), message, hashlib.sha256).digest())
+
+
+def issue_session_token(user_id: int, role: str, now: Optional[float] = None) -> Tuple[str, int]:
+    """Возвращает (токен, unix-время истечения)."""
+    expires_at = int(now if now is not None else time.time()) + settings.SESSION_TOKEN_TTL_SECONDS
+    payload = _b64(f"{user_id}:{role}:{expires_at}".encode("ascii"))
+    return f"{payload}.{_sign(payload)}", expires_at
+
+
+def verify_session_token(token: str) -> SessionClaims:
+    """Бросает ValueError на битый, чужой или просроченный токен."""
+    payload, sep, signature = token.partition(".")
+    if not sep or not payload or not signature:
+        raise ValueError("malformed token")
+    if not hmac.compare_digest(_sign(payload), signature):
+        raise ValueError("bad signature")
+
+    try:
+        user_id, role, expires_at = _unb64(payload).decode("ascii").split(":")
+        claims = SessionClaims(user_id=int(user_id), role=role, expires_at=int(expires_at))
+    except Exception:
+        raise ValueError("malformed token")
+
+    if claims.expires_at <= time.time():
+        raise ValueError("token expired")
+    return claims
+
+
+class SessionDenylist:
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._revoked_until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke_user(self, user_id: int) -> None:
+        with self._lock:
+            self._revoked_until[user_id] = time.time() + self.ttl_seconds
+            self._purge()
+
+    def restore_user(self, user_id: int) -> None:
+        with self._lock:
+            self._revoked_until.pop(user_id, None)
+
+    def is_revoked(self, user_id: int) -> bool:
+        until = self._revoked_until.get(user_id)
+        return until is not None and until > time.time()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked_until.clear()
+
+    def _purge(self) -> None:
+        now = time.time()
+        for user_id in [u for u, until in self._revoked_until.items() if until <= now]:
+            del self._revoked_until[user_id]
+
+
+session_denylist = SessionDenylist(ttl_seconds=settings.SESSION_TOKEN_TTL_SECONDS)
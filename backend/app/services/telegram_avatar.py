@@ -1,29 +1,75 @@
+import hashlib
 import os
 import time
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterable, Optional, Tuple
 
 import httpx
 
+from app.services.image_variants import VARIANTS, make_variants, variant_filename
+
 MAX_AVATAR_BYTES = 5 * 1024 * 1024  # 5MB
 
 AVATAR_DIR = Path(os.getenv("AVATAR_DIR", "/opt/workscout/current/backend/media/avatars"))
 PUBLIC_MEDIA_BASE = os.getenv("PUBLIC_MEDIA_BASE", "https://workscout.ru/media")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
 
 
-def _save_avatar_bytes(user_id: int, content: bytes, ext: str = "jpg") -> str:
-    AVATAR_DIR.mkdir(parents=True, exist_ok=True)
-    filename = f"u{user_id}_{int(time.time())}.{ext}"
-    path = AVATAR_DIR / filename
-    path.write_bytes(content)
+@dataclass(frozen=True)
+class AvatarSyncResult:
+    file_unique_id: str
+    # None — фото в Telegram то же, что уже сохранено: файл не качали
+    url: Optional[str]
+    # WebP-превью; None — сделать не вышло, в профиле будет оригинал
+    thumb_url: Optional[str] = None
+
+
+def avatar_url(filename: str) -> str:
     return f"{PUBLIC_MEDIA_BASE}/avatars/{filename}"
 
 
-def _download_url_bytes(url: str) -> bytes:
+def _save_avatar_bytes(content: bytes, ext: str = "jpg") -> Tuple[str, Optional[str]]:
+    """
+    Имя файла — хэш содержимого: одинаковые байты пишутся один раз, а URL
+    меняется только вместе с картинкой (можно кэшировать навсегда).
+    Возвращает (url, url превью или None).
+    """
+    AVATAR_DIR.mkdir(parents=True, exist_ok=True)
+    filename = f"{hashlib.sha256(content).hexdigest()[:32]}.{ext}"
+    path = AVATAR_DIR / filename
+    if not path.exists():
+        # через временный файл: параллельный читатель не увидит недописанный
+        tmp = path.with_name(f".{filename}.{os.getpid()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+    else:
+        # файл уже есть (тот же аватар у другого пользователя или старый):
+        # обновляем mtime, чтобы сборщик мусора не удалил его до записи URL
+        os.utime(path)
+    thumb = variant_filename(filename, "thumb")
+    if not (AVATAR_DIR / thumb).exists():
+        try:
+            make_variants(content, AVATAR_DIR, filename)
+        except Exception:
+            # без превью отдадим оригинал — аватар из-за этого не теряем
+            return avatar_url(filename), None
+    return avatar_url(filename), avatar_url(thumb)
+
+
+def _remaining(deadline: float) -> float:
+    """Сколько секунд осталось от бюджета на синхронизацию аватара."""
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise TimeoutError("avatar sync time budget exceeded")
+    return left
+
+
+def _download_url_bytes(url: str, deadline: float) -> bytes:
     with httpx.Client(timeout=15, follow_redirects=True) as client:
-        r = client.get(url)
+        r = client.get(url, timeout=min(15, _remaining(deadline)))
         r.raise_for_status()
         content = r.content
         if len(content) > MAX_AVATAR_BYTES:
@@ -31,14 +77,21 @@ def _download_url_bytes(url: str) -> bytes:
         return content
 
 
-def _download_avatar_via_bot(telegram_user_id: int) -> Optional[bytes]:
+def _download_avatar_via_bot(
+    telegram_user_id: int, deadline: float, known_file_unique_id: Optional[str] = None
+) -> Optional[tuple]:
+    """(file_unique_id, байты или None, если фото не менялось) либо None — фото нет."""
     if not TELEGRAM_BOT_TOKEN:
         return None
 
-    base = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
+    base = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}"
 
     with httpx.Client(timeout=15) as client:
-        r = client.get(f"{base}/getUserProfilePhotos", params={"user_id": telegram_user_id, "limit": 1})
+        r = client.get(
+            f"{base}/getUserProfilePhotos",
+            params={"user_id": telegram_user_id, "limit": 1},
+            timeout=min(15, _remaining(deadline)),
+        )
         r.raise_for_status()
         data = r.json()
         if not data.get("ok"):
@@ -48,41 +101,92 @@ def _download_avatar_via_bot(telegram_user_id: int) -> Optional[bytes]:
         if not photos or not photos[0]:
             return None
 
-        file_id = photos[0][-1]["file_id"]  # самое большое фото
+        largest = photos[0][-1]  # самое большое фото
+        file_unique_id = largest["file_unique_id"]
+        if file_unique_id == known_file_unique_id:
+            return file_unique_id, None
 
-        r2 = client.get(f"{base}/getFile", params={"file_id": file_id})
+        r2 = client.get(
+            f"{base}/getFile",
+            params={"file_id": largest["file_id"]},
+            timeout=min(15, _remaining(deadline)),
+        )
         r2.raise_for_status()
         data2 = r2.json()
         if not data2.get("ok"):
             return None
 
         file_path = data2["result"]["file_path"]
-        file_url = f"https://api.telegram.org/file/bot{TELEGRAM_BOT_TOKEN}/{file_path}"
+        file_url = f"{TELEGRAM_API_BASE}/file/bot{TELEGRAM_BOT_TOKEN}/{file_path}"
 
     # качаем файл отдельным запросом (можно тем же client, но так проще)
-    return _download_url_bytes(file_url)
+    return file_unique_id, _download_url_bytes(file_url, deadline)
 
 
-def sync_user_avatar_if_needed(user) -> bool:
-    """
-    Возвращает True если аватар обновили и user изменился.
-    Обновляем не чаще чем раз в 24 часа.
-    """
+def avatar_sync_due(user) -> bool:
+    """Пора ли обновить аватар: не чаще чем раз в 24 часа."""
     if not getattr(user, "telegram_id", None):
         return False
 
     updated_at = getattr(user, "avatar_updated_at", None)
     if updated_at and updated_at > datetime.utcnow() - timedelta(hours=24):
         return False
+    return True
 
+
+def download_user_avatar(
+    telegram_user_id: int,
+    budget_seconds: float = 45,
+    known_file_unique_id: Optional[str] = None,
+) -> Optional[AvatarSyncResult]:
+    """
+    Качает аватар через бота и сохраняет файл. None — фото нет или не вышло.
+    Только сеть и диск, без ORM — можно звать вне сессии БД.
+    budget_seconds — на все три запроса к Telegram вместе; если
+    file_unique_id совпал с known_file_unique_id, обходимся одним.
+    """
+    deadline = time.monotonic() + budget_seconds
     try:
-        content = _download_avatar_via_bot(int(user.telegram_id))
+        found = _download_avatar_via_bot(telegram_user_id, deadline, known_file_unique_id)
+        if not found:
+            return None
+        file_unique_id, content = found
         if not content:
-            return False
-        avatar_url = _save_avatar_bytes(int(user.id), content, ext="jpg")
-        user.avatar_url = avatar_url
-        user.avatar_updated_at = datetime.utcnow()
-        return True
+            return AvatarSyncResult(file_unique_id=file_unique_id, url=None)
+        url, thumb_url = _save_avatar_bytes(content, ext="jpg")
+        return AvatarSyncResult(file_unique_id=file_unique_id, url=url, thumb_url=thumb_url)
     except Exception:
         # не ломаем профиль из-за аватара
-        return False
+        return None
+
+
+def collect_avatar_garbage(referenced_urls: Iterable[str], grace_seconds: float) -> int:
+    """
+    Удаляет из AVATAR_DIR файлы, на которые не ссылается ни один avatar_url
+    (заменённые аватары с их WebP-копиями, старые u{id}_{ts}.jpg). Свежие файлы не трогаем:
+    воркер мог записать файл и ещё не успеть сохранить URL в базу.
+    Возвращает количество удалённых файлов.
+    """
+    if not AVATAR_DIR.is_dir():
+        return 0
+
+    prefix = avatar_url("")
+    keep = set()
+    for url in referenced_urls:
+        if url and url.startswith(prefix):
+            filename = url[len(prefix):]
+            keep.add(filename)
+            keep.update(variant_filename(filename, variant) for variant, _ in VARIANTS)
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    for path in AVATAR_DIR.iterdir():
+        if path.name in keep or not path.is_file():
+            continue
+        try:
+            if path.stat().st_mtime > cutoff:
+                continue
+            path.unlink()
+            removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
@@ -0,0 +1,280 @@
+# app/services/uploads.py
+#
+# Приём загружаемых файлов без блокировки event loop.
+#
+# stage_multipart_files разбирает multipart/form-data прямо из потока
+# запроса парсером python-multipart: данные каждой части сразу пишутся во
+# временный файл в целевой папке, по ходу считаются размер и sha256 —
+# промежуточной копии (SpooledTemporaryFile Starlette) нет. Часть сверх
+# лимита обрывает разбор на первом же куске, недопустимый Content-Type —
+# ещё до её данных. Запись, хэш и закрытие файлов — в threadpool.
+#
+# Лимит на всё тело проверяется до разбора: запрос с большим Content-Length
+# отклоняется, не прочитав ни байта, а без заголовка (chunked) или при
+# заниженном заголовке чтение обрывается на первом куске сверх лимита.
+#
+# Готовый файл публикуется атомарным os.replace: по публичному URL никогда
+# не виден недописанный файл.
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Collection, List, Optional, Tuple
+
+import multipart
+from fastapi import Request
+from multipart.multipart import parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+# заголовки частей и границы multipart сверх самих файлов
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Всё тело запроса больше лимита."""
+
+
+class FileTooLarge(Exception):
+    """Одна из частей больше лимита на файл."""
+
+
+class UnsupportedFileType(Exception):
+    pass
+
+
+class MalformedUpload(Exception):
+    pass
+
+
+@dataclass
+class StagedUpload:
+    path: Path
+    size: int
+    sha256: str
+    content_type: str = ""
+
+
+async def stage_multipart_files(
+    request: Request,
+    directory: Path,
+    *,
+    field_name: str,
+    allowed_types: Collection[str],
+    max_file_bytes: int,
+    max_body_bytes: int,
+    max_files: int,
+    keep: Optional[int] = None,
+) -> List[StagedUpload]:
+    """
+    Принимает файлы поля field_name во временные файлы в directory.
+    Сохраняются первые keep файлов (по умолчанию все), остальные части
+    пропускаются без записи на диск.
+
+    Больше max_body_bytes тела — UploadTooLarge, файл больше max_file_bytes —
+    FileTooLarge, тип не из allowed_types — UnsupportedFileType, битая форма
+    или больше max_files файлов — MalformedUpload. При любой ошибке уже
+    записанные временные файлы удаляются; при успехе их публикует или
+    удаляет вызывающий (publish_upload / discard_upload).
+    """
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_body_bytes:
+        raise UploadTooLarge()
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data":
+        raise MalformedUpload("expected multipart/form-data")
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise MalformedUpload("missing boundary")
+
+    form = _StagingForm(
+        field_name=field_name,
+        allowed_types=allowed_types,
+        max_file_bytes=max_file_bytes,
+        max_files=max_files,
+        keep=max_files if keep is None else keep,
+    )
+    parser = multipart.MultipartParser(boundary, form.callbacks())
+    try:
+        async for chunk in _limited_stream(request, max_body_bytes):
+            try:
+                parser.write(chunk)
+            except (FileTooLarge, UnsupportedFileType, MalformedUpload):
+                raise
+            except Exception as exc:
+                raise MalformedUpload(str(exc))
+            await form.flush(directory)
+        parser.finalize()
+        if not form.finished:
+            raise MalformedUpload("unexpected end of form")
+    except BaseException:
+        await run_in_threadpool(form.abort)
+        raise
+    return form.staged
+
+
+async def publish_upload(staged: StagedUpload, target: Path) -> None:
+    await run_in_threadpool(os.replace, staged.path, target)
+    staged.path = target
+
+
+async def discard_upload(staged: StagedUpload) -> None:
+    """Удаляет временный файл; опубликованный не трогает."""
+    if staged.path.name.startswith(".upload-"):
+        await run_in_threadpool(staged.path.unlink, missing_ok=True)
+
+
+@dataclass
+class _Part:
+    headers: List[Tuple[bytes, bytes]] = field(default_factory=list)
+    # None — часть не сохраняем (текстовое поле, чужое поле, файл сверх keep)
+    staged: Optional[StagedUpload] = None
+    out: Optional[BinaryIO] = None
+    digest: Optional["hashlib._Hash"] = None
+    pending: List[bytes] = field(default_factory=list)
+    done: bool = False
+
+
+class _StagingForm:
+    """
+    Колбэки python-multipart. Они синхронные и вызываются из parser.write
+    внутри event loop, поэтому сами только считают и проверяют, а данные
+    копят в pending; на диск их пишет flush — в threadpool, после каждого
+    куска тела.
+    """
+
+    def __init__(
+        self,
+        *,
+        field_name: str,
+        allowed_types: Collection[str],
+        max_file_bytes: int,
+        max_files: int,
+        keep: int,
+    ):
+        self.field_name = field_name
+        self.allowed_types = allowed_types
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.keep = keep
+        self.staged: List[StagedUpload] = []
+        self.finished = False
+        self._parts: List[_Part] = []
+        self._part = _Part()
+        self._files = 0
+        self._fields = 0
+        self._header_name = b""
+        self._header_value = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_end": self.on_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._part = _Part()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._part.headers.append((self._header_name.lower(), self._header_value))
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        headers = dict(self._part.headers)
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise MalformedUpload('Content-Disposition without "name"')
+        if b"filename" not in options:
+            # текстовые поля не нужны, но их число ограничено как у Starlette
+            self._fields += 1
+            if self._fields > self.max_files:
+                raise MalformedUpload("too many fields")
+            return
+        self._files += 1
+        if self._files > self.max_files:
+            raise MalformedUpload("too many files")
+        name = options[b"name"].decode("utf-8", errors="replace")
+        if name != self.field_name or len(self.staged) >= self.keep:
+            return
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        if content_type not in self.allowed_types:
+            raise UnsupportedFileType(content_type)
+        self._part.staged = StagedUpload(path=Path(), size=0, sha256="", content_type=content_type)
+        self.staged.append(self._part.staged)
+        self._parts.append(self._part)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        staged = self._part.staged
+        if staged is None:
+            return
+        staged.size += end - start
+        # обрываем разбор на первом куске сверх лимита — до записи на диск
+        if staged.size > self.max_file_bytes:
+            raise FileTooLarge()
+        self._part.pending.append(data[start:end])
+
+    def on_part_end(self) -> None:
+        self._part.done = True
+
+    def on_end(self) -> None:
+        self.finished = True
+
+    async def flush(self, directory: Path) -> None:
+        for part in self._parts:
+            if part.out is None and (part.pending or part.done):
+                fd, tmp_name = await run_in_threadpool(_make_temp, directory)
+                part.staged.path = Path(tmp_name)
+                part.out = os.fdopen(fd, "wb")
+                part.digest = hashlib.sha256()
+            if part.pending:
+                chunk = b"".join(part.pending)
+                part.pending.clear()
+                await run_in_threadpool(_write_chunk, part.out, part.digest, chunk)
+            if part.done and not part.out.closed:
+                await run_in_threadpool(part.out.close)
+                part.staged.sha256 = part.digest.hexdigest()
+        # закрытые части больше не трогаем
+        self._parts = [p for p in self._parts if p.out is None or not p.out.closed]
+
+    def abort(self) -> None:
+        for part in self._parts:
+            if part.out is not None:
+                part.out.close()
+        for staged in self.staged:
+            if staged.path.name.startswith(".upload-"):
+                staged.path.unlink(missing_ok=True)
+
+
+async def _limited_stream(request: Request, max_bytes: int) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise UploadTooLarge()
+        yield chunk
+
+
+def _make_temp(directory: Path):
+    directory.mkdir(parents=True, exist_ok=True)
+    # в той же папке, что и итоговый файл: os.replace атомарен только в пределах ФС
+    return tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".tmp")
+
+
+def _write_chunk(out: BinaryIO, digest, chunk: bytes) -> None:
+    # hashlib отпускает GIL на больших кусках — хэш считается параллельно с loop
+    digest.update(chunk)
+    out.write(chunk)
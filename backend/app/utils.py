@@ -1,5 +1,7 @@
 # app/utils.py
-from typing import List, Optional
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
 
 def str_to_list(value: Optional[str]) -> List[str]:
     if not value:
@@ -11,3 +13,43 @@ def list_to_str(values: Optional[List[str]]) -> Optional[str]:
         return None
     cleaned = [v.strip() for v in values if v and v.strip()]
     return ",".join(cleaned) if cleaned else None
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Непрозрачный курсор для keyset-пагинации по (created_at, id).
+    """
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Обратная операция к encode_cursor. На мусор кидает ValueError.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_raw, id_raw = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_raw), int(id_raw)
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def encode_rank_cursor(as_of: datetime, score: float, row_id: int, served: int) -> str:
+    """
+    Курсор ранжированной ленты: момент, на который считались скоры
+    (чтобы страницы не "плыли" со временем), последний скор/id и сколько уже отдано.
+    """
+    raw = f"{as_of.isoformat()}|{score!r}|{row_id}|{served}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[datetime, float, int, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        as_of_raw, score_raw, id_raw, served_raw = raw.split("|")
+        return datetime.fromisoformat(as_of_raw), float(score_raw), int(id_raw), int(served_raw)
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
@@ -1,20 +1,67 @@
 # bot/client.py
 
+import logging
+import threading
+import time
+from dataclasses import dataclass
 from typing import Optional
 from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from .config import TELEGRAM_BOT_TOKEN, TELEGRAM_BOT_USERNAME, WEBAPP_BASE_URL
+from .config import (
+    TELEGRAM_API_BASE,
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_BOT_USERNAME,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_MAX_RETRY_AFTER,
+    TELEGRAM_PER_CHAT_RATE,
+    TELEGRAM_POOL_SIZE,
+    WEBAPP_BASE_URL,
+)
+from .rate_limit import KeyedRateLimiter, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BotSendStats:
+    sent: int = 0
+    # ответы 429 Too Many Requests
+    throttled: int = 0
+    failed: int = 0
 
 
 class TelegramBotClient:
-    def __init__(self, token: str):
+    def __init__(
+        self,
+        token: str,
+        api_base: str = TELEGRAM_API_BASE,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        per_chat_rate: float = TELEGRAM_PER_CHAT_RATE,
+        max_retry_after: float = TELEGRAM_MAX_RETRY_AFTER,
+    ):
         if not token:
             raise ValueError("TELEGRAM_BOT_TOKEN is not set")
-        self.base_url = f"https://api.telegram.org/bot{token}"
+        self.base_url = f"{api_base}/bot{token}"
+        self.max_retry_after = max_retry_after
+
+        # одна Session на клиента: keep-alive, без TCP/TLS-рукопожатия на каждое сообщение
+        self._http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=TELEGRAM_POOL_SIZE)
+        self._http.mount("https://", adapter)
+        self._http.mount("http://", adapter)
 
-    def send_message(self, chat_id: int, text: str, reply_markup: Optional[dict] = None):
+        self._global_limit = TokenBucket(global_rate)
+        # в один чат — не чаще раза в секунду, без накопленного запаса
+        self._chat_limit = KeyedRateLimiter(per_chat_rate, capacity=1)
+
+        self._stats_lock = threading.Lock()
+        self._stats = BotSendStats()
+
+    def send_message(self, chat_id: int, text: str, reply_markup: Optional[dict] = None) -> bool:
+        """True — Telegram принял сообщение."""
         payload: dict = {
             "chat_id": chat_id,
             "text": text,
@@ -24,14 +71,54 @@ class TelegramBotClient:
         if reply_markup:
             payload["reply_markup"] = reply_markup
 
-        try:
-            requests.post(
-                f"{self.base_url}/sendMessage",
-                json=payload,
-                timeout=5,
+        # после 429 повторяем один раз, если просят подождать недолго
+        for attempt in range(2):
+            self._wait_turn(chat_id)
+            try:
+                r = self._http.post(f"{self.base_url}/sendMessage", json=payload, timeout=5)
+            except requests.RequestException as exc:
+                logger.warning("sendMessage to %s failed: %s", chat_id, exc)
+                self._count("failed")
+                return False
+
+            if r.status_code == 429:
+                self._count("throttled")
+                retry_after = _retry_after(r)
+                if attempt == 0 and retry_after <= self.max_retry_after:
+                    time.sleep(retry_after)
+                    continue
+                logger.warning("sendMessage to %s throttled, retry_after=%s", chat_id, retry_after)
+                self._count("failed")
+                return False
+
+            if r.ok:
+                self._count("sent")
+                return True
+
+            logger.warning("sendMessage to %s failed: %s %s", chat_id, r.status_code, r.text[:200])
+            self._count("failed")
+            return False
+        return False
+
+    def stats(self) -> BotSendStats:
+        with self._stats_lock:
+            return BotSendStats(
+                sent=self._stats.sent,
+                throttled=self._stats.throttled,
+                failed=self._stats.failed,
             )
-        except Exception:
-            pass
+
+    def close(self) -> None:
+        self._http.close()
+
+    def _wait_turn(self, chat_id: int) -> None:
+        delay = max(self._chat_limit.reserve(chat_id), self._global_limit.reserve())
+        if delay > 0:
+            time.sleep(delay)
+
+    def _count(self, field: str) -> None:
+        with self._stats_lock:
+            setattr(self._stats, field, getattr(self._stats, field) + 1)
 
     # ===== WEBAPP LINKS =====
 
@@ -115,6 +202,18 @@ class TelegramBotClient:
 _bot_instance: Optional[TelegramBotClient] = None
 
 
+def _retry_after(response: requests.Response) -> float:
+    """retry_after из ответа 429 (parameters.retry_after или заголовок Retry-After)."""
+    try:
+        return float(response.json()["parameters"]["retry_after"])
+    except Exception:
+        pass
+    try:
+        return float(response.headers.get("Retry-After", 1))
+    except ValueError:
+        return 1.0
+
+
 def get_bot() -> Optional[TelegramBotClient]:
     global _bot_instance
     if _bot_instance is not None:
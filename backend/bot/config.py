@@ -10,3 +10,13 @@ TELEGRAM_BOT_USERNAME = os.getenv("TELEGRAM_BOT_USERNAME", "")
 #   https://t.me/<your_bot_username>/app
 #   или свой домен с мини-аппом, типа https://workscout.yourdomain.com
 WEBAPP_BASE_URL = os.getenv("WEBAPP_BASE_URL", "")
+
+# Bot API: базовый URL (для тестов — локальный фейковый сервер)
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+# keep-alive соединений к Bot API в пуле
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", "10"))
+# лимиты Telegram на рассылку: ~30 сообщений/с всего и 1 сообщение/с в один чат
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_PER_CHAT_RATE = float(os.getenv("TELEGRAM_PER_CHAT_RATE", "1"))
+# 429 с retry_after не больше этого ждём и повторяем сами, дольше — отдаём ошибку
+TELEGRAM_MAX_RETRY_AFTER = float(os.getenv("TELEGRAM_MAX_RETRY_AFTER", "5"))
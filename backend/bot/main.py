@@ -1,3 +1,4 @@
+import asyncio
 import os
 import logging
 from urllib.parse import quote
@@ -5,7 +6,7 @@ from urllib.parse import quote
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, ContextTypes
 
-from bot.config import TELEGRAM_BOT_TOKEN, TELEGRAM_BOT_USERNAME
+from bot.config import TELEGRAM_API_BASE, TELEGRAM_BOT_TOKEN, TELEGRAM_BOT_USERNAME
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("workscout-bot")
@@ -49,14 +50,29 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     log.exception("Unhandled error: %s", context.error)
 
+def build_application(token: str, webhook: bool = False, update_queue_size: int = 0) -> Application:
+    """
+    Application с обработчиками бота.
+    webhook=True — без Updater: обновления кладёт в update_queue webhook-эндпоинт
+    FastAPI (bot/webhook.py); очередь ограничена update_queue_size.
+    """
+    builder = Application.builder().token(token).base_url(f"{TELEGRAM_API_BASE}/bot")
+    if webhook:
+        builder = builder.updater(None).update_queue(asyncio.Queue(maxsize=update_queue_size))
+
+    app = builder.build()
+    app.add_handler(CommandHandler("start", start_command))
+    app.add_error_handler(error_handler)
+    return app
+
+
 def main() -> None:
+    """Long polling отдельным процессом — для локальной разработки."""
     token = (TELEGRAM_BOT_TOKEN or os.getenv("TELEGRAM_BOT_TOKEN", "")).strip()
     if not token:
         raise RuntimeError("TELEGRAM_BOT_TOKEN не задан")
 
-    app = Application.builder().token(token).build()
-    app.add_handler(CommandHandler("start", start_command))
-    app.add_error_handler(error_handler)
+    app = build_application(token)
 
     log.info("Бот запущен.")
     app.run_polling(allowed_updates=Update.ALL_TYPES)
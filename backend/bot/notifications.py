@@ -1,10 +1,23 @@
 # bot/notifications.py
+#
+# Тексты уведомлений. Эндпоинты не шлют их сами: сообщение собирается
+# в транзакции запроса и кладётся в outbox (app/services/notification_outbox.py),
+# а в Telegram его отправляет фоновый воркер.
 
+from dataclasses import dataclass
 from typing import Optional
 
 from .client import get_bot
 
 
+@dataclass
+class OutgoingMessage:
+    # None — рассылка: получатели подставляются при постановке в outbox
+    chat_id: Optional[int]
+    text: str
+    reply_markup: Optional[dict] = None
+
+
 def _safe_user_name(user) -> str:
     # user: app.models.user.User
     if not user:
@@ -14,21 +27,45 @@ def _safe_user_name(user) -> str:
     return user.first_name
 
 
+def _plural(n: int, one: str, few: str, many: str) -> str:
+    # 1 отклик, 2 отклика, 5 откликов, 21 отклик, 11 откликов
+    if n % 10 == 1 and n % 100 != 11:
+        return one
+    if 2 <= n % 10 <= 4 and not 12 <= n % 100 <= 14:
+        return few
+    return many
+
+
+def _order_buttons(bot, order) -> Optional[dict]:
+    order_link = bot.build_order_link(order.id)
+    my_orders_link = bot.build_my_orders_link()
+
+    buttons = []
+
+    if order_link:
+        buttons.append({"text": "Открыть заказ", "url": order_link})
+    if my_orders_link:
+        buttons.append({"text": "Мои заказы", "url": my_orders_link})
+
+    return {"inline_keyboard": [buttons]} if buttons else None
+
+
 # ========== УВЕДОМЛЕНИЯ ==========
 
-def notify_new_response(order, executor) -> None:
+def new_response_message(order, executor) -> Optional[OutgoingMessage]:
     """
     Новый отклик на заказ → уведомляем заказчика.
     order: app.models.order.Order
     executor: app.models.user.User (исполнитель)
+    None — слать некому (нет бота или telegram_id заказчика).
     """
     bot = get_bot()
     if not bot:
-        return
+        return None
 
     customer = order.customer
     if not customer or not customer.telegram_id:
-        return
+        return None
 
     exec_name = _safe_user_name(executor)
     text = (
@@ -37,35 +74,66 @@ def notify_new_response(order, executor) -> None:
         f"Город: {executor.city or '—'}"
     )
 
-    order_link = bot.build_order_link(order.id)
-    my_orders_link = bot.build_my_orders_link()
+    return OutgoingMessage(chat_id=customer.telegram_id, text=text, reply_markup=_order_buttons(bot, order))
 
-    buttons = []
 
-    if order_link:
-        buttons.append({"text": "Открыть заказ", "url": order_link})
-    if my_orders_link:
-        buttons.append({"text": "Мои заказы", "url": my_orders_link})
+def new_responses_digest_message(order, count: int) -> Optional[OutgoingMessage]:
+    """
+    Сводка вместо пачки отдельных сообщений: несколько откликов на заказ
+    за окно склейки (NOTIFY_COALESCE_SECONDS) → одно сообщение заказчику.
+    """
+    bot = get_bot()
+    if not bot:
+        return None
 
-    reply_markup = {"inline_keyboard": [buttons]} if buttons else None
+    customer = order.customer
+    if not customer or not customer.telegram_id:
+        return None
+
+    noun = _plural(count, "новый отклик", "новых отклика", "новых откликов")
+    text = f"🛠 {count} {noun} на ваш заказ «{order.title}»"
+
+    return OutgoingMessage(chat_id=customer.telegram_id, text=text, reply_markup=_order_buttons(bot, order))
+
+
+def new_order_message(order) -> Optional[OutgoingMessage]:
+    """
+    Новый заказ → рассылка исполнителям с подходящими городом и специализацией.
+    order: app.models.order.Order (уже с id)
+    """
+    bot = get_bot()
+    if not bot:
+        return None
+
+    text = (
+        f"📢 Новый заказ «{order.title}»\n\n"
+        f"Город: {order.city}"
+    )
+
+    order_link = bot.build_order_link(order.id)
+    reply_markup = (
+        {"inline_keyboard": [[{"text": "Открыть заказ", "url": order_link}]]}
+        if order_link
+        else None
+    )
 
-    bot.send_message(chat_id=customer.telegram_id, text=text, reply_markup=reply_markup)
+    return OutgoingMessage(chat_id=None, text=text, reply_markup=reply_markup)
 
 
-def notify_executor_chosen(order) -> None:
+def executor_chosen_message(order) -> Optional[OutgoingMessage]:
     """
     Заказчик выбрал исполнителя → уведомляем исполнителя.
     order: app.models.order.Order (у него уже должен быть executor_id)
     """
     bot = get_bot()
     if not bot:
-        return
+        return None
 
     executor = order.executor
     customer = order.customer
 
     if not executor or not executor.telegram_id:
-        return
+        return None
 
     customer_name = _safe_user_name(customer)
 
@@ -99,11 +167,11 @@ def notify_executor_chosen(order) -> None:
 
     reply_markup = {"inline_keyboard": inline_keyboard} if inline_keyboard else None
 
-    bot.send_message(chat_id=executor.telegram_id, text=text, reply_markup=reply_markup)
+    return OutgoingMessage(chat_id=executor.telegram_id, text=text, reply_markup=reply_markup)
 
 
 # На будущее — нотификация о новых сообщениях (если будешь логировать их у себя)
-def notify_new_chat_message(chat, from_user, to_user) -> None:
+def new_chat_message_message(chat, from_user, to_user) -> Optional[OutgoingMessage]:
     """
     Заглушка под будущие уведомления по сообщениям в чате.
     chat: app.models.chat.Chat
@@ -111,10 +179,10 @@ def notify_new_chat_message(chat, from_user, to_user) -> None:
     """
     bot = get_bot()
     if not bot:
-        return
+        return None
 
     if not to_user or not to_user.telegram_id:
-        return
+        return None
 
     text = (
         f"💬 Новое сообщение по заказу #{chat.order_id} "
@@ -128,4 +196,4 @@ def notify_new_chat_message(chat, from_user, to_user) -> None:
 
     reply_markup = {"inline_keyboard": [buttons]} if buttons else None
 
-    bot.send_message(chat_id=to_user.telegram_id, text=text, reply_markup=reply_markup)
+    return OutgoingMessage(chat_id=to_user.telegram_id, text=text, reply_markup=reply_markup)
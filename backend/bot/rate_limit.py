@@ -0,0 +1,62 @@
+# bot/rate_limit.py
+#
+# Token bucket для лимитов Telegram на рассылку.
+# reserve() сразу забирает токен (баланс может уйти в минус) и говорит,
+# сколько подождать до отправки: параллельные отправители выстраиваются
+# в очередь без опроса и без сна под блокировкой.
+
+import threading
+import time
+from typing import Callable, Dict, Hashable
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Забирает токен; возвращает, сколько секунд подождать перед отправкой."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def idle(self) -> bool:
+        """Бакет полон — его можно выбросить и завести заново без потери лимита."""
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens >= self.capacity
+
+
+class KeyedRateLimiter:
+    """Отдельный TokenBucket на ключ (chat_id); простаивающие бакеты выбрасываются."""
+
+    MAX_BUCKETS = 10_000
+
+    def __init__(self, rate: float, capacity: float = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: Hashable) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.MAX_BUCKETS:
+                    self._buckets = {k: b for k, b in self._buckets.items() if not b.idle()}
+                bucket = TokenBucket(self.rate, self.capacity, self._clock)
+                self._buckets[key] = bucket
+        return bucket.reserve()
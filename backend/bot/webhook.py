@@ -0,0 +1,71 @@
+# bot/webhook.py
+#
+# Режим webhook: бот живёт внутри процесса FastAPI, без отдельного
+# long polling. Telegram шлёт обновления на POST /api/v1/telegram/webhook,
+# эндпоинт сверяет секрет (X-Telegram-Bot-Api-Secret-Token) и кладёт
+# обновление в ограниченную очередь Application — обработчики
+# (bot/main.py) разбирают её в фоне. Переполненная очередь — 503, и
+# Telegram повторит доставку позже.
+
+import asyncio
+import hmac
+import logging
+from typing import Optional
+
+from telegram import Update
+from telegram.ext import Application
+
+from bot.main import build_application
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookBot:
+    def __init__(self) -> None:
+        self.application: Optional[Application] = None
+        self._secret = ""
+
+    @property
+    def running(self) -> bool:
+        return self.application is not None
+
+    async def start(self, token: str, secret: str, update_queue_size: int, webhook_url: str = "") -> None:
+        if not secret:
+            raise RuntimeError("TELEGRAM_WEBHOOK_SECRET не задан")
+
+        application = build_application(token, webhook=True, update_queue_size=update_queue_size)
+        await application.initialize()
+        await application.start()
+        if webhook_url:
+            await application.bot.set_webhook(
+                url=webhook_url,
+                secret_token=secret,
+                allowed_updates=Update.ALL_TYPES,
+            )
+            logger.info("telegram webhook set to %s", webhook_url)
+
+        self.application = application
+        self._secret = secret
+
+    async def stop(self) -> None:
+        application, self.application = self.application, None
+        if application is None:
+            return
+        await application.stop()
+        await application.shutdown()
+
+    def check_secret(self, received: Optional[str]) -> bool:
+        return bool(received) and hmac.compare_digest(received, self._secret)
+
+    def feed(self, payload: dict) -> bool:
+        """Кладёт обновление в очередь; False — очередь переполнена."""
+        update = Update.de_json(payload, self.application.bot)
+        try:
+            self.application.update_queue.put_nowait(update)
+        except asyncio.QueueFull:
+            logger.warning("telegram update queue is full, update %s rejected", update.update_id)
+            return False
+        return True
+
+
+bot_webhook = WebhookBot()
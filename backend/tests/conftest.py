@@ -1,7 +1,13 @@
 # tests/conftest.py
 
+import json
 import os
+import shutil
 import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
 
 CURRENT_DIR = os.path.dirname(__file__)
 BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))      # .../WorkScoutRubot/backend
@@ -11,6 +17,13 @@ for path in (BACKEND_ROOT, PROJECT_ROOT):
     if path not in sys.path:
         sys.path.insert(0, path)
 
+# своя база в temp-папке — до импорта app: настройки и движок приложения
+# читают DATABASE_URL при импорте, а рабочие app.db / test.db не трогаем
+# (conftest импортируется и как tests.conftest — папка должна быть одна)
+if "WORKSCOUT_TEST_DB_DIR" not in os.environ:
+    os.environ["WORKSCOUT_TEST_DB_DIR"] = tempfile.mkdtemp(prefix="workscout-tests-")
+TEST_DB_DIR = os.environ["WORKSCOUT_TEST_DB_DIR"]
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
 
 
 import pytest
@@ -18,11 +31,16 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.db.base import Base
-from app.api.deps import get_db
+from app.api.deps import get_async_db, get_db
+from app.db.async_session import ThreadpoolDb
+from app.db.routing import recent_writers
 from app.models.user import User
 from app.main import app  # ТВОЙ FastAPI-приложение лежит в app/main.py
+from app.services.feed_cache import feed_cache
+from app.services.init_data_cache import init_data_cache
+from app.services.session_tokens import session_denylist
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+SQLALCHEMY_DATABASE_URL = os.environ["DATABASE_URL"]
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -37,6 +55,8 @@ def setup_database():
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    shutil.rmtree(TEST_DB_DIR, ignore_errors=True)
 
 
 @pytest.fixture()
@@ -61,7 +81,16 @@ def client(db_session):
         finally:
             pass
 
+    async def override_get_async_db():
+        yield ThreadpoolDb(db_session)
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # кэши живут в процессе, а БД между тестами откатывается
+    feed_cache.clear()
+    init_data_cache.clear()
+    session_denylist.clear()
+    recent_writers.clear()
 
     with TestClient(app) as c:
         yield c
@@ -136,3 +165,128 @@ def admin(db_session) -> User:
     db_session.commit()
     db_session.refresh(user)
     return user
+
+
+# ===== подписанный Telegram initData для запросов =====
+
+TEST_BOT_TOKEN = "123456:TEST-TOKEN"
+
+
+def build_init_data(telegram_id: int, bot_token: str = TEST_BOT_TOKEN) -> str:
+    import hashlib
+    import hmac
+    import json
+    import time
+    from urllib.parse import urlencode
+
+    pairs = {
+        "auth_date": str(int(time.time())),
+        "user": json.dumps({"id": telegram_id}),
+    }
+    data_check_string = "\n".join(f"{k}={pairs[k]}" for k in sorted(pairs))
+    secret_key = hmac.new(b"WebAppData", bot_token.encode("utf-8"), hashlib.sha256).digest()
+    pairs["hash"] = hmac.new(secret_key, data_check_string.encode("utf-8"), hashlib.sha256).hexdigest()
+    return urlencode(pairs)
+
+
+@pytest.fixture()
+def auth_headers(monkeypatch):
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", TEST_BOT_TOKEN)
+
+    def _headers(user: User) -> dict:
+        return {"X-Tg-Init-Data": build_init_data(user.telegram_id)}
+
+    return _headers
+
+
+# ===== бот Telegram без сети =====
+
+@pytest.fixture()
+def telegram(monkeypatch):
+    """Бот настроен (уведомления собираются), но в сеть запросы не уходят."""
+    import bot.client
+    import bot.notifications
+
+    tg_bot = bot.client.TelegramBotClient(TEST_BOT_TOKEN)
+    monkeypatch.setattr(bot.client, "TELEGRAM_BOT_USERNAME", "WorkScoutBot")
+    monkeypatch.setattr(bot.notifications, "get_bot", lambda: tg_bot)
+
+    def _no_network(*args, **kwargs):
+        raise AssertionError("запрос к Telegram из обработчика HTTP-запроса")
+
+    monkeypatch.setattr(bot.client.requests.Session, "post", _no_network)
+    return tg_bot
+
+
+class FakeBotApi(ThreadingHTTPServer):
+    """
+    Bot API на localhost. Каждый запрос записывается в calls как
+    (метод, параметры) — метод это последний сегмент пути, для файлов это
+    имя файла, полные пути — в paths. Ответ берётся из responses[метод]: значение или функция
+    params -> значение. bytes отдаются как файл, (код, dict) — как есть,
+    остальное — {"ok": true, "result": ...}. Без ответа — result: true.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _FakeBotApiHandler)
+        self.calls = []
+        self.paths = []
+        self.connections = set()
+        self.responses = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+    def methods(self) -> list:
+        return [method for method, _ in self.calls]
+
+
+class _FakeBotApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, как у api.telegram.org
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            params = json.loads(raw or "{}")
+        else:
+            params = dict(parse_qsl(raw or url.query))
+        method = url.path.rsplit("/", 1)[-1]
+        server = self.server
+        server.connections.add(self.client_address)
+        server.paths.append(url.path)
+        server.calls.append((method, params))
+
+        reply = server.responses.get(method, True)
+        if callable(reply):
+            reply = reply(params)
+        if isinstance(reply, bytes):
+            self._reply(200, reply, "application/octet-stream")
+            return
+        code, payload = reply if isinstance(reply, tuple) else (200, {"ok": True, "result": reply})
+        self._reply(code, json.dumps(payload).encode("utf-8"), "application/json")
+
+    do_GET = do_POST
+
+    def _reply(self, code: int, data: bytes, content_type: str):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def bot_api():
+    """Настоящий HTTP-сервер вместо api.telegram.org; ответы задаёт сам тест."""
+    server = FakeBotApi()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,104 @@
+# tests/test_async_db.py
+#
+# Горячие эндпоинты в режиме DB_ASYNC: тот же код, но на AsyncSession
+# поверх aiosqlite. Отдельная БД-файл, без транзакционного отката conftest.
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_async_db
+from app.db.async_session import AsyncSessionDb
+from app.db.base import Base
+from app.main import app
+from app.models.order import Order
+from app.models.user import User
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+
+@pytest.fixture()
+def async_client(client, tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    factory = async_sessionmaker(async_engine, autoflush=False)
+
+    async def override_get_async_db():
+        async with factory() as session:
+            yield AsyncSessionDb(session)
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with Session(sync_engine) as seed:
+        yield client, seed
+
+    asyncio.run(async_engine.dispose())
+    sync_engine.dispose()
+
+
+def test_hot_endpoints_on_async_session(async_client, auth_headers):
+    client, seed = async_client
+
+    customer = User(role="customer", first_name="Клиент", city="Москва", telegram_id=1001)
+    executor = User(
+        role="executor",
+        first_name="Мастер",
+        city="Москва",
+        specializations_raw="отделка",
+        telegram_id=1002,
+        lat=55.75,
+        lon=37.61,
+    )
+    seed.add_all([customer, executor])
+    seed.commit()
+    order = Order(
+        customer_id=customer.id,
+        title="Поклеить обои",
+        description="Две комнаты",
+        city="Москва",
+        address="ул. Тестовая, 1",
+        categories_raw="отделка",
+        budget_type="negotiable",
+        status="active",
+        has_photos=False,
+        lat=55.76,
+        lon=37.62,
+    )
+    seed.add(order)
+    seed.commit()
+
+    r = client.get("/api/v1/orders/available", headers=auth_headers(executor))
+    assert r.status_code == 200
+    assert [o["id"] for o in r.json()["items"]] == [order.id]
+
+    # радиус — UDF haversine_km на соединении aiosqlite
+    r = client.get(
+        "/api/v1/orders/available",
+        params={"radius_km": 10},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 200
+    assert [o["id"] for o in r.json()["items"]] == [order.id]
+
+    r = client.get(f"/api/v1/orders/{order.id}", headers=auth_headers(customer))
+    assert r.status_code == 200
+    assert r.json()["title"] == "Поклеить обои"
+
+    r = client.get("/api/v1/executor/responses", headers=auth_headers(executor))
+    assert r.status_code == 200
+    assert r.json() == []
+
+    # токен сессии: поля профиля догружаются лениво внутри run_sync
+    r = client.post("/api/v1/auth/session", headers=auth_headers(executor))
+    assert r.status_code == 200
+    token = r.json()["access_token"]
+    r = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    assert r.json()["city"] == "Москва"
+    assert r.json()["specializations"] == ["отделка"]
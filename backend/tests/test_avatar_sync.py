@@ -0,0 +1,198 @@
+# tests/test_avatar_sync.py
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from sqlalchemy.orm import Session
+
+from app import main
+from app.api.v1.endpoints import users
+from app.models.user import User
+from app.services import telegram_avatar
+from app.services.avatar_sync import AvatarSync, collect_unused_avatars
+from app.db.migrations import backfill_avatar_thumbs
+from app.services.telegram_avatar import AvatarSyncResult, download_user_avatar
+
+
+def _wait_idle(sync: AvatarSync, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while sync.pending():
+        assert time.monotonic() < deadline, "avatar sync не закончился"
+        time.sleep(0.01)
+
+
+@pytest.fixture()
+def avatar_worker(db_session, monkeypatch):
+    """AvatarSync на тестовой сессии и управляемый «Telegram»."""
+    calls = []
+    release = threading.Event()
+    results = {}
+
+    def fake_download(telegram_id, budget_seconds, known_file_unique_id):
+        calls.append((telegram_id, budget_seconds, known_file_unique_id))
+        release.wait(5)
+        return results.get(telegram_id)
+
+    sync = AvatarSync(
+        lambda: Session(bind=db_session.connection()),
+        download=fake_download,
+        concurrency=1,
+        timeout=3,
+        retry_seconds=3600,
+    )
+    monkeypatch.setattr(users, "avatar_sync", sync)
+    monkeypatch.setattr(main, "avatar_sync", sync)
+    return sync, calls, release, results
+
+
+def test_me_does_not_wait_for_avatar_download(client, db_session, customer, auth_headers, avatar_worker):
+    sync, calls, release, results = avatar_worker
+    customer.avatar_url = "https://workscout.ru/media/avatars/old.jpg"
+    customer.avatar_updated_at = datetime.utcnow() - timedelta(days=2)
+    db_session.commit()
+    results[customer.telegram_id] = AvatarSyncResult(
+        "photo-2",
+        "https://workscout.ru/media/avatars/new.jpg",
+        "https://workscout.ru/media/avatars/new.thumb.webp",
+    )
+
+    # 1) Telegram «висит», а профиль отдаётся сразу со старым аватаром
+    r = client.get("/api/v1/users/me", headers=auth_headers(customer))
+    assert r.status_code == 200
+    assert r.json()["avatar_url"] == "https://workscout.ru/media/avatars/old.jpg"
+    # превью не записано — в списки идёт оригинал
+    assert r.json()["avatar_thumb_url"] == "https://workscout.ru/media/avatars/old.jpg"
+    assert sync.pending() == 1
+
+    # повторный запрос в очередь не ставит
+    r = client.get("/api/v1/users/me", headers=auth_headers(customer))
+    assert r.status_code == 200
+    assert sync.pending() == 1
+
+    # 2) воркер докачал — новый URL в базе и в следующем ответе
+    release.set()
+    _wait_idle(sync)
+    assert calls == [(customer.telegram_id, 3, None)]
+
+    db_session.expire_all()
+    user = db_session.get(User, customer.id)
+    assert user.avatar_url == "https://workscout.ru/media/avatars/new.jpg"
+    assert user.avatar_file_unique_id == "photo-2"
+    r = client.get("/api/v1/users/me", headers=auth_headers(customer))
+    assert r.json()["avatar_url"] == "https://workscout.ru/media/avatars/new.jpg"
+    assert r.json()["avatar_thumb_url"] == "https://workscout.ru/media/avatars/new.thumb.webp"
+    # обновлённый аватар свежий — больше не качаем
+    assert len(calls) == 1
+
+
+def test_failed_avatar_sync_is_not_retried_immediately(client, db_session, executor, auth_headers, avatar_worker):
+    sync, calls, release, results = avatar_worker
+    release.set()  # фото нет: загрузка сразу возвращает None
+
+    r = client.get("/api/v1/users/me", headers=auth_headers(executor))
+    assert r.status_code == 200
+    assert r.json()["avatar_url"] is None
+    _wait_idle(sync)
+    assert len(calls) == 1
+
+    # до истечения паузы после неудачи Telegram не дёргаем
+    client.get("/api/v1/users/me", headers=auth_headers(executor))
+    assert sync.pending() == 0
+    assert len(calls) == 1
+
+
+@pytest.fixture()
+def fake_telegram(bot_api, tmp_path, monkeypatch):
+    """getUserProfilePhotos / getFile / файл фото; текущее фото — bot_api.photo."""
+    bot_api.photo = ("photo-1", b"jpeg-bytes-1")
+
+    def profile_photos(params):
+        size = {"file_id": f"id-{bot_api.photo[0]}", "file_unique_id": bot_api.photo[0]}
+        return {"total_count": 1, "photos": [[size]]}
+
+    def get_file(params):
+        # файл отдаём по имени из file_path — ответ на него собирается тут же
+        unique_id, content = bot_api.photo
+        bot_api.responses[f"{unique_id}.jpg"] = content
+        return {"file_path": f"photos/{unique_id}.jpg"}
+
+    bot_api.responses["getUserProfilePhotos"] = profile_photos
+    bot_api.responses["getFile"] = get_file
+    monkeypatch.setattr(telegram_avatar, "TELEGRAM_API_BASE", bot_api.url)
+    monkeypatch.setattr(telegram_avatar, "TELEGRAM_BOT_TOKEN", "123456:TEST-TOKEN")
+    monkeypatch.setattr(telegram_avatar, "AVATAR_DIR", tmp_path / "avatars")
+    return bot_api
+
+
+def test_unchanged_photo_is_not_downloaded_again(fake_telegram, tmp_path):
+    # 1) первое скачивание: файл назван по хэшу содержимого
+    first = download_user_avatar(111111111, budget_seconds=5)
+    assert first.file_unique_id == "photo-1"
+    filename = first.url.rsplit("/", 1)[-1]
+    assert filename == hashlib.sha256(b"jpeg-bytes-1").hexdigest()[:32] + ".jpg"
+    assert (tmp_path / "avatars" / filename).read_bytes() == b"jpeg-bytes-1"
+    assert fake_telegram.methods() == ["getUserProfilePhotos", "getFile", "photo-1.jpg"]
+
+    # 2) тот же file_unique_id — только один запрос, без getFile и файла
+    fake_telegram.calls.clear()
+    same = download_user_avatar(111111111, budget_seconds=5, known_file_unique_id="photo-1")
+    assert same == AvatarSyncResult("photo-1", None)
+    assert fake_telegram.methods() == ["getUserProfilePhotos"]
+
+    # 3) то же фото у другого пользователя — тот же файл, второй не пишется
+    other = download_user_avatar(222222222, budget_seconds=5)
+    assert other.url == first.url
+    assert len(list((tmp_path / "avatars").iterdir())) == 1
+
+
+def test_unused_avatar_files_are_collected(fake_telegram, db_session, customer, tmp_path):
+    buf = BytesIO()
+    Image.new("RGB", (640, 640), color=(10, 20, 30)).save(buf, format="JPEG")
+    fake_telegram.photo = ("photo-2", buf.getvalue())
+    current = download_user_avatar(customer.telegram_id, budget_seconds=5)
+    customer.avatar_url = current.url
+    db_session.commit()
+
+    avatars = tmp_path / "avatars"
+    current_name = current.url.rsplit("/", 1)[-1]
+    stem = current_name.rsplit(".", 1)[0]
+    thumb = f"{stem}.thumb.webp"
+    assert (avatars / thumb).exists()
+    assert current.thumb_url == current.url.rsplit("/", 1)[0] + "/" + thumb
+    legacy = avatars / f"u{customer.id}_1700000000.jpg"
+    legacy.write_bytes(b"old")
+    fresh = avatars / "0123456789abcdef0123456789abcdef.jpg"
+    fresh.write_bytes(b"just written")
+    old = time.time() - 7200
+    for path in avatars.iterdir():
+        if path != fresh:
+            os.utime(path, (old, old))
+
+    # заменённый старый файл удалён, текущий с копиями и только что записанный — на месте
+    assert collect_unused_avatars(db_session, grace_seconds=3600) == 1
+    assert sorted(p.name for p in avatars.iterdir()) == sorted(
+        [current_name, thumb, f"{stem}.medium.webp", fresh.name]
+    )
+
+
+def test_avatar_thumbs_are_backfilled(fake_telegram, db_session, customer, executor, tmp_path):
+    buf = BytesIO()
+    Image.new("RGB", (640, 640), color=(40, 50, 60)).save(buf, format="JPEG")
+    fake_telegram.photo = ("photo-3", buf.getvalue())
+    saved = download_user_avatar(customer.telegram_id, budget_seconds=5)
+
+    # аватары из времён до колонки: у одного превью на диске есть, у другого — нет
+    customer.avatar_url = saved.url
+    executor.avatar_url = telegram_avatar.avatar_url("u2_1700000000.jpg")
+    db_session.commit()
+
+    assert backfill_avatar_thumbs(db_session.get_bind()) == 1
+    db_session.expire_all()
+    assert db_session.get(User, customer.id).avatar_thumb_url == saved.thumb_url
+    assert db_session.get(User, executor.id).avatar_thumb_url is None
@@ -0,0 +1,127 @@
+# tests/test_etag.py
+
+from app.services.feed_cache import feed_cache
+
+
+def _revalidate(client, url, headers, etag):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+def test_etag_not_modified_flow(
+    client,
+    db_session,
+    customer,
+    executor,
+    auth_headers,
+):
+    # 1) Заказчик создаёт заказ
+    r = client.post(
+        "/api/v1/orders/",
+        json={
+            "title": "Положить ламинат",
+            "description": "Комната 15 м2",
+            "city": "Москва",
+            "categories": ["отделка"],
+            "budget_type": "fixed",
+            "budget_amount": 12000,
+        },
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    order_id = r.json()["id"]
+
+    # 2) /orders/my: ETag, 304 на повтор, новая версия после правки
+    r = client.get("/api/v1/orders/my", headers=auth_headers(customer))
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+
+    r = _revalidate(client, "/api/v1/orders/my", auth_headers(customer), etag)
+    assert r.status_code == 304
+    assert r.content == b""
+
+    r = client.patch(
+        f"/api/v1/orders/{order_id}",
+        json={"title": "Положить ламинат и плинтус"},
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+
+    r = _revalidate(client, "/api/v1/orders/my", auth_headers(customer), etag)
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+    # 3) Лента исполнителя
+    r = client.get("/api/v1/orders/available", headers=auth_headers(executor))
+    assert r.status_code == 200
+    feed_etag = r.headers["ETag"]
+    r = _revalidate(client, "/api/v1/orders/available", auth_headers(executor), feed_etag)
+    assert r.status_code == 304
+
+    r = client.delete(f"/api/v1/orders/{order_id}", headers=auth_headers(customer))
+    assert r.status_code == 204
+    r = _revalidate(client, "/api/v1/orders/available", auth_headers(executor), feed_etag)
+    assert r.status_code == 200
+    assert r.json()["items"] == []
+
+    # 4) Профиль: правка меняет версию
+    r = client.get("/api/v1/users/me", headers=auth_headers(executor))
+    assert r.status_code == 200
+    me_etag = r.headers["ETag"]
+    r = _revalidate(client, "/api/v1/users/me", auth_headers(executor), me_etag)
+    assert r.status_code == 304
+
+    r = client.put(
+        "/api/v1/users/me",
+        json={"about": "Делаю ремонт под ключ"},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 200
+    r = _revalidate(client, "/api/v1/users/me", auth_headers(executor), me_etag)
+    assert r.status_code == 200
+
+    # 5) Отзывы по пользователю
+    r = client.get(f"/api/v1/reviews/for-user/{executor.id}")
+    assert r.status_code == 200
+    reviews_etag = r.headers["ETag"]
+    r = client.get(
+        f"/api/v1/reviews/for-user/{executor.id}",
+        headers={"If-None-Match": f"W/{reviews_etag}"},
+    )
+    assert r.status_code == 304
+
+
+def test_city_feed_etag_survives_cache_reload(client, customer, executor, auth_headers):
+    r = client.post(
+        "/api/v1/orders/",
+        json={
+            "title": "Заменить смеситель",
+            "description": "Кухня",
+            "city": "Москва",
+            "categories": ["плитка"],
+            "budget_type": "negotiable",
+        },
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    order_id = r.json()["id"]
+
+    r = client.get("/api/v1/orders/available", headers=auth_headers(executor))
+    assert r.status_code == 200
+    feed_etag = r.headers["ETag"]
+
+    # 1) снимок перезагружен (TTL, другой воркер) — лента та же, ETag тот же
+    feed_cache.clear()
+    r = _revalidate(client, "/api/v1/orders/available", auth_headers(executor), feed_etag)
+    assert r.status_code == 304
+
+    # 2) правка заказа — новая версия
+    r = client.patch(
+        f"/api/v1/orders/{order_id}",
+        json={"title": "Заменить смеситель и сифон"},
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    r = _revalidate(client, "/api/v1/orders/available", auth_headers(executor), feed_etag)
+    assert r.status_code == 200
+    assert r.headers["ETag"] != feed_etag
+    assert r.json()["items"][0]["title"] == "Заменить смеситель и сифон"
@@ -0,0 +1,69 @@
+# tests/test_init_data_cache.py
+
+import time
+
+from sqlalchemy import event
+
+from tests.conftest import TEST_BOT_TOKEN, engine
+from app.api import deps
+from app.services.init_data_cache import init_data_cache
+
+
+def test_verified_init_data_is_cached_and_invalidated(
+    client,
+    db_session,
+    executor,
+    admin,
+    auth_headers,
+    monkeypatch,
+):
+    headers = auth_headers(executor)
+    admin_headers = auth_headers(admin)
+
+    r = client.get("/api/v1/users/me", headers=headers)
+    assert r.status_code == 200
+
+    # 1) Та же строка initData больше не проверяется заново
+    def fail_verify(*args, **kwargs):
+        raise AssertionError("initData verified again")
+
+    with monkeypatch.context() as m:
+        m.setattr(deps, "_verify_and_extract_tg_user_id", fail_verify)
+        r = client.get("/api/v1/users/me", headers=headers)
+        assert r.status_code == 200
+
+    # ...и пользователя из БД не грузим: id и роль — из снимка в кэше
+    db_session.expunge_all()
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        r = client.get("/api/v1/executor/responses", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert r.status_code == 200
+    assert not [sql for sql in statements if "FROM users" in sql]
+
+    # 2) Блокировка сбрасывает кэш: тот же initData сразу получает 403
+    r = client.patch(f"/api/v1/admin/users/{executor.id}/block", headers=admin_headers)
+    assert r.status_code == 200
+    r = client.get("/api/v1/users/me", headers=headers)
+    assert r.status_code == 403
+
+    r = client.patch(f"/api/v1/admin/users/{executor.id}/unblock", headers=admin_headers)
+    assert r.status_code == 200
+    r = client.get("/api/v1/users/me", headers=headers)
+    assert r.status_code == 200
+
+    # 3) Правка профиля тоже сбрасывает записи пользователя
+    r = client.put("/api/v1/users/me", json={"city": "Казань"}, headers=headers)
+    assert r.status_code == 200
+    assert init_data_cache.get(TEST_BOT_TOKEN, headers["X-Tg-Init-Data"]) is None
+
+    # 4) Просроченная запись не используется
+    r = client.get("/api/v1/users/me", headers=headers)
+    assert r.status_code == 200
+    monkeypatch.setattr(time, "time", lambda: 10**10)
+    r = client.get("/api/v1/users/me", headers=headers)
+    assert r.status_code == 401
+    assert r.json()["detail"] == "USER_INITDATA_EXPIRED"
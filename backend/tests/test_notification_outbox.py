@@ -0,0 +1,187 @@
+# tests/test_notification_outbox.py
+
+import json
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.models.notification_outbox import NotificationOutbox
+from app.models.user import User
+from app.services.notification_outbox import drain_outbox
+
+
+def test_notifications_go_through_outbox(
+    client, db_session, customer, executor, auth_headers, telegram, monkeypatch
+):
+    # рассылка о новом заказе проверяется в test_order_fanout.py
+    monkeypatch.setattr(settings, "NOTIFY_NEW_ORDERS", False)
+    r = client.post(
+        "/api/v1/orders/",
+        json={
+            "title": "Ремонт ванной",
+            "description": "Плитка и сантехника",
+            "city": "Москва",
+            "categories": ["плитка"],
+            "budget_type": "negotiable",
+        },
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    order_id = r.json()["id"]
+
+    # 1) отклик: сообщение заказчику лежит в outbox, в Telegram ничего не ушло
+    r = client.post(
+        f"/api/v1/orders/{order_id}/responses",
+        json={"price": 30000, "discuss_price": False, "comment": "Сделаю за неделю"},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 204
+
+    rows = db_session.query(NotificationOutbox).order_by(NotificationOutbox.id).all()
+    assert [(row.kind, row.chat_id, row.status) for row in rows] == [
+        ("new_response", customer.telegram_id, "pending")
+    ]
+    assert "Ремонт ванной" in rows[0].text
+    assert json.loads(rows[0].reply_markup)["inline_keyboard"]
+
+    # 2) выбор исполнителя: сообщение исполнителю
+    r = client.get(f"/api/v1/orders/{order_id}/responses", headers=auth_headers(customer))
+    response_id = r.json()[0]["id"]
+    r = client.post(
+        f"/api/v1/orders/{order_id}/choose_executor",
+        json={"response_id": response_id},
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    row = db_session.query(NotificationOutbox).filter_by(kind="executor_chosen").one()
+    assert row.chat_id == executor.telegram_id
+    assert f"tg://user?id={customer.telegram_id}" in row.reply_markup
+
+    # 3) воркер: первая попытка для заказчика падает — повтор позже
+    sent = []
+
+    def flaky_send(chat_id, text, reply_markup):
+        if chat_id == customer.telegram_id and not any(c == chat_id for c, _ in sent):
+            sent.append((chat_id, False))
+            return False
+        sent.append((chat_id, True))
+        return True
+
+    now = datetime.utcnow() + timedelta(seconds=1)
+    result = drain_outbox(db_session, flaky_send, now=now)
+    assert (result.claimed, result.sent, result.retried, result.failed) == (2, 1, 1, 0)
+
+    pending = db_session.query(NotificationOutbox).filter_by(status="pending").one()
+    db_session.refresh(pending)
+    assert pending.attempts == 1
+    assert pending.last_error == "telegram rejected"
+
+    # до истечения задержки повтора строку никто не берёт
+    assert drain_outbox(db_session, flaky_send, now=now).claimed == 0
+
+    later = now + timedelta(seconds=settings.NOTIFY_RETRY_MAX_SECONDS + 1)
+    result = drain_outbox(db_session, flaky_send, now=later)
+    assert (result.claimed, result.sent) == (1, 1)
+    assert {row.status for row in db_session.query(NotificationOutbox)} == {"sent"}
+
+
+def test_outbox_gives_up_after_max_attempts(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFY_MAX_ATTEMPTS", 2)
+    row = NotificationOutbox(
+        kind="new_response",
+        chat_id=42,
+        text="привет",
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db_session.add(row)
+    db_session.commit()
+
+    def broken_send(chat_id, text, reply_markup):
+        raise ConnectionError("telegram недоступен")
+
+    now = datetime.utcnow() + timedelta(seconds=1)
+    assert drain_outbox(db_session, broken_send, now=now).retried == 1
+    later = now + timedelta(seconds=settings.NOTIFY_RETRY_MAX_SECONDS + 1)
+    assert drain_outbox(db_session, broken_send, now=later).failed == 1
+
+    db_session.refresh(row)
+    assert row.status == "failed"
+    assert row.attempts == 2
+    assert row.last_error.startswith("ConnectionError")
+
+
+def test_response_burst_is_coalesced_into_digest(
+    client, db_session, customer, auth_headers, telegram, monkeypatch
+):
+    monkeypatch.setattr(settings, "NOTIFY_NEW_ORDERS", False)
+    executors = []
+    for i in range(4):
+        user = User(
+            role="executor",
+            first_name=f"Мастер {i}",
+            city="Москва",
+            specializations_raw="плитка",
+            telegram_id=500000000 + i,
+            is_blocked=False,
+        )
+        db_session.add(user)
+        executors.append(user)
+    db_session.commit()
+
+    r = client.post(
+        "/api/v1/orders/",
+        json={
+            "title": "Плитка на кухне",
+            "description": "Фартук 3 м²",
+            "city": "Москва",
+            "categories": ["плитка"],
+            "budget_type": "negotiable",
+        },
+        headers=auth_headers(customer),
+    )
+    order_id = r.json()["id"]
+
+    def respond(executor):
+        r = client.post(
+            f"/api/v1/orders/{order_id}/responses",
+            json={"price": 15000, "discuss_price": False, "comment": "Готов взяться"},
+            headers=auth_headers(executor),
+        )
+        assert r.status_code == 204
+
+    sent = []
+
+    def send(chat_id, text, reply_markup):
+        sent.append(text)
+        return True
+
+    # 1) два отклика до прохода воркера — одно сообщение-сводка
+    respond(executors[0])
+    respond(executors[1])
+    assert db_session.query(NotificationOutbox).count() == 1
+    now = datetime.utcnow() + timedelta(seconds=1)
+    assert drain_outbox(db_session, send, now=now).sent == 1
+    assert sent == ["🛠 2 новых отклика на ваш заказ «Плитка на кухне»"]
+
+    # 2) следующие в пределах окна копятся и уходят одним сообщением после окна
+    respond(executors[2])
+    respond(executors[3])
+    row = db_session.query(NotificationOutbox).filter_by(status="pending").one()
+    assert row.batch_count == 2
+    assert drain_outbox(db_session, send, now=now).claimed == 0
+
+    later = now + timedelta(seconds=settings.NOTIFY_COALESCE_SECONDS + 1)
+    assert drain_outbox(db_session, send, now=later).sent == 1
+    assert sent[-1] == "🛠 2 новых отклика на ваш заказ «Плитка на кухне»"
+    assert len(sent) == 2
+
+
+def test_digest_plural_forms():
+    from bot.notifications import _plural
+
+    forms = ("отклик", "отклика", "откликов")
+    assert [_plural(n, *forms) for n in (1, 2, 5, 11, 12, 21, 22, 25, 111)] == [
+        "отклик", "отклика", "откликов", "откликов", "откликов",
+        "отклик", "отклика", "откликов", "откликов",
+    ]
@@ -0,0 +1,180 @@
+# tests/test_order_events.py
+
+import asyncio
+import json
+from urllib.parse import urlencode
+
+from tests.conftest import build_init_data
+from app.main import app
+from app.services.order_events import order_events
+
+
+def _parse_frame(frame: bytes) -> dict:
+    lines = frame.decode("utf-8").strip().splitlines()
+    fields = dict(line.split(": ", 1) for line in lines)
+    return {"event": fields["event"], "data": json.loads(fields["data"])}
+
+
+def test_order_stream_auth(client, customer, executor, auth_headers):
+    # без initData
+    r = client.get("/api/v1/orders/stream")
+    assert r.status_code == 401
+
+    # заказчику живая лента не положена
+    r = client.get("/api/v1/orders/stream", headers=auth_headers(customer))
+    assert r.status_code == 403
+
+    # initData в URL не принимается даже с верной подписью — только токен сессии
+    auth_headers(executor)  # выставляет токен бота в окружении
+    r = client.get(
+        "/api/v1/orders/stream",
+        params={"init_data": build_init_data(executor.telegram_id)},
+    )
+    assert r.status_code == 401
+
+    r = client.get("/api/v1/orders/stream", params={"token": "broken.token"})
+    assert r.status_code == 401
+
+
+def test_order_events_filtered_by_city_and_specializations(
+    client,
+    customer,
+    executor,
+    auth_headers,
+):
+    payload = {
+        "title": "Поклеить обои",
+        "description": "Две комнаты",
+        "city": "Москва",
+        "address": "ул. Тестовая, 1",
+        "categories": ["отделка"],
+        "budget_type": "negotiable",
+    }
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+
+        def call(method, url, **kwargs):
+            return loop.run_in_executor(
+                None,
+                lambda: client.request(method, url, headers=auth_headers(customer), **kwargs),
+            )
+
+        mine = order_events.subscribe(executor.id, "Москва", {"отделка", "плитка"})
+        other_city = order_events.subscribe(executor.id, "Казань", set())
+        own = order_events.subscribe(customer.id, "Москва", set())
+        try:
+            # 1) новый заказ подходящей категории
+            r = await call("POST", "/api/v1/orders/", json=payload)
+            assert r.status_code == 200
+            order_id = r.json()["id"]
+
+            event = _parse_frame(await asyncio.wait_for(mine.queue.get(), 2))
+            assert event["event"] == "created"
+            assert event["data"]["order_id"] == order_id
+            assert event["data"]["order"]["title"] == "Поклеить обои"
+
+            # 2) категория ушла из специализаций — карточку надо убрать
+            r = await call(
+                "PATCH", f"/api/v1/orders/{order_id}", json={"categories": ["электрика"]}
+            )
+            assert r.status_code == 200
+            event = _parse_frame(await asyncio.wait_for(mine.queue.get(), 2))
+            assert event == {"event": "closed", "data": {"type": "closed", "order_id": order_id}}
+
+            # 3) отмена долетает всем в городе
+            r = await call("DELETE", f"/api/v1/orders/{order_id}")
+            assert r.status_code == 204
+            event = _parse_frame(await asyncio.wait_for(mine.queue.get(), 2))
+            assert event["event"] == "closed"
+
+            await asyncio.sleep(0)
+            assert mine.queue.empty()
+            assert other_city.queue.empty()
+            # свои заказы автору не шлём
+            assert own.queue.empty()
+        finally:
+            for sub in (mine, other_city, own):
+                order_events.unsubscribe(sub)
+
+    asyncio.run(scenario())
+    assert order_events.subscribers() == 0
+
+
+def test_order_stream_delivers_events_over_http(client, customer, executor, auth_headers):
+    r = client.post("/api/v1/auth/session", headers=auth_headers(executor))
+    assert r.status_code == 200
+    token = r.json()["access_token"]
+
+    # TestClient дочитывает тело целиком, а SSE бесконечен — гоняем ASGI-приложение
+    # напрямую и читаем ответ по кускам, пока не придёт событие
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/api/v1/orders/stream",
+            "raw_path": b"/api/v1/orders/stream",
+            "query_string": urlencode({"token": token}).encode(),
+            "root_path": "",
+            "headers": [(b"host", b"testserver"), (b"accept", b"text/event-stream")],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+        }
+        request_sent = False
+        disconnected = asyncio.Event()
+        messages: asyncio.Queue = asyncio.Queue()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            await messages.put(message)
+
+        async def next_chunk() -> bytes:
+            message = await asyncio.wait_for(messages.get(), 5)
+            assert message["type"] == "http.response.body"
+            return message["body"]
+
+        task = asyncio.create_task(app(scope, receive, send))
+        try:
+            start = await asyncio.wait_for(messages.get(), 5)
+            assert start["status"] == 200
+            assert dict(start["headers"])[b"content-type"].startswith(b"text/event-stream")
+            assert await next_chunk() == b"retry: 5000\n\n"
+
+            # заказ в городе и по специализации исполнителя — создаём обычным запросом
+            r = await loop.run_in_executor(
+                None,
+                lambda: client.post(
+                    "/api/v1/orders/",
+                    json={
+                        "title": "Положить плитку",
+                        "description": "Санузел",
+                        "city": "Москва",
+                        "categories": ["плитка"],
+                        "budget_type": "negotiable",
+                    },
+                    headers=auth_headers(customer),
+                ),
+            )
+            assert r.status_code == 200
+
+            event = _parse_frame(await next_chunk())
+            assert event["event"] == "created"
+            assert event["data"]["order_id"] == r.json()["id"]
+            assert event["data"]["order"]["title"] == "Положить плитку"
+        finally:
+            disconnected.set()
+            await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+    assert order_events.subscribers() == 0
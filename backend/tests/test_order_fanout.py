@@ -0,0 +1,107 @@
+# tests/test_order_fanout.py
+
+from sqlalchemy import event
+
+from app.models.executor_subscription import ExecutorSubscription
+from app.models.notification_outbox import NotificationOutbox
+from app.models.user import User
+
+
+def _executor(db_session, telegram_id, city, specializations) -> User:
+    user = User(
+        role="executor",
+        first_name=f"Мастер {telegram_id}",
+        city=city,
+        specializations_raw=specializations,
+        telegram_id=telegram_id,
+        is_blocked=False,
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def _create_order(client, headers, categories, city="Москва") -> int:
+    r = client.post(
+        "/api/v1/orders/",
+        json={
+            "title": "Поклеить обои",
+            "description": "Две комнаты",
+            "city": city,
+            "categories": categories,
+            "budget_type": "negotiable",
+        },
+        headers=headers,
+    )
+    assert r.status_code == 200
+    return r.json()["id"]
+
+
+def _recipients(db_session) -> set:
+    rows = db_session.query(NotificationOutbox).filter_by(kind="new_order").all()
+    db_session.query(NotificationOutbox).filter_by(kind="new_order").delete()
+    db_session.commit()
+    return {row.chat_id for row in rows}
+
+
+def test_new_order_fans_out_to_matching_executors(
+    client, db_session, customer, executor, auth_headers, telegram
+):
+    painter = _executor(db_session, 600000001, "Москва", "обои,покраска")
+    _executor(db_session, 600000002, "Казань", "обои")
+    _executor(db_session, 600000003, "Москва", "электрика")
+
+    # индекс построен из профилей: по строке на (город, специализация)
+    assert {
+        (s.city, s.category) for s in db_session.query(ExecutorSubscription).filter_by(user_id=painter.id)
+    } == {("Москва", "обои"), ("Москва", "покраска")}
+
+    # 1) рассылка идёт одним INSERT ... SELECT по индексу, без users
+    statements = []
+    engine = db_session.get_bind().engine
+
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        _create_order(client, auth_headers(customer), ["обои", "плитка"])
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    fanout = [s for s in statements if "INSERT INTO notification_outbox" in s]
+    assert len(fanout) == 1
+    assert "executor_subscriptions" in fanout[0] and "users" not in fanout[0]
+
+    outbox = db_session.query(NotificationOutbox).filter_by(kind="new_order").first()
+    assert "Поклеить обои" in outbox.text
+    assert _recipients(db_session) == {painter.telegram_id, executor.telegram_id}
+
+    # 2) профиль изменился — индекс следом: исполнитель переехал и сменил специализацию
+    r = client.put(
+        "/api/v1/users/me",
+        json={"city": "Казань", "specializations": ["сантехника"]},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 200
+    _create_order(client, auth_headers(customer), ["плитка"])
+    assert _recipients(db_session) == set()
+    _create_order(client, auth_headers(customer), ["сантехника"], city="Казань")
+    assert _recipients(db_session) == {executor.telegram_id}
+
+
+def test_blocked_executor_is_not_notified(
+    client, db_session, customer, admin, auth_headers, telegram
+):
+    painter = _executor(db_session, 600000011, "Москва", "обои")
+
+    r = client.patch(f"/api/v1/admin/users/{painter.id}/block", headers=auth_headers(admin))
+    assert r.status_code == 200
+    assert db_session.query(ExecutorSubscription).filter_by(user_id=painter.id).count() == 0
+    _create_order(client, auth_headers(customer), ["обои"])
+    assert _recipients(db_session) == set()
+
+    r = client.patch(f"/api/v1/admin/users/{painter.id}/unblock", headers=auth_headers(admin))
+    assert r.status_code == 200
+    _create_order(client, auth_headers(customer), ["обои"])
+    assert _recipients(db_session) == {painter.telegram_id}
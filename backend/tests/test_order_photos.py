@@ -0,0 +1,305 @@
+# tests/test_order_photos.py
+
+import hashlib
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from sqlalchemy import event
+
+from app.api.v1.endpoints import orders
+from app.db.migrations import backfill_order_photos
+from app.models.order import Order
+from app.models.order_photo import OrderPhoto
+from app.services import order_photos, uploads
+
+
+def _image_bytes(size=(2400, 1600), fmt="PNG", mode="RGB") -> bytes:
+    buf = BytesIO()
+    Image.new(mode, size, color=(200, 120, 40)).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+@pytest.fixture()
+def photo_dir(tmp_path, monkeypatch):
+    path = tmp_path / "orders"
+    monkeypatch.setattr(order_photos, "ORDER_PHOTO_DIR", path)
+    return path
+
+
+def _create_order(client, customer, auth_headers) -> int:
+    r = client.post(
+        "/api/v1/orders/",
+        json={
+            "title": "Покраска стен",
+            "description": "Две комнаты",
+            "city": "Москва",
+            "categories": ["отделка"],
+            "budget_type": "negotiable",
+        },
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    return r.json()["id"]
+
+
+def test_upload_generates_webp_variants(client, customer, executor, auth_headers, photo_dir):
+    order_id = _create_order(client, customer, auth_headers)
+
+    # 1) загрузка: рядом с оригиналом — thumb и medium в WebP
+    r = client.post(
+        f"/api/v1/orders/{order_id}/photos",
+        files=[("files", ("room.png", _image_bytes(), "image/png"))],
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    (photo_url,) = r.json()["photos"]
+    stem = photo_url.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+
+    for variant, max_side in (("thumb", 320), ("medium", 1280)):
+        with Image.open(photo_dir / f"{stem}.{variant}.webp") as img:
+            assert img.format == "WEBP"
+            assert max(img.size) == max_side
+            assert img.size[0] / img.size[1] == pytest.approx(1.5, rel=0.01)
+
+    # 2) карточки ссылаются на варианты
+    r = client.get(f"/api/v1/orders/{order_id}", headers=auth_headers(customer))
+    body = r.json()
+    assert body["photos"] == [photo_url]
+    assert body["photo_thumbs"] == [photo_url.rsplit(".", 1)[0] + ".thumb.webp"]
+    assert body["photo_medium"] == [photo_url.rsplit(".", 1)[0] + ".medium.webp"]
+
+    r = client.get("/api/v1/orders/available", headers=auth_headers(executor))
+    (card,) = r.json()["items"]
+    assert card["photo_thumbs"] == body["photo_thumbs"]
+
+
+def test_upload_rejects_non_image(client, customer, auth_headers, photo_dir):
+    order_id = _create_order(client, customer, auth_headers)
+
+    r = client.post(
+        f"/api/v1/orders/{order_id}/photos",
+        files=[("files", ("room.jpg", b"not an image", "image/jpeg"))],
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 400
+    assert not photo_dir.exists() or not any(photo_dir.iterdir())
+
+
+def test_legacy_photos_are_backfilled(client, db_session, customer, auth_headers, photo_dir):
+    order_id = _create_order(client, customer, auth_headers)
+    photo_dir.mkdir()
+    (photo_dir / "o1_1.jpg").write_bytes(b"x" * 10)
+    (photo_dir / "o1_2.jpg").write_bytes(b"y" * 20)
+    (photo_dir / "o1_2.thumb.webp").write_bytes(b"t")
+
+    order = db_session.get(Order, order_id)
+    order.photos_raw = ",".join(
+        order_photos.order_photo_url(name) for name in ("o1_1.jpg", "o1_2.jpg", "o1_1.jpg")
+    )
+    order.has_photos = True
+    db_session.commit()
+
+    assert backfill_order_photos(db_session.get_bind()) == 1
+    # повторный запуск ничего не добавляет
+    assert backfill_order_photos(db_session.get_bind()) == 0
+
+    rows = db_session.query(OrderPhoto).filter_by(order_id=order_id).order_by(OrderPhoto.position).all()
+    assert [(r.position, r.url.rsplit("/", 1)[-1], r.size_bytes) for r in rows] == [
+        (0, "o1_1.jpg", 10),
+        (1, "o1_2.jpg", 20),
+    ]
+
+    # превью есть только у второго — у первого карточка берёт оригинал
+    r = client.get(f"/api/v1/orders/{order_id}", headers=auth_headers(customer))
+    assert [u.rsplit("/", 1)[-1] for u in r.json()["photo_thumbs"]] == ["o1_1.jpg", "o1_2.thumb.webp"]
+
+
+def test_feed_loads_photos_in_one_query(client, db_session, customer, executor, auth_headers):
+    for i in range(3):
+        order_id = _create_order(client, customer, auth_headers)
+        db_session.add_all(
+            OrderPhoto(order_id=order_id, position=p, url=f"https://x/o{order_id}_{p}.jpg")
+            for p in range(2)
+        )
+    db_session.commit()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    engine = db_session.get_bind().engine
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        r = client.get("/api/v1/orders/all-active", headers=auth_headers(executor))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert len(items) == 3
+    assert all(len(item["photos"]) == 2 for item in items)
+    assert len([sql for sql in statements if "FROM order_photos" in sql]) == 1
+
+
+def test_upload_streams_and_aborts_oversized(client, customer, auth_headers, photo_dir, monkeypatch):
+    order_id = _create_order(client, customer, auth_headers)
+    content = _image_bytes(size=(600, 400))
+
+    # части пишутся на диск прямо из парсера — считаем, сколько байт дошло до файлов
+    written = []
+    write_chunk = uploads._write_chunk
+
+    def counting_write(out, digest, chunk):
+        written.append(len(chunk))
+        write_chunk(out, digest, chunk)
+
+    monkeypatch.setattr(uploads, "_write_chunk", counting_write)
+
+    # 1) слишком большой файл: 400 на первом куске сверх лимита — дальше не пишется,
+    # временных файлов не остаётся
+    limit = len(content) // 2
+    monkeypatch.setattr(orders, "MAX_BYTES", limit)
+    r = client.post(
+        f"/api/v1/orders/{order_id}/photos",
+        files=[("files", ("big.png", content, "image/png"))],
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Файл слишком большой (макс 8MB)"
+    assert sum(written) <= limit
+    assert not photo_dir.exists() or list(photo_dir.iterdir()) == []
+
+    # недопустимый тип отклоняется по заголовку части, до её данных
+    written.clear()
+    r = client.post(
+        f"/api/v1/orders/{order_id}/photos",
+        files=[("files", ("doc.gif", content, "image/gif"))],
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 400
+    assert written == []
+
+    # 2) в лимите: файл назван по sha256 и собран из кусков без потерь
+    monkeypatch.setattr(orders, "MAX_BYTES", len(content))
+    r = client.post(
+        f"/api/v1/orders/{order_id}/photos",
+        files=[("files", ("ok.png", content, "image/png"))],
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    assert sum(written) == len(content)
+    (url,) = r.json()["photos"]
+    filename = f"o{order_id}_{hashlib.sha256(content).hexdigest()[:32]}.png"
+    assert url.endswith("/orders/" + filename)
+    assert (photo_dir / filename).read_bytes() == content
+    assert not [p for p in photo_dir.iterdir() if p.name.startswith(".")]
+
+    # 3) то же фото ещё раз — не дублируется
+    r = client.post(
+        f"/api/v1/orders/{order_id}/photos",
+        files=[("files", ("again.png", content, "image/png"))],
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    assert r.json()["photos"] == [url]
+
+
+def test_added_photo_shows_up_in_feed_changes(
+    client, customer, executor, auth_headers, photo_dir, monkeypatch
+):
+    monkeypatch.setattr(orders, "CHANGES_SETTLE_SECONDS", 0)
+    order_id = _create_order(client, customer, auth_headers)
+
+    def upload(color):
+        buf = BytesIO()
+        Image.new("RGB", (400, 300), color=color).save(buf, format="PNG")
+        r = client.post(
+            f"/api/v1/orders/{order_id}/photos",
+            files=[("files", ("room.png", buf.getvalue(), "image/png"))],
+            headers=auth_headers(customer),
+        )
+        assert r.status_code == 200
+        return r.json()["photos"]
+
+    def changes(since=None):
+        params = {"since": since} if since else {}
+        r = client.get(
+            "/api/v1/orders/available/changes", params=params, headers=auth_headers(executor)
+        )
+        assert r.status_code == 200
+        return r.json()
+
+    upload((10, 10, 10))
+    since = changes()["next_since"]
+    assert changes(since)["items"] == []
+
+    # второе фото: строка orders не меняется сама, но заказ должен попасть в дельту
+    photos = upload((200, 10, 10))
+    assert len(photos) == 2
+    delta = changes(since)
+    assert [o["id"] for o in delta["items"]] == [order_id]
+    assert delta["items"][0]["photos"] == photos
+
+
+def test_failed_upload_leaves_no_files(client, db_session, customer, auth_headers, photo_dir, monkeypatch):
+    order_id = _create_order(client, customer, auth_headers)
+
+    # 1) первый файл — картинка, второй битый: превью первого уже записаны, но убираются
+    r = client.post(
+        f"/api/v1/orders/{order_id}/photos",
+        files=[
+            ("files", ("room.png", _image_bytes(size=(600, 400)), "image/png")),
+            ("files", ("broken.jpg", b"not an image", "image/jpeg")),
+        ],
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 400
+    assert list(photo_dir.iterdir()) == []
+
+    # 2) файлы опубликованы, а заказ тем временем удалили — _save отдаёт 404, файлы убираются
+    publish = orders.publish_upload
+
+    async def publish_and_delete_order(staged, target):
+        await publish(staged, target)
+        assert target.exists()
+        db_session.query(Order).filter(Order.id == order_id).delete()
+        db_session.flush()
+
+    monkeypatch.setattr(orders, "publish_upload", publish_and_delete_order)
+    r = client.post(
+        f"/api/v1/orders/{order_id}/photos",
+        files=[("files", ("room.png", _image_bytes(size=(600, 400)), "image/png"))],
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 404
+    assert list(photo_dir.iterdir()) == []
+
+
+def test_oversized_request_is_rejected_before_parsing(client, customer, auth_headers, photo_dir, monkeypatch):
+    order_id = _create_order(client, customer, auth_headers)
+    monkeypatch.setattr(orders, "MAX_BYTES", 1024)
+    monkeypatch.setattr(orders, "MULTIPART_OVERHEAD", 0)
+    # три файла по 1000 байт — каждый в лимите, но с заголовками частей
+    # тело больше 3 × 1 КБ
+    content = b"\x89PNG" + b"x" * 996
+    boundary = "photo-boundary"
+    part = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="files"; filename="big.png"\r\n'
+        "Content-Type: image/png\r\n\r\n"
+    ).encode() + content + b"\r\n"
+    body = part * 3 + f"--{boundary}--\r\n".encode()
+    headers = {**auth_headers(customer), "Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+    # 1) Content-Length больше лимита — отказ до чтения тела
+    r = client.post(f"/api/v1/orders/{order_id}/photos", content=body, headers=headers)
+    assert r.status_code == 413
+
+    # 2) без Content-Length (chunked) — чтение обрывается на превышении
+    def chunks():
+        for i in range(0, len(body), 512):
+            yield body[i:i + 512]
+
+    r = client.post(f"/api/v1/orders/{order_id}/photos", content=chunks(), headers=headers)
+    assert r.status_code == 413
+    assert not photo_dir.exists() or list(photo_dir.iterdir()) == []
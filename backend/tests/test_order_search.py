@@ -0,0 +1,94 @@
+# tests/test_order_search.py
+
+from app.models.order import Order
+
+
+def _create_order(client, headers, title, description):
+    r = client.post(
+        "/api/v1/orders/",
+        json={
+            "title": title,
+            "description": description,
+            "city": "Москва",
+            "categories": ["отделка"],
+            "budget_type": "negotiable",
+        },
+        headers=headers,
+    )
+    assert r.status_code == 200
+    return r.json()["id"]
+
+
+def test_order_search(
+    client,
+    db_session,
+    customer,
+    executor,
+    auth_headers,
+):
+    tiles_id = _create_order(
+        client, auth_headers(customer), "Положить плитку в ванной", "Ванная 6 м2, плитка наша"
+    )
+    paint_id = _create_order(
+        client, auth_headers(customer), "Покрасить стены", "Две комнаты, стены под покраску, плитку не трогать"
+    )
+    _create_order(client, auth_headers(customer), "Собрать шкаф", "Шкаф-купе из Икеи")
+
+    # 1) Находит по префиксу слова, заголовок весомее описания
+    r = client.get(
+        "/api/v1/orders/search",
+        params={"q": "плитк"},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 200
+    ids = [o["id"] for o in r.json()]
+    assert ids == [tiles_id, paint_id]
+
+    # 2) Правка заказа переиндексирует его
+    r = client.patch(
+        f"/api/v1/orders/{paint_id}",
+        json={"description": "Две комнаты, стены под покраску"},
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    r = client.get("/api/v1/orders/search", params={"q": "плитку"}, headers=auth_headers(executor))
+    assert [o["id"] for o in r.json()] == [tiles_id]
+
+    # 3) Отменённый заказ пропадает из поиска
+    r = client.delete(f"/api/v1/orders/{tiles_id}", headers=auth_headers(customer))
+    assert r.status_code == 204
+    r = client.get("/api/v1/orders/search", params={"q": "плитку"}, headers=auth_headers(executor))
+    assert r.json() == []
+
+    # 4) Синтаксис FTS во вводе не ломает запрос
+    r = client.get(
+        "/api/v1/orders/search",
+        params={"q": 'шкаф")* ^'},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 200
+    assert len(r.json()) == 1
+
+    # 5) Поиск — только для исполнителей
+    r = client.get("/api/v1/orders/search", params={"q": "шкаф"}, headers=auth_headers(customer))
+    assert r.status_code == 403
+
+    # 6) Свой заказ исполнитель в поиске не видит, чужой с теми же словами — видит
+    own = Order(
+        customer_id=executor.id,
+        title="Собрать шкаф в прихожей",
+        description="Свой шкаф",
+        city="Москва",
+        categories_raw="отделка",
+        budget_type="negotiable",
+        status="active",
+        has_photos=False,
+    )
+    db_session.add(own)
+    db_session.commit()
+
+    r = client.get("/api/v1/orders/search", params={"q": "шкаф"}, headers=auth_headers(executor))
+    assert r.status_code == 200
+    ids = [o["id"] for o in r.json()]
+    assert len(ids) == 1
+    assert own.id not in ids
@@ -0,0 +1,328 @@
+# tests/test_orders_feed.py
+
+from app.models.order import Order
+
+
+def _make_order(db_session, customer, title: str, categories: str = "отделка") -> Order:
+    order = Order(
+        customer_id=customer.id,
+        title=title,
+        description="Описание",
+        city="Москва",
+        address="ул. Тестовая, 1",
+        categories_raw=categories,
+        budget_type="negotiable",
+        status="active",
+        has_photos=False,
+    )
+    db_session.add(order)
+    db_session.commit()
+    db_session.refresh(order)
+    return order
+
+
+def test_feed_cursor_pagination(
+    client,
+    db_session,
+    customer,
+    executor,
+    auth_headers,
+):
+    created = [_make_order(db_session, customer, f"Заказ {i}") for i in range(5)]
+    expected_ids = [o.id for o in sorted(created, key=lambda o: (o.created_at, o.id), reverse=True)]
+
+    # 1) Первая страница
+    r = client.get(
+        "/api/v1/orders/all-active",
+        params={"limit": 2},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 200
+    page = r.json()
+    assert len(page["items"]) == 2
+    assert page["next_cursor"]
+    seen = [o["id"] for o in page["items"]]
+
+    # 2) Между страницами появляется новый заказ — он не должен сдвинуть выдачу
+    fresh = _make_order(db_session, customer, "Свежий заказ")
+
+    cursor = page["next_cursor"]
+    while cursor:
+        r = client.get(
+            "/api/v1/orders/all-active",
+            params={"limit": 2, "cursor": cursor},
+            headers=auth_headers(executor),
+        )
+        assert r.status_code == 200
+        page = r.json()
+        seen.extend(o["id"] for o in page["items"])
+        cursor = page["next_cursor"]
+
+    assert seen == expected_ids
+    assert fresh.id not in seen
+
+    # 3) В /available фильтр по категориям не ломает страницы
+    _make_order(db_session, customer, "Чужая категория", categories="электрика")
+    r = client.get(
+        "/api/v1/orders/available",
+        params={"limit": 3},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 200
+    page = r.json()
+    assert len(page["items"]) == 3
+    assert all("электрика" not in o["categories"] for o in page["items"])
+
+    # 4) Мусорный курсор
+    r = client.get(
+        "/api/v1/orders/available",
+        params={"cursor": "not-a-cursor"},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 400
+
+
+def test_feed_category_filter_and_backfill(
+    client,
+    db_session,
+    customer,
+    executor,
+    auth_headers,
+):
+    from sqlalchemy import update
+
+    from app.db.migrations import backfill_order_categories
+    from app.models.order_category import OrderCategory
+
+    plumbing = _make_order(db_session, customer, "Сантехника", categories="сантехника,трубы")
+    tiles = _make_order(db_session, customer, "Плитка", categories="плитка")
+
+    # 1) Категории синхронизируются в order_categories при записи
+    links = {c.category for c in plumbing.category_links}
+    assert links == {"сантехника", "трубы"}
+
+    # 2) Явный фильтр по категориям
+    r = client.get(
+        "/api/v1/orders/available",
+        params={"categories": "трубы"},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 200
+    ids = [o["id"] for o in r.json()["items"]]
+    assert plumbing.id in ids
+    assert tiles.id not in ids
+
+    # 3) Без фильтра — по специализациям исполнителя (отделка, плитка)
+    r = client.get("/api/v1/orders/available", headers=auth_headers(executor))
+    ids = [o["id"] for o in r.json()["items"]]
+    assert tiles.id in ids
+    assert plumbing.id not in ids
+
+    # 4) Бэкфилл из старой колонки для заказов без строк в order_categories
+    db_session.query(OrderCategory).filter(OrderCategory.order_id == tiles.id).delete()
+    db_session.execute(
+        update(Order).where(Order.id == tiles.id).values(categories_raw="плитка,отделка")
+    )
+    db_session.commit()
+
+    backfill_order_categories(db_session.get_bind())
+
+    rows = db_session.query(OrderCategory.category).filter(OrderCategory.order_id == tiles.id).all()
+    assert {c for (c,) in rows} == {"плитка", "отделка"}
+
+
+def test_feed_city_cache(
+    client,
+    db_session,
+    customer,
+    executor,
+    admin,
+    auth_headers,
+):
+    first = _make_order(db_session, customer, "Плитка в ванной", categories="плитка")
+
+    # 1) Первый запрос наполняет кэш города, второй берёт из него
+    for _ in range(2):
+        r = client.get("/api/v1/orders/available", headers=auth_headers(executor))
+        assert r.status_code == 200
+        assert [o["id"] for o in r.json()["items"]] == [first.id]
+
+    r = client.get("/api/v1/admin/stats/feed-cache", headers=auth_headers(admin))
+    assert r.status_code == 200
+    stats = r.json()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+    # 2) Новый заказ через API сбрасывает кэш города
+    r = client.post(
+        "/api/v1/orders/",
+        json={
+            "title": "Отделка балкона",
+            "description": "Обшить балкон вагонкой",
+            "city": "Москва",
+            "categories": ["отделка"],
+            "budget_type": "negotiable",
+        },
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    second_id = r.json()["id"]
+
+    r = client.get("/api/v1/orders/available", headers=auth_headers(executor))
+    assert [o["id"] for o in r.json()["items"]] == [second_id, first.id]
+
+    # 3) Отмена заказа убирает его из ленты
+    r = client.delete(f"/api/v1/orders/{first.id}", headers=auth_headers(customer))
+    assert r.status_code == 204
+
+    r = client.get("/api/v1/orders/available", headers=auth_headers(executor))
+    assert [o["id"] for o in r.json()["items"]] == [second_id]
+
+
+def test_feed_relevance_ranking(
+    client,
+    db_session,
+    customer,
+    executor,
+    auth_headers,
+):
+    plain = _make_order(db_session, customer, "Только плитка", categories="плитка")
+    both = _make_order(db_session, customer, "Плитка и отделка", categories="плитка,отделка")
+    rich = _make_order(db_session, customer, "Отделка с бюджетом", categories="отделка")
+    rich.budget_amount = 50000
+    rich.has_photos = True
+    db_session.commit()
+    _make_order(db_session, customer, "Не по профилю", categories="электрика")
+
+    # Совпадение по двум категориям > бюджет и фото > просто совпадение
+    seen = []
+    cursor = None
+    while True:
+        params = {"sort": "relevance", "limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/api/v1/orders/available", params=params, headers=auth_headers(executor))
+        assert r.status_code == 200
+        page = r.json()
+        seen.extend(o["id"] for o in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == [both.id, rich.id, plain.id]
+
+
+def test_feed_radius(
+    client,
+    db_session,
+    customer,
+    executor,
+    auth_headers,
+):
+    # Исполнитель в центре Москвы
+    executor.lat, executor.lon = 55.7558, 37.6173
+    db_session.commit()
+
+    near = _make_order(db_session, customer, "Химки, рядом с МКАД")
+    near.city = "Химки"
+    near.lat, near.lon = 55.8970, 37.4297
+    far = _make_order(db_session, customer, "Санкт-Петербург")
+    far.lat, far.lon = 59.9343, 30.3351
+    _make_order(db_session, customer, "Без координат")
+    db_session.commit()
+    assert near.geo_cell is not None
+
+    # 1) По городу "Москва" заказ из Химок не виден
+    r = client.get("/api/v1/orders/available", headers=auth_headers(executor))
+    assert near.id not in [o["id"] for o in r.json()["items"]]
+
+    # 2) По радиусу — виден, с расстоянием; дальний и без координат — нет
+    r = client.get(
+        "/api/v1/orders/available",
+        params={"radius_km": 30},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert [o["id"] for o in items] == [near.id]
+    assert 15 < items[0]["distance_km"] < 25
+
+    # 3) Явная точка вместо координат профиля
+    r = client.get(
+        "/api/v1/orders/available",
+        params={"radius_km": 50, "lat": 59.93, "lon": 30.33, "sort": "relevance"},
+        headers=auth_headers(executor),
+    )
+    assert [o["id"] for o in r.json()["items"]] == [far.id]
+
+    # 4) Без координат вообще — 400
+    executor.lat = executor.lon = None
+    db_session.commit()
+    r = client.get(
+        "/api/v1/orders/available",
+        params={"radius_km": 30},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 400
+
+
+def test_feed_changes_since(
+    client,
+    db_session,
+    customer,
+    executor,
+    auth_headers,
+    monkeypatch,
+):
+    from app.api.v1.endpoints import orders as orders_endpoints
+
+    monkeypatch.setattr(orders_endpoints, "CHANGES_SETTLE_SECONDS", 0)
+
+    def changes(since=None, **params):
+        if since is not None:
+            params["since"] = since
+        r = client.get(
+            "/api/v1/orders/available/changes",
+            params=params,
+            headers=auth_headers(executor),
+        )
+        assert r.status_code == 200
+        return r.json()
+
+    # 1) Отметка без изменений
+    start = changes()
+    assert start["items"] == [] and start["removed"] == []
+    since = start["next_since"]
+
+    # 2) Новые заказы: подходящий — в items, чужая категория — tombstone
+    first = _make_order(db_session, customer, "Первый")
+    other = _make_order(db_session, customer, "Электрика", categories="электрика")
+    delta = changes(since)
+    assert [o["id"] for o in delta["items"]] == [first.id]
+    assert delta["removed"] == [other.id]
+    since = delta["next_since"]
+
+    # 3) Ничего не менялось — пусто
+    assert changes(since)["items"] == []
+
+    # 4) Правка и отмена — по одной, с докачкой через has_more
+    second = _make_order(db_session, customer, "Второй")
+    r = client.delete(f"/api/v1/orders/{first.id}", headers=auth_headers(customer))
+    assert r.status_code == 204
+
+    delta = changes(since, limit=1)
+    assert [o["id"] for o in delta["items"]] == [second.id]
+    assert delta["has_more"] is True
+
+    delta = changes(delta["next_since"], limit=1)
+    assert delta["items"] == [] and delta["removed"] == [first.id]
+    assert delta["has_more"] is False
+
+    # 5) Мусорная отметка
+    r = client.get(
+        "/api/v1/orders/available/changes",
+        params={"since": "garbage"},
+        headers=auth_headers(executor),
+    )
+    assert r.status_code == 400
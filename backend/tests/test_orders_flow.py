@@ -43,7 +43,7 @@ def test_order_lifecycle(
     )
     print("DEBUG /orders/available:", r.status_code, r.text)  # 👈 добавить
     assert r.status_code == 200
-    orders = r.json()
+    orders = r.json()["items"]
     assert any(o["id"] == order_id for o in orders)
 
     # 3) Исполнитель отправляет отклик
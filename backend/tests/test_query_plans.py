@@ -0,0 +1,138 @@
+# tests/test_query_plans.py
+#
+# Горячие запросы из эндпоинтов не должны скатываться в полный скан таблицы.
+# SQLite в EXPLAIN QUERY PLAN пишет "SCAN <table>" без "USING ... INDEX"
+# ровно в этом случае.
+
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from app.api.v1.endpoints import orders
+from app.models.order import Order
+from app.models.order_photo import OrderPhoto
+from app.models.response import Response
+from app.models.review import Review
+from app.models.support_ticket import SupportTicket
+from app.models.user import User
+from app.services.order_fanout import matching_executors_query
+from app.utils import list_to_str
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def _plan(db_session, query) -> list:
+    conn = db_session.connection()
+    compiled = query.statement.compile(
+        dialect=conn.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params = tuple(compiled.params[k] for k in compiled.positiontup)
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).all()
+    return [row[3] for row in rows]
+
+
+def _assert_no_full_scan(db_session, name, query):
+    plan = _plan(db_session, query)
+    scans = [line for line in plan if FULL_SCAN.match(line)]
+    assert not scans, f"{name}: full table scan {scans} in plan {plan}"
+
+
+def _feed_user() -> User:
+    # исполнитель с городом, специализациями и координатами в профиле —
+    # _feed_filters берёт из него всё, чего нет в параметрах
+    return User(
+        id=1,
+        role="executor",
+        city="Москва",
+        specializations_raw=list_to_str(["плитка", "отделка"]),
+        lat=55.75,
+        lon=37.61,
+    )
+
+
+def _feed_queries(db_session) -> dict:
+    """Запросы ленты — теми же хелперами, что и в эндпоинтах orders."""
+    current = _feed_user()
+    after = (datetime.utcnow(), 100)
+    threshold = datetime.utcnow() - timedelta(days=orders.FRESH_DAYS)
+
+    feed_city, near, wanted = orders._feed_filters(current, None, None, False, None, None, None)
+    assert feed_city == "Москва" and near is None and wanted
+    _, radius, radius_wanted = orders._feed_filters(current, None, None, False, 30, None, None)
+    assert radius is not None
+
+    all_active = orders._base_feed_query(db_session, current, None, None, set())
+    return {
+        "orders/all-active": orders._feed_page_query(all_active, after, 20),
+        "orders/available city cache": orders._city_cards_query(db_session, feed_city),
+        "orders/available": orders._feed_page_query(
+            orders._base_feed_query(db_session, current, feed_city, threshold, wanted), after, 20
+        ),
+        "orders/available radius": orders._feed_page_query(
+            orders._base_feed_query(db_session, current, None, None, radius_wanted, radius), None, 20
+        ),
+        "orders/available/changes": orders._changes_query(
+            db_session, after, datetime.utcnow(), 100
+        ),
+        "orders/available/changes visible": orders._base_feed_query(
+            db_session, current, feed_city, None, wanted
+        ).filter(Order.id.in_([1, 2, 3])).with_entities(Order.id),
+    }
+
+
+def test_hot_queries_use_indexes(db_session):
+    since = datetime.utcnow() - timedelta(days=7)
+
+    hot_queries = {
+        **_feed_queries(db_session),
+        "orders/my": db_session.query(Order)
+        .filter(Order.customer_id == 1)
+        .order_by(Order.created_at.desc()),
+        "users/me counters": db_session.query(func.count(Order.id))
+        .filter(Order.status == "done", Order.executor_id == 1),
+        "responses duplicate check": db_session.query(Response)
+        .filter(
+            Response.order_id == 1,
+            Response.executor_id == 1,
+            Response.status == "waiting",
+        ),
+        "orders/{id}/responses": db_session.query(Response)
+        .filter(Response.order_id == 1)
+        .order_by(Response.created_at.asc()),
+        "executor/responses": db_session.query(Response)
+        .filter(Response.executor_id == 1)
+        .order_by(Response.created_at.desc()),
+        "reviews/for-user": db_session.query(Review)
+        .filter(Review.target_user_id == 1, Review.status != "hidden")
+        .order_by(Review.created_at.desc()),
+        "rating": db_session.query(func.avg(Review.rating), func.count(Review.id))
+        .filter(Review.target_user_id == 1, Review.status == "approved"),
+        "support/my": db_session.query(SupportTicket)
+        .filter(SupportTicket.user_id == 1)
+        .order_by(SupportTicket.created_at.desc()),
+        "admin/stats orders": db_session.query(func.count(Order.id))
+        .filter(Order.created_at >= since),
+        "admin/stats responses": db_session.query(func.count(Response.id))
+        .filter(Response.created_at >= since),
+        "admin/stats reviews": db_session.query(func.count(Review.id))
+        .filter(Review.created_at >= since),
+        "orders/create fan-out": matching_executors_query(
+            db_session, "Москва", ["плитка", "отделка"], exclude_user_id=1
+        ),
+        "orders feed photos": db_session.query(OrderPhoto)
+        .filter(OrderPhoto.order_id.in_([1, 2, 3]))
+        .order_by(OrderPhoto.order_id, OrderPhoto.position),
+    }
+
+    for name, query in hot_queries.items():
+        _assert_no_full_scan(db_session, name, query)
+
+
+def test_radius_feed_uses_geo_cells(db_session):
+    # расстояние считается только для кандидатов из ячеек сетки
+    current = _feed_user()
+    _, near, _ = orders._feed_filters(current, None, None, True, 30, None, None)
+    query = orders._base_feed_query(db_session, current, None, None, set(), near)
+    plan = _plan(db_session, query)
+    assert any("ix_orders_geo_cell_status" in line for line in plan), plan
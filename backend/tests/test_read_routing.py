@@ -0,0 +1,161 @@
+# tests/test_read_routing.py
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import get_async_db, get_db
+from app.core.config import settings
+from app.db import session as sync_session
+from app.db.async_session import ThreadpoolDb
+from app.db.base import Base
+from app.db.routing import read_database_url, recent_writers
+from app.db.sqlite import PROFILE_PRODUCTION, engine_kwargs, install_sqlite_pragmas
+from app.main import app
+from app.models.user import User
+from app.services.feed_cache import feed_cache
+from app.services.init_data_cache import init_data_cache
+
+
+@pytest.fixture()
+def routed(tmp_path, monkeypatch):
+    """Основная база в WAL и read-only пул на тот же файл."""
+    monkeypatch.setattr(settings, "SQLITE_PROFILE", PROFILE_PRODUCTION)
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{tmp_path / 'main.db'}")
+    monkeypatch.setattr(settings, "SQLITE_READ_POOL", True)
+
+    primary_url = settings.DATABASE_URL
+    primary = create_engine(primary_url, **engine_kwargs(primary_url))
+    install_sqlite_pragmas(primary)
+    Base.metadata.create_all(bind=primary)
+
+    read_url = read_database_url()
+    assert "mode=ro" in read_url
+    reader = create_engine(read_url, **engine_kwargs(read_url))
+    install_sqlite_pragmas(reader, read_only=True)
+
+    reads = []
+    event.listen(reader, "before_cursor_execute", lambda *args: reads.append(args[2]))
+
+    PrimarySession = sessionmaker(autocommit=False, autoflush=False, bind=primary)
+    monkeypatch.setattr(sync_session, "ReadSessionLocal", sessionmaker(autoflush=False, bind=reader))
+
+    def override_get_db():
+        db = PrimarySession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        db = PrimarySession()
+        try:
+            yield ThreadpoolDb(db)
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    feed_cache.clear()
+    init_data_cache.clear()
+    recent_writers.clear()
+
+    with PrimarySession() as db:
+        db.add_all([
+            User(role="customer", first_name="Клиент", city="Москва", telegram_id=111111111),
+            User(role="executor", first_name="Исполнитель", city="Москва",
+                 specializations_raw="отделка", telegram_id=222222222),
+        ])
+        db.commit()
+        users = {u.role: u for u in db.query(User).all()}
+        for u in users.values():
+            db.expunge(u)
+
+    with TestClient(app) as c:
+        yield c, users, reads, reader
+
+    app.dependency_overrides.clear()
+    primary.dispose()
+    reader.dispose()
+
+
+def test_reads_go_to_read_pool_except_right_after_own_write(routed, auth_headers):
+    client, users, reads, reader = routed
+    customer, executor = users["customer"], users["executor"]
+
+    # 1) GET-списки читаются из read-only пула
+    r = client.get("/api/v1/orders/my", headers=auth_headers(customer))
+    assert r.status_code == 200
+    assert r.json() == []
+    assert any("FROM orders" in sql for sql in reads)
+
+    r = client.get(f"/api/v1/reviews/for-user/{executor.id}")
+    assert r.status_code == 200
+
+    # 2) после своей записи заказчик читает с основной базы и видит заказ
+    r = client.post(
+        "/api/v1/orders/",
+        json={
+            "title": "Плитка в ванной",
+            "description": "Положить плитку",
+            "city": "Москва",
+            "categories": ["отделка"],
+            "budget_type": "negotiable",
+        },
+        headers=auth_headers(customer),
+    )
+    assert r.status_code == 200
+    assert recent_writers.is_recent(customer.id)
+    assert not recent_writers.is_recent(executor.id)
+
+    reads.clear()
+    r = client.get("/api/v1/orders/my", headers=auth_headers(customer))
+    assert r.status_code == 200
+    assert [o["title"] for o in r.json()] == ["Плитка в ванной"]
+    assert reads == []
+
+    # 3) остальные по-прежнему читают из пула — и тоже видят заказ (тот же WAL-файл)
+    r = client.get("/api/v1/orders/available", headers=auth_headers(executor))
+    assert r.status_code == 200
+    assert [o["title"] for o in r.json()["items"]] == ["Плитка в ванной"]
+    assert any("FROM orders" in sql for sql in reads)
+
+    # 4) писать через read-only пул нельзя
+    with reader.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("DELETE FROM orders")
+
+
+def test_session_token_reads_do_not_reload_the_user(routed, auth_headers):
+    client, users, reads, reader = routed
+    customer, executor = users["customer"], users["executor"]
+
+    def bearer(user) -> dict:
+        r = client.post("/api/v1/auth/session", headers=auth_headers(user))
+        assert r.status_code == 200
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    customer_headers, executor_headers = bearer(customer), bearer(executor)
+    recent_writers.clear()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", listener)
+    try:
+        # 1) списку заказчика хватает id из токена — строку users не читаем ни в одной базе
+        r = client.get("/api/v1/orders/my", headers=customer_headers)
+        assert r.status_code == 200
+        assert not [sql for sql in statements if "FROM users" in sql]
+
+        # 2) ленте нужны город и специализации — дочитываются из read-only пула
+        statements.clear()
+        reads.clear()
+        r = client.get("/api/v1/orders/available", headers=executor_headers)
+        assert r.status_code == 200
+        assert len([sql for sql in statements if "FROM users" in sql]) == 1
+        assert [sql for sql in reads if "FROM users" in sql]
+    finally:
+        event.remove(Engine, "before_cursor_execute", listener)
@@ -0,0 +1,83 @@
+# tests/test_session_tokens.py
+
+import time
+
+from sqlalchemy import event
+
+from tests.conftest import engine
+
+
+def _exchange(client, user, auth_headers) -> str:
+    r = client.post("/api/v1/auth/session", headers=auth_headers(user))
+    assert r.status_code == 200
+    body = r.json()
+    assert body["token_type"] == "bearer"
+    assert body["role"] == user.role
+    assert body["expires_at"] > time.time()
+    return body["access_token"]
+
+
+def test_session_token_flow(
+    client,
+    db_session,
+    customer,
+    executor,
+    admin,
+    auth_headers,
+    monkeypatch,
+):
+    customer_token = _exchange(client, customer, auth_headers)
+    executor_token = _exchange(client, executor, auth_headers)
+    admin_headers = auth_headers(admin)
+
+    def bearer(token: str) -> dict:
+        return {"Authorization": f"Bearer {token}"}
+
+    # 1) Токен заменяет initData
+    r = client.get("/api/v1/users/me", headers=bearer(executor_token))
+    assert r.status_code == 200
+    assert r.json()["id"] == executor.id
+
+    # 2) Авторизация и проверка роли — без запросов к users
+    user_queries = []
+
+    def count_user_queries(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            user_queries.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_user_queries)
+    try:
+        db_session.expunge_all()
+        r = client.get("/api/v1/orders/my", headers=bearer(customer_token))
+        assert r.status_code == 200
+        r = client.get("/api/v1/orders/my", headers=bearer(executor_token))
+        assert r.status_code == 403
+    finally:
+        event.remove(engine, "before_cursor_execute", count_user_queries)
+    assert user_queries == []
+
+    # 3) Подделанный токен
+    # чужая подпись к payload исполнителя
+    forged = executor_token.partition(".")[0] + "." + customer_token.partition(".")[2]
+    r = client.get("/api/v1/orders/my", headers=bearer(forged))
+    assert r.status_code == 401
+
+    # 4) Блокировка отзывает уже выданные токены, разблокировка — возвращает
+    r = client.patch(f"/api/v1/admin/users/{executor.id}/block", headers=admin_headers)
+    assert r.status_code == 200
+    r = client.get("/api/v1/users/me", headers=bearer(executor_token))
+    assert r.status_code == 403
+    r = client.post("/api/v1/auth/session", headers=auth_headers(executor))
+    assert r.status_code == 403
+
+    r = client.patch(f"/api/v1/admin/users/{executor.id}/unblock", headers=admin_headers)
+    assert r.status_code == 200
+    r = client.get("/api/v1/users/me", headers=bearer(executor_token))
+    assert r.status_code == 200
+
+    # 5) Просроченный токен
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 24 * 60 * 60)
+    r = client.get("/api/v1/users/me", headers=bearer(executor_token))
+    assert r.status_code == 401
+    assert r.json()["detail"] == "USER_INVALID_TOKEN"
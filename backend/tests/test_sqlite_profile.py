@@ -0,0 +1,46 @@
+# tests/test_sqlite_profile.py
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.sqlite import PROFILE_PRODUCTION, engine_kwargs, install_sqlite_pragmas
+from app.services.db_maintenance import run_sqlite_maintenance
+
+
+def test_production_profile_pragmas_and_maintenance(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SQLITE_PROFILE", PROFILE_PRODUCTION)
+    monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 7000)
+
+    url = f"sqlite:///{tmp_path / 'prod.db'}"
+    engine = create_engine(url, **engine_kwargs(url))
+    install_sqlite_pragmas(engine)
+    assert engine.pool.size() == settings.DB_POOL_SIZE
+
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        # 1 = NORMAL
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 7000
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -settings.SQLITE_CACHE_SIZE_KB
+
+    # первый проход — полный ANALYZE, дальше PRAGMA optimize; WAL обрезается
+    first = run_sqlite_maintenance(engine)
+    assert first.analyzed is True
+    assert first.checkpoint is not None and first.checkpoint[0] == 0
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM sqlite_stat1")).scalar() > 0
+
+    second = run_sqlite_maintenance(engine)
+    assert second.analyzed is False
+    engine.dispose()
+
+
+def test_default_profile_keeps_rollback_journal(tmp_path):
+    url = f"sqlite:///{tmp_path / 'dev.db'}"
+    engine = create_engine(url, **engine_kwargs(url))
+    install_sqlite_pragmas(engine)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+    engine.dispose()
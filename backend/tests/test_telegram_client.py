@@ -0,0 +1,92 @@
+# tests/test_telegram_client.py
+
+import time
+
+import pytest
+
+from bot.client import TelegramBotClient
+from bot.rate_limit import TokenBucket
+
+TOKEN = "123456:TEST-TOKEN"
+
+
+@pytest.fixture()
+def fake_api(bot_api):
+    """sendMessage: 429 для чатов из throttle, 400 для chat_id < 0."""
+    bot_api.throttle = {}
+    bot_api.retry_after = 0
+
+    def send_message(params):
+        chat_id = params["chat_id"]
+        if bot_api.throttle.get(chat_id):
+            bot_api.throttle[chat_id] -= 1
+            return 429, {"ok": False, "error_code": 429, "parameters": {"retry_after": bot_api.retry_after}}
+        if chat_id < 0:
+            return 400, {"ok": False, "error_code": 400, "description": "Bad Request: chat not found"}
+        return {"message_id": len(bot_api.calls)}
+
+    bot_api.responses["sendMessage"] = send_message
+    return bot_api
+
+
+def _client(server, **kwargs) -> TelegramBotClient:
+    return TelegramBotClient(TOKEN, api_base=server.url, **kwargs)
+
+
+def test_send_message_reuses_connection_and_counts(fake_api):
+    bot = _client(fake_api, per_chat_rate=1000)
+
+    for chat_id in (1, 2, 3):
+        assert bot.send_message(chat_id, "привет", reply_markup={"inline_keyboard": []}) is True
+    assert bot.send_message(-1, "никому") is False
+
+    assert fake_api.paths == [f"/bot{TOKEN}/sendMessage"] * 4
+    assert fake_api.calls[0][1]["parse_mode"] == "HTML"
+    # keep-alive: все запросы пришли по одному соединению
+    assert len(fake_api.connections) == 1
+
+    stats = bot.stats()
+    assert (stats.sent, stats.throttled, stats.failed) == (3, 0, 1)
+    bot.close()
+
+
+def test_send_message_honors_retry_after(fake_api):
+    bot = _client(fake_api, per_chat_rate=1000, max_retry_after=1)
+
+    fake_api.throttle[10] = 1
+    assert bot.send_message(10, "после паузы") is True
+
+    # просят ждать дольше, чем готовы — ошибка, повтор за outbox
+    fake_api.retry_after = 3
+    fake_api.throttle[20] = 1
+    assert bot.send_message(20, "позже") is False
+
+    stats = bot.stats()
+    assert (stats.sent, stats.throttled, stats.failed) == (1, 2, 1)
+    assert len(fake_api.calls) == 3
+    bot.close()
+
+
+def test_per_chat_rate_limit_spaces_messages(fake_api):
+    bot = _client(fake_api, per_chat_rate=20)
+
+    started = time.monotonic()
+    for _ in range(3):
+        assert bot.send_message(7, "подряд")
+    # первый — сразу, следующие — не чаще 20 в секунду
+    assert time.monotonic() - started >= 2 / 20
+    bot.close()
+
+
+def test_token_bucket_reservations():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    now[0] = 10.0
+    assert bucket.idle()
+    assert bucket.reserve() == 0
@@ -0,0 +1,88 @@
+# tests/test_telegram_webhook.py
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main
+import bot.main
+from app.core.config import settings
+from bot.webhook import WebhookBot, bot_webhook
+
+TOKEN = "123456:TEST-TOKEN"
+SECRET = "webhook-secret"
+
+
+@pytest.fixture()
+def fake_api(bot_api, monkeypatch):
+    """getMe и sendMessage; на остальные методы — «принято»."""
+    bot_api.responses["getMe"] = {
+        "id": 123456, "is_bot": True, "first_name": "WorkScout", "username": "WorkScoutBot",
+    }
+    bot_api.responses["sendMessage"] = lambda params: {
+        "message_id": 1, "date": 0, "chat": {"id": int(params["chat_id"]), "type": "private"},
+    }
+    monkeypatch.setattr(bot.main, "TELEGRAM_API_BASE", bot_api.url)
+    return bot_api
+
+
+def _start_update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": 777, "type": "private"},
+            "from": {"id": 777, "is_bot": False, "first_name": "Иван"},
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    }
+
+
+def test_webhook_feeds_updates_to_bot_handlers(fake_api, monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_ENABLED", True)
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_SECRET", SECRET)
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_URL", "https://example.test/api/v1/telegram/webhook")
+    monkeypatch.setattr(app.main, "TELEGRAM_BOT_TOKEN", TOKEN)
+
+    with TestClient(app.main.app) as client:
+        assert bot_webhook.running
+        set_webhook = [params for method, params in fake_api.calls if method == "setWebhook"]
+        assert set_webhook and set_webhook[0]["secret_token"] == SECRET
+
+        url = "/api/v1/telegram/webhook"
+        assert client.post(url, json=_start_update(1)).status_code == 403
+        r = client.post(url, json=_start_update(1), headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"})
+        assert r.status_code == 403
+
+        r = client.post(url, json=_start_update(2), headers={"X-Telegram-Bot-Api-Secret-Token": SECRET})
+        assert r.status_code == 200
+
+        # /start обрабатывается в фоне и отвечает через Bot API
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            replies = [params for method, params in fake_api.calls if method == "sendMessage"]
+            if replies:
+                break
+            time.sleep(0.05)
+        assert replies and int(replies[0]["chat_id"]) == 777
+        assert "WorkScout" in replies[0]["text"]
+
+    assert not bot_webhook.running
+
+
+def test_webhook_disabled_by_default(client):
+    r = client.post("/api/v1/telegram/webhook", json=_start_update(1))
+    assert r.status_code == 404
+
+
+def test_update_queue_is_bounded():
+    webhook = WebhookBot()
+    # очередь никто не разбирает — Application не запущен
+    webhook.application = bot.main.build_application(TOKEN, webhook=True, update_queue_size=2)
+
+    assert webhook.feed(_start_update(1))
+    assert webhook.feed(_start_update(2))
+    assert not webhook.feed(_start_update(3))
@@ -30,6 +30,9 @@ export interface Order {
 
   has_photos: boolean;
   photos: string[]; // ✅ ДОБАВИЛИ (OrderOut у тебя это отдаёт)
+  // уменьшенные WebP-копии тех же фото (для старых — оригиналы)
+  photo_thumbs?: string[];
+  photo_medium?: string[];
 
   created_at: string;
   executor_id: number | null;
@@ -171,11 +174,24 @@ export interface AvailableOrderDto {
   date_to: string | null;
   has_photos: boolean;
   photos: string[]; // ✅
+  photo_thumbs?: string[];
+  photo_medium?: string[];
   created_at: string;
 }
 
-export async function getAvailableOrders(): Promise<AvailableOrderDto[]> {
-  return apiFetch<AvailableOrderDto[]>("/orders/all-active");
+/** Страница ленты (AvailableOrdersPage) */
+export interface AvailableOrdersPage {
+  items: AvailableOrderDto[];
+  next_cursor: string | null;
+}
+
+export async function getAvailableOrdersPage(
+  cursor?: string | null,
+  limit = 20
+): Promise<AvailableOrdersPage> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) params.set("cursor", cursor);
+  return apiFetch<AvailableOrdersPage>(`/orders/all-active?${params}`);
 }
 
 /** Загрузка фото к заказу (POST /orders/{id}/photos) */
@@ -1,8 +1,8 @@
-import { type FormEvent, useEffect, useMemo, useState } from "react";
+import { type FormEvent, useCallback, useEffect, useMemo, useRef, useState } from "react";
 import Page from "../../components/layout/Page";
 import Button from "../../components/ui/Button";
 import BottomSheet from "../../components/ui/BottomSheet";
-import { getAvailableOrders, type AvailableOrderDto } from "../../api/orders";
+import { getAvailableOrdersPage, type AvailableOrderDto } from "../../api/orders";
 import { sendOrderResponse } from "../../api/responses";
 
 type SortMode = "recent" | "budget" | "deadline";
@@ -19,6 +19,9 @@ type Order = {
   description: string;
   hasPhotos: boolean;
   photos: string[]; // ✅ новое
+  // превью для карточки и модалки — килобайты вместо оригинала
+  thumbs: string[];
+  previews: string[];
   createdAt: number;
   deadlineWeight: number;
 };
@@ -91,6 +94,8 @@ function mapApiOrder(dto: AvailableOrderDto): Order {
     description: dto.description,
     hasPhotos: photos.length > 0 || !!dto.has_photos,
     photos,
+    thumbs: dto.photo_thumbs?.length ? dto.photo_thumbs : photos,
+    previews: dto.photo_medium?.length ? dto.photo_medium : photos,
     createdAt: Number.isNaN(createdAt) ? Date.now() : createdAt,
     deadlineWeight: Number.isNaN(deadlineTs)
       ? Number.MAX_SAFE_INTEGER
@@ -113,7 +118,7 @@ function OrderDetailsModal({
 }) {
   if (!open || !order) return null;
 
-  const cover = order.photos?.[0] ?? null;
+  const cover = order.previews?.[0] ?? null;
 
   return (
     <>
@@ -247,6 +252,10 @@ export default function ExecutorOrders() {
   const [orders, setOrders] = useState<Order[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  // лента отдаётся страницами: следующую берём по next_cursor
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const loadMoreRef = useRef<HTMLDivElement | null>(null);
 
   const [cityFilter, setCityFilter] = useState<string | null>(null);
   const [selectedCategories, setSelectedCategories] = useState<string[]>([]);
@@ -274,10 +283,10 @@ export default function ExecutorOrders() {
       try {
         setLoading(true);
         setError(null);
-        const api = await getAvailableOrders();
+        const page = await getAvailableOrdersPage();
         if (cancelled) return;
-        const mapped = api.map(mapApiOrder);
-        setOrders(mapped);
+        setOrders(page.items.map(mapApiOrder));
+        setNextCursor(page.next_cursor);
       } catch (e) {
         console.error(e);
         if (!cancelled) {
@@ -293,6 +302,43 @@ export default function ExecutorOrders() {
     };
   }, []);
 
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await getAvailableOrdersPage(nextCursor);
+      setOrders((prev) => {
+        const seen = new Set(prev.map((o) => o.id));
+        return [
+          ...prev,
+          ...page.items.map(mapApiOrder).filter((o) => !seen.has(o.id)),
+        ];
+      });
+      setNextCursor(page.next_cursor);
+    } catch (e) {
+      console.error(e);
+      setToast("Не удалось загрузить ещё заказы. Попробуйте ещё раз.");
+      setTimeout(() => setToast(null), 2300);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [nextCursor, loadingMore]);
+
+  // бесконечная прокрутка: догружаем, когда низ списка показался на экране
+  useEffect(() => {
+    const el = loadMoreRef.current;
+    if (!el || !nextCursor || typeof IntersectionObserver === "undefined") return;
+
+    const observer = new IntersectionObserver(
+      (entries) => {
+        if (entries.some((entry) => entry.isIntersecting)) loadMore();
+      },
+      { rootMargin: "300px" }
+    );
+    observer.observe(el);
+    return () => observer.disconnect();
+  }, [nextCursor, loadMore]);
+
   const cities = useMemo(
     () =>
       Array.from(
@@ -532,7 +578,7 @@ export default function ExecutorOrders() {
           )}
 
           {filteredOrders.map((order) => {
-            const cover = order.photos?.[0] ?? null;
+            const cover = order.thumbs?.[0] ?? null;
 
             return (
               <article
@@ -636,6 +682,24 @@ export default function ExecutorOrders() {
               </article>
             );
           })}
+
+          {!loading && !error && nextCursor && (
+            <div ref={loadMoreRef} className="pt-1">
+              <button
+                type="button"
+                disabled={loadingMore}
+                onClick={loadMore}
+                className="
+                  w-full px-3 py-2.5 rounded-2xl text-[12px]
+                  bg-white/6 border border-white/22
+                  text-blue-50 disabled:opacity-60
+                  active:scale-[0.97] transition
+                "
+              >
+                {loadingMore ? "Загрузка..." : "Показать ещё"}
+              </button>
+            </div>
+          )}
         </div>
       </div>
 